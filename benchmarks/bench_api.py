@@ -0,0 +1,161 @@
+"""
+Test de charge de l'API HTTP (maisondudroit/api.py) sur une base locale.
+
+N clients simultanés (un thread et une connexion HTTP persistante chacun)
+envoient pendant --duree secondes un mélange de requêtes : saisies
+POST /entretiens construites d'après GET /questionnaire (modalités tirées
+au hasard), lectures GET /statistiques et GET /questionnaire. Affiche,
+par route et au total : nombre, erreurs, débit (req/s) et latences
+p50 / p99 / max. Les entretiens créés sont supprimés en fin de mesure.
+
+Usage :
+    python -m maisondudroit.api --port 8000 &
+    python benchmarks/bench_api.py [--url http://127.0.0.1:8000] [--clients 16] [--duree 30]
+                                   [--melange saisie=6,statistiques=3,questionnaire=1] [--garder]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from maisondudroit import db
+from maisondudroit.saisie_entretien import ENTRETIEN_COLUMNS, MAX_CHOIX
+
+ROUTES = {
+    'saisie': ("POST", "/entretiens"),
+    'statistiques': ("GET", "/statistiques?periode=mois"),
+    'questionnaire': ("GET", "/questionnaire"),
+}
+
+
+def request(conn, method, path, body=None):
+    """(statut, corps décodé) ; la connexion reste ouverte (keep-alive)."""
+    payload = json.dumps(body).encode() if body is not None else None
+    headers = {'Content-Type': 'application/json'} if payload else {}
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b"null")
+
+
+def random_submission(questionnaire, rng):
+    """Corps de POST /entretiens valide, tiré au hasard dans la structure du questionnaire."""
+    data = {}
+    for variables in questionnaire['rubriques'].values():
+        for var in variables:
+            col = var['lib'].lower()
+            if col not in ENTRETIEN_COLUMNS:
+                continue
+            options = var['options']
+            if var['type'] == 'MOD' and options:
+                data[col] = rng.choice(list(options.values()))
+            elif var['type'] == 'NUM':
+                data[col] = rng.randint(options.get('min') or 0, options.get('max') or 99)
+            elif var['type'] == 'CHAINE':
+                data[col] = rng.choice(options) if options else "Test de charge"
+    natures = {}
+    for key in ('demandes', 'solutions'):
+        codes = list(questionnaire[key].values())
+        natures[key] = rng.sample(codes, rng.randint(1, min(MAX_CHOIX, len(codes)))) if codes else []
+    return {'entretien': data, **natures}
+
+
+def client(url, mix, deadline, questionnaire, results, nums, lock, seed):
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    try:
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path = ROUTES[name]
+            body = random_submission(questionnaire, rng) if name == 'saisie' else None
+            start = time.perf_counter()
+            try:
+                status, answer = request(conn, method, path, body)
+            except (OSError, http.client.HTTPException):
+                conn.close()    # reconnexion à la requête suivante
+                status, answer = None, None
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                results.append((name, elapsed, status is not None and status < 400))
+                if name == 'saisie' and status == 201:
+                    nums.append(answer['num'])
+    finally:
+        conn.close()
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(results, elapsed):
+    print(f"\n{'Route':<15} {'Requêtes':>9} {'Erreurs':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name in [*ROUTES, 'total']:
+        rows = [r for r in results if name in (r[0], 'total')]
+        if not rows:
+            continue
+        latencies = sorted(r[1] for r in rows)
+        errors = sum(1 for r in rows if not r[2])
+        print(f"{name:<15} {len(rows):>9} {errors:>8} {len(rows) / elapsed:>8.0f} "
+              f"{percentile(latencies, 0.50):>8.1f} {percentile(latencies, 0.99):>8.1f} {latencies[-1]:>8.1f}")
+
+
+def cleanup(nums):
+    with db.checkout() as conn:
+        cursor = conn.cursor()
+        for table in ('demande', 'solution', 'entretien'):
+            cursor.execute(f"DELETE FROM {table} WHERE num = ANY(%s)", (nums,))
+        conn.commit()
+        cursor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duree", type=float, default=30, help="secondes de mesure")
+    parser.add_argument("--melange", default="saisie=6,statistiques=3,questionnaire=1",
+                        help="poids de chaque route")
+    parser.add_argument("--garder", action='store_true', help="conserve les entretiens créés")
+    args = parser.parse_args(argv)
+
+    url = urlsplit(args.url)
+    mix = {name: float(weight) for name, weight in (item.split("=") for item in args.melange.split(","))}
+    unknown = set(mix) - set(ROUTES)
+    if unknown:
+        parser.error(f"routes inconnues : {', '.join(sorted(unknown))} (choisir parmi {', '.join(ROUTES)})")
+
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    status, questionnaire = request(conn, "GET", "/questionnaire")
+    conn.close()
+    if status != 200:
+        print(f"GET /questionnaire : statut {status}")
+        return 1
+
+    results, nums, lock = [], [], threading.Lock()
+    start = time.perf_counter()
+    deadline = start + args.duree
+    threads = [threading.Thread(target=client, args=(url, mix, deadline, questionnaire, results, nums, lock, i))
+               for i in range(args.clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.clients} clients, {elapsed:.1f}s, mélange {args.melange}")
+    report(results, elapsed)
+    if nums and not args.garder:
+        cleanup(nums)
+        db.close_pools()
+        print(f"\n{len(nums)} entretiens de test supprimés.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Benchmark du temps d'import à froid.
+
+Chaque cible est importée dans un interpréteur neuf (python -X importtime),
+plusieurs fois ; on garde la mesure la plus rapide. Cibles :
+  - le paquet maisondudroit seul, puis chacun de ses modules ;
+  - chaque page Streamlit : ses seules instructions d'import de premier
+    niveau (le corps de la page demande un serveur Streamlit et une base).
+    poc_global.py est le routeur : la ré-exécution d'une page coûte le
+    routeur plus la page (pages/*.py).
+Pour chaque cible : temps d'import total, présence de pandas / plotly.express /
+streamlit / psycopg2 et paquets les plus coûteux.
+
+Usage :
+    python benchmarks/bench_import.py [--repetitions 5] [--json imports.json]
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+from maisondudroit import MODULES
+
+PAGES = ["poc_global.py", "pages/alimentation.py", "pages/visualisation.py", "pages/configuration.py",
+         "pages/admin_sql.py", "poc_formulaire_alimantation.py", "poc_reporting.py", "formulaire_ajout_variable.py"]
+WATCHED = ("pandas", "plotly.express", "streamlit", "psycopg2")    # streamlit charge seul un plotly minimal
+TOP = 3
+
+# "import time:       412 |        987 |   maisondudroit.db"
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def page_imports(page):
+    """Code des imports de premier niveau d'une page (sans exécuter la page)."""
+    with open(os.path.join(ROOT, page), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    nodes = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in nodes)
+
+
+def measure(code):
+    """
+    Un import dans un processus neuf : (total ms, {paquet de premier niveau: ms cumulées},
+    ensemble des modules chargés à toute profondeur).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total, packages, loaded = 0, {}, set()
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        total += int(self_us)
+        loaded.add(name)
+        if len(indent) == 1:    # import de premier niveau
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0) + int(cumulative_us) / 1000
+    return total / 1000, packages, loaded
+
+
+def bench(label, code, repetitions):
+    runs = [measure(code) for _ in range(repetitions)]
+    total, packages, loaded = min(runs, key=lambda run: run[0])
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP]
+    row = {'cible': label, 'ms': round(total, 1),
+           **{name: name in loaded for name in WATCHED},
+           'plus_couteux': [(name, round(ms, 1)) for name, ms in heaviest]}
+    loaded = " ".join(name for name in WATCHED if row[name]) or "-"
+    top = ", ".join(f"{name} {ms:.0f}" for name, ms in row['plus_couteux'])
+    print(f"{label:<42} {total:>8.1f} ms   {loaded:<45} {top}")
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--json", help="écrit les mesures dans ce fichier")
+    args = parser.parse_args(argv)
+
+    print(f"{'Cible':<42} {'Import':>11}   {'Chargés':<45} Plus coûteux (ms)")
+    rows = [bench("maisondudroit", "import maisondudroit", args.repetitions)]
+    for module in MODULES:
+        rows.append(bench(f"maisondudroit.{module}", f"import maisondudroit.{module}", args.repetitions))
+    for page in PAGES:
+        rows.append(bench(f"page {page}", page_imports(page), args.repetitions))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
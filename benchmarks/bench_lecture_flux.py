@@ -0,0 +1,88 @@
+"""
+Benchmark mémoire de la lecture des entretiens.
+
+Compare fetchall() sur un RealDictCursor (un dict Python par ligne, puis
+copie par pandas) à db.read_frame (curseur serveur nommé, lots de
+--itersize lignes convertis en colonnes Arrow). Chaque mesure tourne dans
+un processus neuf : le pic de mémoire résidente (ru_maxrss) inclut les
+allocations Arrow, invisibles pour tracemalloc.
+
+Les entretiens sont générés dans une table temporaire (voir
+bench_reporting.py) : la base n'est pas modifiée.
+
+Usage :
+    python benchmarks/bench_lecture_flux.py [--tailles 100000 1000000] [--itersize 10000]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import pandas as pd
+from psycopg2.extras import RealDictCursor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from maisondudroit import db
+from bench_reporting import seed_entretiens
+
+QUERY = "SELECT * FROM entretien"
+
+
+def legacy_read(conn, itersize):
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cursor.execute(QUERY)
+        return pd.DataFrame(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def stream_read(conn, itersize):
+    return db.read_frame(conn, QUERY, itersize=itersize)
+
+
+def _maxrss_mb():
+    # Linux : ko ; macOS : octets
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def _measure(reader, taille, itersize, results):
+    with db.checkout() as conn:
+        seed_entretiens(conn, taille)
+        base = _maxrss_mb()
+        start = time.perf_counter()
+        df = reader(conn, itersize)
+        elapsed = time.perf_counter() - start
+        peak = _maxrss_mb() - base
+        conn.rollback()
+    db.close_pools()
+    results.put((elapsed, peak, df.memory_usage(deep=True).sum() / 2**20))
+
+
+def measure(label, reader, taille, itersize):
+    results = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=_measure, args=(reader, taille, itersize, results))
+    proc.start()
+    elapsed, peak, final = results.get()
+    proc.join()
+    print(f"  {label:<12} {elapsed:7.2f} s | pic RSS +{peak:8.1f} Mo | DataFrame {final:8.1f} Mo "
+          f"| ratio {peak / final if final else 0:4.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tailles", type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument("--itersize", type=int, default=db.ITERSIZE)
+    args = parser.parse_args()
+
+    for taille in args.tailles:
+        print(f"\n{taille} entretiens (itersize {args.itersize})")
+        measure("fetchall", legacy_read, taille, args.itersize)
+        measure("read_frame", stream_read, taille, args.itersize)
+
+
+if __name__ == "__main__":
+    main()
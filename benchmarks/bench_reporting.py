@@ -0,0 +1,105 @@
+"""
+Benchmark du chargement des données de reporting.
+
+Compare l'ancien décodage pandas (SELECT * puis .astype(str).map().fillna()
+colonne par colonne) au décodage SQL de reporting.py (jointures sur
+modalite, colonnes Categorical). Mesure la latence et le pic mémoire
+Python (tracemalloc) à 10k, 100k et 1M entretiens.
+
+Les entretiens sont générés dans une table temporaire "entretien" qui
+masque la table réelle pour la seule session du benchmark : la base
+n'est pas modifiée. Les variables / modalités réelles sont utilisées.
+
+Usage :
+    python benchmarks/bench_reporting.py [--tailles 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+from psycopg2.extras import RealDictCursor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from maisondudroit import db
+from maisondudroit.reporting import load_reporting_frame
+
+
+def legacy_reporting(conn):
+    """Ancienne version de get_data_for_reporting (décodage en pandas)."""
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cursor.execute("SELECT * FROM entretien")
+        df = pd.DataFrame(cursor.fetchall())
+        if df.empty:
+            return df
+        cursor.execute("SELECT pos, lib FROM variable WHERE tab='ENTRETIEN'")
+        vars_map = {row['lib'].lower(): row['pos'] for row in cursor.fetchall()}
+        cursor.execute("SELECT pos, code, lib_m FROM modalite WHERE tab='ENTRETIEN'")
+        decodage_map = {}
+        for row in cursor.fetchall():
+            decodage_map.setdefault(row['pos'], {})[str(row['code'])] = row['lib_m']
+        for col_name in df.columns:
+            if col_name in vars_map and vars_map[col_name] in decodage_map:
+                df[col_name] = df[col_name].astype(str).map(decodage_map[vars_map[col_name]]).fillna(df[col_name].astype(str))
+        return df
+    finally:
+        cursor.close()
+
+
+def seed_entretiens(conn, taille):
+    """Remplit une table temporaire entretien avec des codes tirés des vraies modalités."""
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS pg_temp.entretien")
+    cursor.execute("CREATE TEMP TABLE entretien (LIKE public.entretien INCLUDING DEFAULTS)")
+    cursor.execute("""
+        INSERT INTO entretien (num, date_ent, mode, duree, sexe, age, vient_pr, sit_fam, enfant,
+                               modele_fam, profession, ress, origine, commune, partenaire)
+        SELECT g, DATE '2020-01-01' + (g % 1800),
+               1 + (random() * 4)::int, 1 + (random() * 4)::int, 1 + (random() * 3)::int,
+               1 + (random() * 4)::int, 1 + (random() * 5)::int, (1 + (random() * 6)::int)::text,
+               (random() * 4)::int, 1 + (random() * 3)::int, 1 + (random() * 11)::int,
+               1 + (random() * 9)::int, (1 + (random() * 5)::int)::text,
+               (ARRAY['Vannes', 'Séné', 'St Avé', 'Theix', 'Arradon'])[1 + (random() * 4)::int], NULL
+        FROM generate_series(1, %s) g
+    """, (taille,))
+    cursor.execute("ANALYZE entretien")
+    conn.commit()
+    cursor.close()
+
+
+def measure(label, loader, conn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = loader(conn)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    final = df.memory_usage(deep=True).sum()
+    print(f"  {label:<10} {elapsed:8.2f} s | pic {peak / 2**20:8.1f} Mo | DataFrame {final / 2**20:8.1f} Mo")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tailles", type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    with db.checkout() as conn:
+        try:
+            for taille in args.tailles:
+                seed_entretiens(conn, taille)
+                print(f"\n{taille} entretiens")
+                measure("pandas", legacy_reporting, conn)
+                measure("SQL", load_reporting_frame, conn)
+        finally:
+            cursor = conn.cursor()
+            cursor.execute("DROP TABLE IF EXISTS pg_temp.entretien")
+            conn.commit()
+            cursor.close()
+    db.close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark de l'enregistrement d'un entretien sous charge.
+
+Compare l'ancien enchaînement (insert_full_entretien, insert_demandes,
+insert_solutions : 3 transactions, 3 commits) à submit_entretien
+(1 instruction, 1 commit), avec N sessions simultanées sur un PostgreSQL
+local. Affiche la latence par étape (médiane / p95) et le débit.
+--differee mesure aussi la saisie différée (saisie_differee.py) : latence
+d'écriture dans le journal local, puis durée de transmission par lots.
+Les entretiens créés sont supprimés en fin de mesure.
+
+Usage :
+    python benchmarks/bench_saisie_entretien.py [--sessions 8] [--saisies 50] [--differee]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from maisondudroit import db
+from maisondudroit.saisie_differee import WriteBehindJournal
+from maisondudroit.saisie_entretien import ENTRETIEN_COLUMNS, submit_entretien
+
+DATA = {'mode': 1, 'duree': 2, 'sexe': 1, 'age': 3, 'vient_pr': 1, 'sit_fam': '1',
+        'enfant': 0, 'profession': 6, 'ress': 1, 'origine': '2', 'commune': 'Vannes'}
+DEMANDES = ['1a', '2a']
+SOLUTIONS = ['1']
+
+
+def legacy_submit(conn):
+    """Ancien chemin : une transaction par table."""
+    timings = {}
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    cols = ", ".join(['date_ent'] + ENTRETIEN_COLUMNS)
+    marks = ", ".join(["%s"] * (len(ENTRETIEN_COLUMNS) + 1))
+    cursor.execute(f"INSERT INTO entretien ({cols}) VALUES ({marks}) RETURNING num",
+                   [date.today()] + [DATA.get(c) for c in ENTRETIEN_COLUMNS])
+    num = cursor.fetchone()[0]
+    conn.commit()
+    timings['entretien'] = (time.perf_counter() - start) * 1000
+
+    step = time.perf_counter()
+    cursor.executemany("INSERT INTO demande (num, pos, nature) VALUES (%s,%s,%s)",
+                       [(num, i + 1, c) for i, c in enumerate(DEMANDES)])
+    conn.commit()
+    timings['demandes'] = (time.perf_counter() - step) * 1000
+
+    step = time.perf_counter()
+    cursor.executemany("INSERT INTO solution (num, pos, nature) VALUES (%s,%s,%s)",
+                       [(num, i + 1, c) for i, c in enumerate(SOLUTIONS)])
+    conn.commit()
+    timings['solutions'] = (time.perf_counter() - step) * 1000
+    cursor.close()
+
+    timings['total'] = (time.perf_counter() - start) * 1000
+    return num, timings
+
+
+def atomic_submit(conn):
+    return submit_entretien(DATA, DEMANDES, SOLUTIONS, conn=conn)
+
+
+def run(label, submit, sessions, saisies):
+    results, nums, lock = [], [], threading.Lock()
+
+    def session():
+        for _ in range(saisies):
+            with db.checkout() as conn:
+                num, timings = submit(conn)
+            with lock:
+                results.append(timings)
+                nums.append(num)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{label} : {len(results)} saisies en {elapsed:.2f}s ({len(results) / elapsed:.0f}/s)")
+    for stage in results[0]:
+        values = sorted(r[stage] for r in results)
+        p95 = values[int(len(values) * 0.95) - 1]
+        print(f"  {stage:<12} médiane {statistics.median(values):7.2f} ms | p95 {p95:7.2f} ms")
+    return nums
+
+
+def run_write_behind(sessions, saisies):
+    """Saisies écrites dans un journal local neuf, puis transmises par lots."""
+    with tempfile.TemporaryDirectory() as folder:
+        journal = WriteBehindJournal(os.path.join(folder, "saisies.sqlite"))
+
+        def submit(conn):
+            return journal.append(DATA, DEMANDES, SOLUTIONS)
+        # run() emprunte une connexion par saisie : le journal ne s'en sert pas
+        run("Saisie différée (journal local)", submit, sessions, saisies)
+
+        start = time.perf_counter()
+        sent = journal.flush_all()
+        elapsed = time.perf_counter() - start
+        print(f"  transmission : {sent} saisies en {elapsed:.2f}s ({sent / elapsed:.0f}/s, "
+              f"lots de {journal.batch_size})")
+        return [num for (num,) in journal._db().execute("SELECT num FROM saisie WHERE num IS NOT NULL")]
+
+
+def cleanup(nums):
+    with db.checkout() as conn:
+        cursor = conn.cursor()
+        for table in ('demande', 'solution', 'entretien'):
+            cursor.execute(f"DELETE FROM {table} WHERE num = ANY(%s)", (nums,))
+        conn.commit()
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--saisies", type=int, default=50, help="saisies par session")
+    parser.add_argument("--differee", action='store_true', help="mesure aussi la saisie différée")
+    args = parser.parse_args()
+
+    db.POOL_MAX = max(db.POOL_MAX, args.sessions)
+    nums = []
+    try:
+        nums += run("3 transactions", legacy_submit, args.sessions, args.saisies)
+        nums += run("1 transaction", atomic_submit, args.sessions, args.saisies)
+        if args.differee:
+            nums += run_write_behind(args.sessions, args.saisies)
+    finally:
+        if nums:
+            cleanup(nums)
+        db.close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark du chargement de la structure du questionnaire.
+
+Compare l'ancien chargement N+1 (une requête par variable) au chargeur
+ensembliste de structure_questionnaire.py, sur un PostgreSQL local.
+Mesure le nombre d'allers-retours SQL et le temps de chargement.
+
+Usage :
+    python benchmarks/bench_structure_questionnaire.py [--repetitions 20]
+
+Connexion via les variables d'environnement PG_HOST, PG_PORT, PG_DB,
+PG_USER, PG_PASSWORD (valeurs par défaut de poc_global.py).
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from maisondudroit.structure_questionnaire import load_questionnaire_structure
+
+
+# --- Curseur qui compte les allers-retours ---
+class CountingCursor(RealDictCursor):
+    round_trips = 0
+
+    def execute(self, query, vars=None):
+        CountingCursor.round_trips += 1
+        return super().execute(query, vars)
+
+
+class CountingConnection(psycopg2.extensions.connection):
+    def cursor(self, *args, **kwargs):
+        # On force le curseur compteur quel que soit le cursor_factory demandé
+        kwargs['cursor_factory'] = CountingCursor
+        return super().cursor(*args, **kwargs)
+
+
+# --- Ancienne implémentation (N+1), conservée pour comparaison ---
+def legacy_questionnaire_structure(conn):
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    structure = {}
+    try:
+        cursor.execute("SELECT pos, lib FROM rubrique ORDER BY pos")
+        rubriques = {row['pos']: row['lib'] for row in cursor.fetchall()}
+
+        cursor.execute("""
+            SELECT pos, lib, commentaire, type_v, rubrique
+            FROM variable
+            WHERE tab = %s AND type_v IN ('MOD','NUM','CHAINE')
+            ORDER BY rubrique, pos
+        """, ('ENTRETIEN',))
+        variables = cursor.fetchall()
+
+        for var in variables:
+            rubrique_lib = rubriques.get(var['rubrique'], "Autres Champs")
+            if rubrique_lib not in structure:
+                structure[rubrique_lib] = []
+
+            var_data = {
+                'pos': var['pos'], 'lib': var['lib'], 'type': var['type_v'],
+                'comment': var['commentaire'], 'options': {}
+            }
+            if var['type_v'] == 'MOD':
+                cursor.execute("SELECT code, lib_m FROM modalite WHERE tab = %s AND pos = %s ORDER BY pos_m", ('ENTRETIEN', var['pos']))
+                var_data['options'] = {row['lib_m']: row['code'] for row in cursor.fetchall()}
+            elif var['type_v'] == 'NUM':
+                cursor.execute("SELECT val_min, val_max FROM plage WHERE tab = %s AND pos = %s", ('ENTRETIEN', var['pos']))
+                plage = cursor.fetchone()
+                if plage: var_data['options'] = {'min': plage['val_min'], 'max': plage['val_max']}
+            elif var['type_v'] == 'CHAINE':
+                cursor.execute("SELECT lib FROM valeurs_c WHERE tab = %s AND pos = %s ORDER BY pos_c", ('ENTRETIEN', var['pos']))
+                var_data['options'] = [row['lib'] for row in cursor.fetchall()]
+
+            structure[rubrique_lib].append(var_data)
+        return structure
+    finally:
+        cursor.close()
+
+
+def measure(label, loader, conn, repetitions):
+    durations = []
+    CountingCursor.round_trips = 0
+    result = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = loader(conn)
+        durations.append((time.perf_counter() - start) * 1000)
+    trips = CountingCursor.round_trips // repetitions
+    print(f"{label:<12} | {trips:>6} allers-retours | "
+          f"médiane {statistics.median(durations):8.2f} ms | max {max(durations):8.2f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=os.environ.get("PG_HOST", "localhost"),
+        port=int(os.environ.get("PG_PORT", 5437)),
+        database=os.environ.get("PG_DB", "db_maisondudroit"),
+        user=os.environ.get("PG_USER", "pgis"),
+        password=os.environ.get("PG_PASSWORD", "pgis"),
+        connection_factory=CountingConnection,
+    )
+    try:
+        old = measure("N+1", legacy_questionnaire_structure, conn, args.repetitions)
+        new = measure("ensembliste", load_questionnaire_structure, conn, args.repetitions)
+        nb_vars = sum(len(v) for v in new.values())
+        print(f"{nb_vars} variables, structures identiques : {old == new}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
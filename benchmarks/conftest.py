@@ -0,0 +1,221 @@
+"""
+Suite de benchmarks pytest : saisie, import, reporting et export.
+
+Les mesures tournent sur une base PostgreSQL dédiée (BENCH_DB, même
+schéma que l'application ; migrations appliquées au démarrage), remplie
+par generateur.py à chaque taille de BENCH_TAILLES. Pour chaque test :
+durée, allers-retours avec le serveur (requêtes, lots lus sur un curseur
+serveur, COPY, COMMIT / ROLLBACK) et pic mémoire Python (tracemalloc,
+mesuré sur un second passage pour ne pas fausser la durée).
+
+Les résultats sont écrits dans benchmarks/resultats.json et comparés à
+benchmarks/references.json : durée ou mémoire au-delà de BENCH_SEUIL,
+ou allers-retours en hausse, font échouer le test. Les références
+dépendent de la machine : les enregistrer sur celle qui compare.
+
+Usage :
+    RUN_BENCHMARKS=1 python -m pytest benchmarks -v
+    RUN_BENCHMARKS=1 BENCH_MAJ=1 python -m pytest benchmarks     # enregistre les références
+    RUN_BENCHMARKS=1 BENCH_TAILLES=1000,100000 python -m pytest benchmarks
+"""
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+BENCH_DB = os.environ.get("BENCH_DB", "db_maisondudroit_bench")
+TAILLES = [int(t) for t in os.environ.get("BENCH_TAILLES", "1000,100000,1000000").split(",")]
+SEUIL = float(os.environ.get("BENCH_SEUIL", 0.25))      # +25 % de durée ou de mémoire tolérés
+MEMORY_FLOOR_MB = 1.0       # en dessous, les écarts de mémoire sont du bruit
+GRAINE = 501
+
+REFERENCES = os.path.join(os.path.dirname(__file__), "references.json")
+RESULTATS = os.path.join(os.path.dirname(__file__), "resultats.json")
+
+
+def _counting_classes():
+    from psycopg2 import extensions
+
+    class CountingCursor(extensions.cursor):
+        """Compte les échanges avec le serveur sur la connexion."""
+
+        def _count(self, n=1):
+            self.connection.round_trips += n
+
+        def execute(self, query, vars=None):
+            self._count()
+            return super().execute(query, vars)
+
+        def executemany(self, query, vars_list):
+            vars_list = list(vars_list)
+            self._count(len(vars_list))
+            return super().executemany(query, vars_list)
+
+        def copy_expert(self, sql, file, size=8192):
+            self._count()
+            return super().copy_expert(sql, file, size)
+
+        # Curseur serveur (nommé) : chaque lecture est un FETCH
+        def fetchone(self):
+            if self.name:
+                self._count()
+            return super().fetchone()
+
+        def fetchmany(self, size=None):
+            if self.name:
+                self._count()
+            return super().fetchmany(size) if size is not None else super().fetchmany()
+
+        def fetchall(self):
+            if self.name:
+                self._count()
+            return super().fetchall()
+
+    class CountingConnection(extensions.connection):
+        round_trips = 0
+
+        def cursor(self, *args, **kwargs):
+            kwargs.setdefault('cursor_factory', CountingCursor)
+            return super().cursor(*args, **kwargs)
+
+        def commit(self):
+            self.round_trips += 1
+            return super().commit()
+
+        def rollback(self):
+            self.round_trips += 1
+            return super().rollback()
+
+    return CountingConnection
+
+
+@pytest.fixture(scope="session")
+def bench_conn():
+    if not os.environ.get("RUN_BENCHMARKS"):
+        pytest.skip("Benchmarks désactivés (RUN_BENCHMARKS=1 pour les lancer)")
+    import psycopg2
+    from maisondudroit.db import connection_params
+    from maisondudroit.migration import migrate
+
+    try:
+        conn = psycopg2.connect(connection_factory=_counting_classes(), connect_timeout=2,
+                                **connection_params(BENCH_DB))
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Base de benchmark {BENCH_DB} indisponible : {e}")
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def seed_to(conn, taille):
+    """Amène la base à exactement `taille` entretiens générés (ajout, ou recréation si plus grande)."""
+    from maisondudroit.generateur import generate
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT count(*) FROM entretien")
+        count = cursor.fetchone()[0]
+        if count > taille:
+            cursor.execute("TRUNCATE demande, solution, entretien")
+            cursor.execute("DELETE FROM stat_entretien")    # TRUNCATE ne passe pas par les triggers
+            count = 0
+        conn.commit()
+    finally:
+        cursor.close()
+    if taille > count:
+        generate(taille - count, conn=conn, seed=GRAINE + count)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("ANALYZE entretien, demande, solution")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+@pytest.fixture(scope="session", params=TAILLES, ids=lambda t: f"{t}")
+def taille(request, bench_conn):
+    # Fixture de session paramétrée : pytest regroupe les tests par taille,
+    # la base n'est remplie qu'une fois par taille
+    seed_to(bench_conn, request.param)
+    return request.param
+
+
+@pytest.fixture(scope="session")
+def resultats():
+    results = {}
+    yield results
+    if not results:
+        return
+    with open(RESULTATS, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    if os.environ.get("BENCH_MAJ"):
+        references = _load_references()
+        references.update(results)
+        with open(REFERENCES, "w", encoding="utf-8") as f:
+            json.dump(references, f, indent=2, sort_keys=True)
+
+
+def _load_references():
+    try:
+        with open(REFERENCES, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compare(mesure, reference, seuil=SEUIL):
+    """Écarts bloquants entre une mesure et sa référence (liste vide si rien à signaler)."""
+    ecarts = []
+    if mesure['temps_s'] > reference['temps_s'] * (1 + seuil):
+        ecarts.append(f"durée {mesure['temps_s']:.3f}s > {reference['temps_s']:.3f}s +{seuil:.0%}")
+    if mesure['allers_retours'] > reference['allers_retours']:
+        ecarts.append(f"allers-retours {mesure['allers_retours']} > {reference['allers_retours']}")
+    limite = max(reference['pic_mo'], MEMORY_FLOOR_MB) * (1 + seuil)
+    if mesure['pic_mo'] > limite:
+        ecarts.append(f"mémoire {mesure['pic_mo']:.1f} Mo > {limite:.1f} Mo")
+    return ecarts
+
+
+@pytest.fixture
+def bench(request, bench_conn, resultats):
+    """
+    bench(fn, setup=None, cleanup=None) : mesure fn(conn) et la compare à la référence.
+    setup / cleanup encadrent chaque passage (données créées par la mesure).
+    """
+    def run(fn, setup=None, cleanup=None):
+        conn = bench_conn
+        mesure = {}
+        for traced in (False, True):
+            if setup:
+                setup(conn)
+            if traced:
+                tracemalloc.start()
+            conn.round_trips = 0
+            start = time.perf_counter()
+            try:
+                fn(conn)
+            finally:
+                elapsed = time.perf_counter() - start
+                trips = conn.round_trips
+                if traced:
+                    mesure['pic_mo'] = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+                if cleanup:
+                    cleanup(conn)
+            if not traced:
+                mesure['temps_s'], mesure['allers_retours'] = elapsed, trips
+        resultats[request.node.name] = mesure
+
+        reference = _load_references().get(request.node.name)
+        if reference and not os.environ.get("BENCH_MAJ"):
+            ecarts = compare(mesure, reference)
+            if ecarts:
+                pytest.fail("Régression : " + " ; ".join(ecarts))
+        return mesure
+    return run
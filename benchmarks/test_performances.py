@@ -0,0 +1,108 @@
+"""
+Chemins critiques mesurés par la suite de benchmarks (voir conftest.py).
+Ignorés sans RUN_BENCHMARKS=1 ni base de benchmark joignable.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from maisondudroit.export import export_data
+from maisondudroit.graphiques import COUNT, load_chart_columns, load_chart_data
+from maisondudroit.import_excel import import_frame
+from maisondudroit.reporting import IncrementalReportingLoader, load_reporting_frame
+from maisondudroit.saisie_entretien import ENTRETIEN_COLUMNS, submit_entretien
+from maisondudroit.statistiques import load_summary
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SAISIES = 20
+EXCEL_MAX_TAILLE = 100_000      # au-delà, l'export xlsx dure plusieurs minutes
+
+
+def _max_num(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(max(num), 0) FROM entretien")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def _delete_after(num):
+    """Nettoyage : supprime les entretiens créés par la mesure (num > num)."""
+    def cleanup(conn):
+        cursor = conn.cursor()
+        try:
+            for table in ('demande', 'solution', 'entretien'):
+                cursor.execute(f"DELETE FROM {table} WHERE num > %s", (num,))
+            conn.commit()
+        finally:
+            cursor.close()
+    return cleanup
+
+
+def _sample_submission(conn):
+    """Un entretien généré et ses demandes / solutions, rejoués par la saisie."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT num, {', '.join(ENTRETIEN_COLUMNS)} FROM entretien ORDER BY num LIMIT 1")
+        num, *values = cursor.fetchone()
+        codes = {}
+        for table in ('demande', 'solution'):
+            cursor.execute(f"SELECT nature FROM {table} WHERE num = %s ORDER BY pos", (num,))
+            codes[table] = [row[0] for row in cursor.fetchall()]
+        conn.commit()
+    finally:
+        cursor.close()
+    return dict(zip(ENTRETIEN_COLUMNS, values)), codes['demande'], codes['solution']
+
+
+def test_saisie_formulaire(taille, bench, bench_conn):
+    data, demandes, solutions = _sample_submission(bench_conn)
+
+    def submit(conn):
+        for _ in range(SAISIES):
+            submit_entretien(data, demandes, solutions, conn=conn)
+
+    bench(submit, cleanup=_delete_after(_max_num(bench_conn)))
+
+
+def test_import_excel(taille, bench, bench_conn):
+    raw = pd.read_excel(os.path.join(ROOT, "Maison_droit_decembre.xlsx"))
+    depart = _max_num(bench_conn)
+    raw['NUM'] = pd.to_numeric(raw['NUM'], errors='coerce') + depart     # NUM libres
+
+    bench(lambda conn: import_frame(raw, conn=conn), cleanup=_delete_after(depart))
+
+
+def test_reporting_complet(taille, bench):
+    bench(load_reporting_frame)
+
+
+def test_reporting_incremental(taille, bench, bench_conn):
+    # Chargement déjà fait : seul le contrôle des nouveaux entretiens est mesuré
+    loader = IncrementalReportingLoader()
+    loader.refresh(bench_conn, meta_version=0, data_version=0)
+    bench(lambda conn: loader.refresh(conn, meta_version=0, data_version=1))
+
+
+def test_tableau_de_bord(taille, bench):
+    bench(load_summary)
+
+
+@pytest.mark.parametrize("chart_type", ["Barres", "Boîte à moustache"])
+def test_graphique(taille, bench, bench_conn, chart_type):
+    plan, numeric = load_chart_columns(bench_conn)
+    y = COUNT if chart_type == "Barres" else (numeric or [None])[0]
+    if y is None:
+        pytest.skip("Aucune colonne numérique pour la boîte à moustache")
+    bench(lambda conn: load_chart_data(conn, plan, "sexe", y, "age", chart_type))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "xlsx"])
+def test_export(taille, bench, tmp_path, fmt):
+    if fmt == "xlsx" and taille > EXCEL_MAX_TAILLE:
+        pytest.skip(f"Export xlsx mesuré jusqu'à {EXCEL_MAX_TAILLE} entretiens")
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+    bench(lambda conn: export_data(str(tmp_path / f"export.{fmt}"), fmt, conn=conn))
@@ -0,0 +1,258 @@
+import streamlit as st
+
+# =================================================================
+#  ÉLÉMENTS PARTAGÉS PAR LES PAGES STREAMLIT
+# =================================================================
+# poc_global.py (routeur st.navigation) n'exécute que la page choisie
+# (pages/*.py). Les fonctions en cache vivent ici, dans un module importé
+# une seule fois : leur nom qualifié est stable pour cache_metadonnees
+# (les pages, elles, s'exécutent sous le nom __main__) et une écriture de
+# CONFIGURATION invalide aussi les caches des autres pages.
+#
+# Le module ne charge ni pandas ni plotly : reporting, graphiques et
+# cache_figures sont importés dans les fonctions qui s'en servent, pour
+# que la page de saisie reste légère.
+import profilage
+from maisondudroit.cache_metadonnees import depends_on, entretien_stamp, invalidate, synchronize, version
+from maisondudroit.db import checkout, get_pool
+from maisondudroit.structure_questionnaire import load_natures, load_questionnaire_structure
+
+# --- CHARTE GRAPHIQUE & STYLE CSS ---
+COLOR_NAVY = "#122B48"  # Bleu foncé
+COLOR_GOLD = "#B09B5B"  # Doré
+COLOR_BG_SIDEBAR = "#F0F2F6" # Gris très clair
+COLOR_TEXT_GREY = "#666666"
+
+STYLE = f"""
+    <style>
+    /* Titres en Bleu Marine */
+    h1, h2, h3, h4 {{ color: {COLOR_NAVY} !important; }}
+
+    /* Navigation Sidebar (Radio buttons) */
+    .stRadio > label {{ font-weight: bold; color: {COLOR_NAVY}; }}
+
+    /* Boutons en style Doré */
+    div.stButton > button {{
+        background-color: {COLOR_NAVY};
+        color: white;
+        border-radius: 8px;
+        border: 2px solid {COLOR_GOLD};
+    }}
+    div.stButton > button:hover {{
+        background-color: {COLOR_GOLD};
+        color: white;
+        border-color: {COLOR_NAVY};
+    }}
+
+    /* Style de la sidebar */
+    [data-testid="stSidebar"] {{
+        background-color: {COLOR_BG_SIDEBAR};
+        border-right: 2px solid {COLOR_GOLD};
+    }}
+
+    /* --- NOUVEAU STYLE KPI (CARTES) --- */
+    .kpi-card {{
+        background-color: white;
+        border: 2px solid {COLOR_GOLD};
+        border-radius: 10px;
+        padding: 15px;
+        text-align: center;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+        margin-bottom: 10px;
+    }}
+    .kpi-title {{
+        color: {COLOR_TEXT_GREY};
+        font-size: 1.1rem;
+        font-weight: 600;
+        text-transform: uppercase;
+        margin-bottom: 5px;
+    }}
+    .kpi-value {{
+        color: {COLOR_NAVY};
+        font-size: 3.5rem; /* TRES GROS */
+        font-weight: 800;  /* TRES GRAS */
+        line-height: 1.1;
+        margin: 0;
+    }}
+    .kpi-sub {{
+        color: {COLOR_GOLD};
+        font-size: 0.9rem;
+        font-weight: bold;
+        margin-top: 5px;
+    }}
+    </style>
+    """
+
+
+# --- INITIALISATION DU POOL DE CONNEXIONS ---
+# Chaque session emprunte sa propre connexion (voir db.py) au lieu de
+# partager une connexion unique entre tous les utilisateurs.
+@st.cache_resource
+def init_pool():
+    try:
+        return get_pool()
+    except Exception as e:
+        st.error(f"❌ Impossible de se connecter à PostgreSQL : {e}")
+        st.stop()
+
+
+# =================================================================
+#  SAISIE
+# =================================================================
+
+@depends_on('rubrique', 'variable', 'modalite:ENTRETIEN', 'plage', 'valeurs_c')
+@profilage.cached("structure", st.cache_data)
+def get_questionnaire_structure():
+    # 2 requêtes ensemblistes au lieu d'une requête par variable
+    with checkout() as conn:
+        return load_questionnaire_structure(conn)
+
+@depends_on('modalite:DEMANDE', 'modalite:SOLUTION')
+@profilage.cached("modalités demande/solution", st.cache_data)
+def get_demande_solution_modalites():
+    with checkout() as conn:
+        return load_natures(conn)
+
+@st.cache_resource
+def get_snapshot():
+    # Copie analytique locale (Parquet + DuckDB), voir snapshot.py
+    from maisondudroit.snapshot import Snapshot
+    return Snapshot()
+
+def analytical_snapshot():
+    """Copie analytique si elle est utilisable, None sinon (lecture PostgreSQL)."""
+    snap = get_snapshot()
+    snap.refresh_async()
+    return snap if snap.available() else None
+
+@st.cache_resource
+def get_write_behind():
+    """
+    Journal de saisie différée (SAISIE_DIFFEREE=1, voir saisie_differee.py), None sinon.
+    Un journal et un thread de transmission par processus, partagés par les sessions.
+    """
+    from maisondudroit import saisie_differee
+    if not saisie_differee.ENABLED:
+        return None
+    snapshot = get_snapshot()
+    def after_flush(count):
+        # Saisies arrivées dans PostgreSQL : tableaux de bord et copie analytique à jour
+        invalidate('entretien')
+        snapshot.refresh_async(force=True)
+    journal = saisie_differee.WriteBehindJournal(on_flush=after_flush)
+    journal.start()
+    return journal
+
+
+# =================================================================
+#  TABLEAU DE BORD
+# =================================================================
+
+DATA_POLL_INTERVAL = 10     # secondes entre deux lectures de l'empreinte des entretiens
+
+@st.cache_data(ttl=DATA_POLL_INTERVAL, show_spinner=False)
+def _entretien_stamp():
+    with checkout() as conn:
+        return entretien_stamp(conn)
+
+def sync_entretien():
+    """
+    Entretiens écrits hors de ce processus (API, import, autre instance) : les
+    caches 'entretien' sont invalidés au plus DATA_POLL_INTERVAL secondes après.
+    """
+    try:
+        synchronize('entretien', _entretien_stamp())
+    except Exception:
+        pass    # base injoignable : les lectures suivantes afficheront l'erreur
+
+@st.cache_resource
+def get_reporting_loader():
+    from maisondudroit.reporting import IncrementalReportingLoader
+    return IncrementalReportingLoader()
+
+def get_data_for_reporting():
+    try:
+        # Seuls les entretiens postérieurs au dernier chargement sont lus
+        with checkout() as conn:
+            return get_reporting_loader().refresh(
+                conn,
+                meta_version=version('variable', 'modalite:ENTRETIEN'),
+                data_version=version('entretien'),
+            )
+    except Exception as e:
+        st.error(f"Erreur lors de la récupération des données : {e}")
+        import pandas as pd
+        return pd.DataFrame()
+
+def to_excel(df):
+    # Classeur écrit en flux (xlsxwriter constant_memory), voir export.py
+    from maisondudroit.export import dataframe_to_excel
+    return dataframe_to_excel(df, sheet_name='Export_Entretiens')
+
+@depends_on('variable', 'modalite:ENTRETIEN')
+@profilage.cached("colonnes graphique", st.cache_data)
+def get_chart_columns():
+    from maisondudroit.graphiques import load_chart_columns
+    with checkout() as conn:
+        return load_chart_columns(conn)
+
+def get_chart_data(x, y, color, chart_type, filters=None):
+    snap = analytical_snapshot()
+    return get_cached_chart_data(x, y, color, chart_type, snap.version if snap else None, filters)
+
+@depends_on('entretien', 'variable', 'modalite:ENTRETIEN')
+@profilage.cached("données graphique", st.cache_data)
+def get_cached_chart_data(x, y, color, chart_type, snapshot_version, filters=None):
+    # Résultat agrégé (taille du graphique), mis en cache par sélection, filtres et version de la copie
+    from maisondudroit.graphiques import load_chart_data, plan_chart
+    chart_plan, _ = get_chart_columns()
+    if snapshot_version is not None:
+        # Agrégat calculé par DuckDB sur la copie : aucune charge sur la base de saisie
+        snap = get_snapshot()
+        query, params = plan_chart(chart_plan, x, y, color, chart_type, filters=filters)
+        try:
+            return snap.query(query, params)
+        except Exception as e:
+            # Copie illisible (fichiers supprimés par un autre processus...) : lecture PostgreSQL
+            snap.last_error = e
+    with checkout() as conn:
+        return load_chart_data(conn, chart_plan, x, y, color, chart_type, filters=filters)
+
+@depends_on('variable', 'modalite:ENTRETIEN')
+@profilage.cached("modalités filtres", st.cache_data)
+def get_filter_modalites():
+    from maisondudroit.filtres import load_filter_modalites
+    with checkout() as conn:
+        return load_filter_modalites(conn)
+
+@st.cache_resource
+def get_figure_cache():
+    # Figures sérialisées partagées entre sessions (LRU borné, voir cache_figures.py)
+    from maisondudroit.cache_figures import FigureCache
+    return FigureCache()
+
+def show_figure(name, key, build):
+    """Figure relue dans le cache (construite sinon) puis affichée ; chaque étape est profilée."""
+    profiler = profilage.current()
+    built = []
+    def build_once():
+        built.append(True)
+        return build()
+    with profiler.section(f"figure {name}"):
+        fig = get_figure_cache().get_or_build(key, build_once)
+    profiler.cache(f"figure {name}", hit=not built)
+    with profiler.section(f"rendu {name}"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def chart_version(snapshot=None):
+    """Version des données d'un graphique : invalidations locales + copie analytique."""
+    return (version('entretien', 'variable', 'modalite:ENTRETIEN'), snapshot.version if snapshot else None)
+
+@depends_on('entretien', 'variable', 'modalite:ENTRETIEN')
+@profilage.cached("résumé", st.cache_data)
+def get_dashboard_summary(filters=None):
+    # Compteurs tenus à jour par trigger (voir statistiques.py) ; agrégat filtré sinon.
+    # Une erreur (migration 0001 absente...) remonte à la page : elle n'est pas mise en cache.
+    from maisondudroit.statistiques import load_summary
+    with checkout() as conn:
+        return load_summary(conn, filters=filters)
@@ -0,0 +1,28 @@
+"""
+Bibliothèque de la Maison du Droit : accès aux données, décodage,
+saisie, configuration, reporting et exports, sans Streamlit.
+
+L'import du paquet ne charge rien : chaque module est importé à son
+premier usage (maisondudroit.reporting, from maisondudroit import export...),
+aucune connexion n'est ouverte avant le premier checkout() et pandas /
+plotly ne sont chargés que par les fonctions qui en ont besoin. Les pages
+Streamlit (poc_*.py) ne sont que des interfaces sur ces modules.
+
+Temps d'import : python benchmarks/bench_import.py
+"""
+import importlib
+
+MODULES = (
+    'api', 'cache_figures', 'cache_metadonnees', 'configuration', 'db', 'decodage', 'export',
+    'filtres', 'generateur', 'graphiques', 'import_excel', 'migration', 'reporting',
+    'saisie_differee', 'saisie_entretien', 'snapshot', 'statistiques', 'structure_questionnaire', 'traces_sql',
+)
+
+__all__ = list(MODULES)
+
+
+def __getattr__(name):
+    # Import paresseux des sous-modules (PEP 562)
+    if name in MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
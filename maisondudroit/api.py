@@ -0,0 +1,275 @@
+"""
+Service HTTP (ASGI) de saisie et de consultation, pour les bornes
+partenaires et les outils de saisie par lots.
+
+    POST /entretiens       entretien + demandes + solutions, une transaction
+    GET  /questionnaire    rubriques, variables, modalités et natures proposées
+    GET  /statistiques     effectifs agrégés (stat_entretien), filtres de VISUALISATION
+    GET  /sante            disponibilité de la base
+
+Mêmes contrôles (validate_submission, validate_values) et même instruction
+SQL (build_submission_sql) que le formulaire Streamlit, exécutés par
+asyncpg sur un pool asynchrone : un processus sert de nombreuses requêtes
+simultanées sans ré-exécuter de script ni bloquer un thread par requête.
+Dépendances optionnelles : starlette, asyncpg, uvicorn.
+Les entretiens reçus ici apparaissent dans VISUALISATION au plus
+DATA_POLL_INTERVAL secondes après (interface.sync_entretien compare
+l'empreinte de la table entretien lue dans la base).
+
+Corps de POST /entretiens :
+    {"entretien": {"sexe": "1", "age": "3", "commune": "Vannes", ...},
+     "demandes": ["1a", "2a"], "solutions": ["1"], "date_ent": "2024-05-02"}
+
+Usage :
+    python -m maisondudroit.api [--hote 127.0.0.1] [--port 8000] [--workers 1]
+    uvicorn maisondudroit.api:app --port 8000
+Charge : python benchmarks/bench_api.py
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import date
+from decimal import Decimal
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from .db import POOL_MIN, connection_params
+from .filtres import CHILD_TABLES, FILTER_COLUMNS, active_filters
+from .saisie_entretien import build_submission_sql, validate_submission, validate_values
+from .statistiques import PERIODES, summary_query
+from .structure_questionnaire import SQL_NATURES, SQL_OPTIONS, SQL_VARIABLES, assemble_structure
+
+try:
+    import asyncpg
+except ImportError:     # vérifié au démarrage du service (lifespan)
+    asyncpg = None
+
+API_POOL_MAX = int(os.environ.get("API_POOL_MAX", 20))
+# Structure et natures relues au plus toutes les CACHE_TTL secondes (la
+# configuration est modifiée depuis un autre processus, sans invalidation)
+CACHE_TTL = float(os.environ.get("API_CACHE_TTL", 30))
+
+_cache = {}     # clé -> (expiration, valeur)
+_parameter_types = {}   # texte de la requête -> types de ses paramètres
+
+
+# =================================================================
+#  ADAPTATION DES REQUÊTES PSYCOPG2 À ASYNCPG
+# =================================================================
+
+def to_asyncpg(query):
+    """Paramètres %s (psycopg2) numérotés $1, $2... (asyncpg) ; %% redevient %."""
+    counter = iter(range(1, query.count("%s") + 1))
+    return re.sub(r"%%|%s", lambda m: "%" if m.group() == "%%" else f"${next(counter)}", query)
+
+
+_INTEGERS = {'int2', 'int4', 'int8'}
+_FLOATS = {'float4', 'float8'}
+_TEXTS = {'text', 'varchar', 'bpchar', 'name'}
+
+
+def coerce_params(params, types):
+    """
+    Valeurs JSON converties vers le type de chaque paramètre (asyncpg
+    n'accepte pas "3" pour un smallint). Lève ValueError si impossible.
+    """
+    values = []
+    for value, pg_type in zip(params, types):
+        name = pg_type.name
+        if value is None or (value == "" and name not in _TEXTS):
+            value = None
+        elif name in _INTEGERS:
+            value = int(value)
+        elif name in _FLOATS:
+            value = float(value)
+        elif name == 'numeric':
+            value = Decimal(str(value))
+        elif name in _TEXTS:
+            value = str(value)
+        elif name == 'date' and isinstance(value, str):
+            value = date.fromisoformat(value)
+        values.append(value)
+    return values
+
+
+async def _fetch(conn, query, params=()):
+    return await conn.fetch(to_asyncpg(query), *params)
+
+
+# =================================================================
+#  LECTURES ET ÉCRITURE
+# =================================================================
+
+async def _cached(key, load):
+    now = time.monotonic()
+    entry = _cache.get(key)
+    if entry is None or entry[0] < now:
+        entry = _cache[key] = (now + CACHE_TTL, await load())
+    return entry[1]
+
+
+async def load_questionnaire(pool, tab='ENTRETIEN'):
+    """(structure, natures de demande, natures de solution) comme dans le formulaire."""
+    async def load():
+        async with pool.acquire() as conn:
+            variables = await _fetch(conn, SQL_VARIABLES, (tab,))
+            options = await _fetch(conn, SQL_OPTIONS, (tab, tab, tab))
+            natures = [{row['lib_m']: row['code'] for row in await _fetch(conn, SQL_NATURES, (nature,))}
+                       for nature in ('DEMANDE', 'SOLUTION')]
+        return (assemble_structure(variables, options), *natures)
+    return await _cached(('questionnaire', tab), load)
+
+
+async def submit(pool, data, demandes, solutions, date_ent=None):
+    """Enregistre l'entretien (instruction unique de saisie_entretien) ; retourne (num, timings)."""
+    timings = {}
+    start = time.perf_counter()
+    query, params = build_submission_sql(data, demandes, solutions, date_ent)
+    query = to_asyncpg(query)
+    timings['preparation'] = (time.perf_counter() - start) * 1000
+
+    async with pool.acquire() as conn:
+        step = time.perf_counter()
+        types = _parameter_types.get(query)
+        if types is None:
+            # Une description par forme (nombre de demandes / solutions) et par processus
+            types = _parameter_types[query] = (await conn.prepare(query)).get_parameters()
+        # Instruction unique, donc atomique sans BEGIN / COMMIT explicites ; fetchval
+        # passe par le cache d'instructions préparées d'asyncpg (une par connexion)
+        num = await conn.fetchval(query, *coerce_params(params, types))
+        timings['execution'] = (time.perf_counter() - step) * 1000
+    timings['total'] = (time.perf_counter() - start) * 1000
+    return num, timings
+
+
+def parse_submission(payload, structure, demande_opt, sol_opt):
+    """(data, demandes, solutions, date_ent, erreurs) d'un corps de POST /entretiens."""
+    if not isinstance(payload, dict):
+        return None, [], [], None, ["Objet JSON attendu."]
+    data = payload.get('entretien') or {}
+    demandes = payload.get('demandes') or []
+    solutions = payload.get('solutions') or []
+    if not isinstance(data, dict) or not isinstance(demandes, list) or not isinstance(solutions, list):
+        return None, [], [], None, ["'entretien' doit être un objet, 'demandes' et 'solutions' des listes."]
+    errors = validate_submission(data, demandes, solutions)
+    errors += validate_values(data, structure, demande_opt, sol_opt, demandes, solutions)
+    date_ent = payload.get('date_ent')
+    if date_ent is not None:
+        try:
+            date_ent = date.fromisoformat(date_ent)
+        except (TypeError, ValueError):
+            errors.append(f"date_ent : date AAAA-MM-JJ attendue ({date_ent})")
+    return data, demandes, solutions, date_ent, errors
+
+
+def parse_filters(query_params):
+    """Filtres de VISUALISATION lus dans l'URL (?communes=Vannes&communes=Muzillac&sexe=1...)."""
+    filters = {}
+    for key in ('date_min', 'date_max'):
+        if query_params.get(key):
+            filters[key] = date.fromisoformat(query_params[key])
+    for key in ('communes', *CHILD_TABLES, *FILTER_COLUMNS):
+        filters[key] = query_params.getlist(key)
+    return active_filters(filters)
+
+
+# =================================================================
+#  ROUTES
+# =================================================================
+
+def _error(status, errors):
+    return JSONResponse({'erreurs': errors}, status_code=status)
+
+
+# Erreurs de données refusées en 422 (valeur non convertible, contrainte violée)
+INVALID_DATA = (ValueError, TypeError) + (
+    (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError) if asyncpg else ())
+
+
+async def post_entretien(request):
+    try:
+        payload = await request.json()
+    except ValueError:
+        return _error(400, ["Corps JSON invalide."])
+    structure, demande_opt, sol_opt = await load_questionnaire(request.app.state.pool)
+    data, demandes, solutions, date_ent, errors = parse_submission(payload, structure, demande_opt, sol_opt)
+    if errors:
+        return _error(422, errors)
+    try:
+        num, timings = await submit(request.app.state.pool, data, demandes, solutions, date_ent)
+    except INVALID_DATA as e:
+        return _error(422, [str(e)])
+    return JSONResponse({'num': num, 'timings': {k: round(v, 2) for k, v in timings.items()}}, status_code=201)
+
+
+async def get_questionnaire(request):
+    structure, demande_opt, sol_opt = await load_questionnaire(request.app.state.pool)
+    return JSONResponse({'rubriques': structure, 'demandes': demande_opt, 'solutions': sol_opt})
+
+
+async def get_statistiques(request):
+    params = request.query_params
+    try:
+        periode = params.get('periode', 'tout')
+        debut = date.fromisoformat(params['debut']) if params.get('debut') else None
+        fin = date.fromisoformat(params['fin']) if params.get('fin') else None
+        filters = parse_filters(params)
+        query, values = summary_query(periode, debut, fin, filters=filters)
+    except ValueError as e:
+        return _error(422, [f"{e} (périodes : {', '.join(PERIODES)})"])
+    async with request.app.state.pool.acquire() as conn:
+        rows = await _fetch(conn, query, values)
+    effectifs = [{'debut': row['debut'].isoformat() if isinstance(row['debut'], date) else str(row['debut']),
+                  'dimension': row['dimension'], 'label': row['label'], 'nb': row['nb']} for row in rows]
+    total = sum(row['nb'] for row in effectifs if row['dimension'] == '*')
+    return JSONResponse({'periode': periode, 'filtres': {k: str(v) if isinstance(v, date) else v
+                                                         for k, v in filters.items()},
+                         'total': total, 'effectifs': effectifs})
+
+
+async def get_sante(request):
+    pool = request.app.state.pool
+    async with pool.acquire() as conn:
+        await conn.fetchval("SELECT 1")
+    return JSONResponse({'base': 'ok', 'connexions': pool.get_size(), 'libres': pool.get_idle_size()})
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if asyncpg is None:
+        raise ImportError("asyncpg est requis pour l'API (pip install asyncpg)")
+    app.state.pool = await asyncpg.create_pool(min_size=POOL_MIN, max_size=API_POOL_MAX, **connection_params())
+    try:
+        yield
+    finally:
+        await app.state.pool.close()
+
+
+app = Starlette(routes=[
+    Route("/entretiens", post_entretien, methods=["POST"]),
+    Route("/questionnaire", get_questionnaire),
+    Route("/statistiques", get_statistiques),
+    Route("/sante", get_sante),
+], lifespan=lifespan)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="processus uvicorn (un pool chacun)")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run("maisondudroit.api:app", host=args.hote, port=args.port, workers=args.workers,
+                access_log=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+# =================================================================
+#  CACHE DES FIGURES PLOTLY (LRU BORNÉ EN TAILLE)
+# =================================================================
+# Une figure n'est reconstruite (px.*, update_layout, update_traces) que si
+# la version des données ou les paramètres du graphique ont changé. Le cache
+# garde le JSON sérialisé de chaque figure ; les plus anciennes sont évincées
+# au-delà de MAX_BYTES.
+
+MAX_BYTES = 32 * 2**20
+
+
+def figure_key(version, chart_type, x=None, y=None, color=None, filters=None):
+    """Clé de cache : (version des données, type, X, Y, couleur, filtres triés)."""
+    filters = tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in (filters or {}).items()))
+    return (version, chart_type, x, y, color, filters)
+
+
+class FigureCache:
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()     # clé -> JSON de la figure
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Figure en cache (reconstruite depuis son JSON) ou None."""
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        import plotly.io as pio     # import différé : plotly n'est chargé qu'au premier graphique
+        return pio.from_json(spec, skip_invalid=True)
+
+    def put(self, key, fig):
+        import plotly.io as pio
+        spec = pio.to_json(fig, validate=False)
+        if len(spec) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = spec
+            self.size += len(spec)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def get_or_build(self, key, build):
+        """Figure pour key ; build() n'est appelé qu'en l'absence d'entrée."""
+        fig = self.get(key)
+        if fig is None:
+            fig = build()
+            self.put(key, fig)
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
@@ -0,0 +1,112 @@
+import threading
+
+# =================================================================
+#  CACHE DES MÉTADONNÉES VERSIONNÉ PAR TABLE
+# =================================================================
+# Chaque fonction mise en cache (st.cache_data) déclare les tables dont
+# elle dépend. Une écriture n'invalide alors que ces fonctions-là, au
+# lieu du st.cache_data.clear() global qui vidait aussi le reporting.
+#
+# Une clé est un nom de table, éventuellement restreint à un onglet du
+# questionnaire : 'modalite:DEMANDE' ne concerne que les modalités de
+# DEMANDE, 'modalite' concerne toutes les modalités.
+#
+# Les écritures faites hors du processus (API HTTP, imports, autre
+# instance) ne passent pas par invalidate() : synchronize() compare une
+# empreinte lue dans la base (ENTRETIEN_STAMP) à la précédente et
+# invalide la clé si elle a changé.
+
+TABLES = ('rubrique', 'variable', 'modalite', 'plage', 'valeurs_c', 'entretien')
+
+_lock = threading.Lock()
+_versions = {}      # clé -> compteur d'écritures
+_dependants = {}    # nom qualifié -> (fonction en cache, clés)
+_stamps = {}        # clé -> dernière empreinte lue dans la base
+
+# Compteurs d'activité d'entretien, demande et solution (insertions, mises
+# à jour, suppressions, tous processus confondus) et plus grand num : lecture
+# instantanée, sans parcours des tables. Les compteurs sont publiés à la fin
+# de chaque transaction (au plus une seconde après depuis PostgreSQL 15) ;
+# max(num), lu par la clé primaire, voit aussitôt un nouvel entretien.
+ENTRETIEN_STAMP = """
+    SELECT sum(n_tup_ins)::bigint, sum(n_tup_upd)::bigint, sum(n_tup_del)::bigint,
+           (SELECT max(num) FROM entretien)
+    FROM pg_stat_all_tables
+    WHERE relid IN ('entretien'::regclass, 'demande'::regclass, 'solution'::regclass)
+"""
+
+
+def _split(key):
+    table, _, tab = key.partition(':')
+    if table not in TABLES:
+        raise ValueError(f"Table inconnue pour le cache : {table}")
+    return table, tab
+
+
+def _matches(dependency, changed):
+    dep_table, dep_tab = _split(dependency)
+    chg_table, chg_tab = _split(changed)
+    # Une clé sans onglet couvre tous les onglets de la table
+    return dep_table == chg_table and (not dep_tab or not chg_tab or dep_tab == chg_tab)
+
+
+def depends_on(*keys):
+    """Décorateur : enregistre une fonction st.cache_data et ses tables."""
+    for key in keys:
+        _split(key)
+
+    def decorator(cached_fn):
+        name = f"{cached_fn.__module__}.{cached_fn.__qualname__}"
+        with _lock:
+            # Streamlit ré-exécute le script : on remplace l'entrée existante
+            _dependants[name] = (cached_fn, keys)
+        return cached_fn
+    return decorator
+
+
+def version(*keys):
+    """Version courante d'un ensemble de clés (change à chaque invalidation)."""
+    with _lock:
+        total = []
+        for key in keys:
+            table, tab = _split(key)
+            if tab:
+                total.append(_versions.get(table, 0) + _versions.get(key, 0))
+            else:
+                total.append(sum(v for k, v in _versions.items() if _split(k)[0] == table))
+        return tuple(total)
+
+
+def invalidate(*keys):
+    """Incrémente la version des clés et vide uniquement les caches concernés."""
+    with _lock:
+        for key in keys:
+            _split(key)
+            _versions[key] = _versions.get(key, 0) + 1
+        to_clear = [
+            fn for fn, deps in _dependants.values()
+            if any(_matches(dep, key) for dep in deps for key in keys)
+        ]
+    for fn in to_clear:
+        fn.clear()
+    return len(to_clear)
+
+
+def entretien_stamp(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(ENTRETIEN_STAMP)
+        return tuple(cursor.fetchone())
+    finally:
+        cursor.close()
+
+
+def synchronize(key, stamp):
+    """Invalide la clé si l'empreinte de la base a changé depuis la lecture précédente."""
+    with _lock:
+        previous = _stamps.get(key)
+        _stamps[key] = stamp
+    if previous is not None and previous != stamp:
+        invalidate(key)
+        return True
+    return False
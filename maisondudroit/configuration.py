@@ -0,0 +1,157 @@
+from psycopg2.extras import RealDictCursor
+
+from .cache_metadonnees import invalidate
+from .db import checkout
+
+# =================================================================
+#  STRUCTURE DU QUESTIONNAIRE : RUBRIQUES, VARIABLES, MODALITÉS
+# =================================================================
+# Lectures et écritures de la page CONFIGURATION. Chaque écriture valide
+# sa transaction puis n'invalide que les caches des tables modifiées
+# (cache_metadonnees.py) ; en cas d'erreur, rollback et l'exception
+# remonte à l'appelant (qui l'affiche).
+
+
+def load_rubriques(conn=None):
+    """[(pos, lib), ...] dans l'ordre des rubriques."""
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT pos, lib FROM rubrique ORDER BY pos")
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def load_modalite_labels(tab, pos, conn=None):
+    """Libellés des modalités d'une variable, dans l'ordre de saisie."""
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT lib_m FROM modalite WHERE tab=%s AND pos=%s ORDER BY pos_m", (tab, pos))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+
+def load_rubrique_variables(rubrique, conn=None):
+    """Questions d'une rubrique : [{'pos', 'lib', 'type_v', 'commentaire'}, ...]."""
+    with checkout(conn) as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cursor.execute("SELECT pos, lib, type_v, commentaire FROM variable "
+                           "WHERE rubrique=%s AND tab='ENTRETIEN' ORDER BY pos", (rubrique,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+def next_variable_pos(conn=None):
+    """Position d'une nouvelle variable (max global + 1 pour éviter les collisions)."""
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT MAX(pos) FROM variable")
+            return (cursor.fetchone()[0] or 10) + 1
+        finally:
+            cursor.close()
+
+
+def save_configuration(context, is_new_var, var_pos, var_lib, var_type, rub_id, comment, modalites, conn=None):
+    """
+    Fonction universelle pour sauvegarder :
+    - context : 'ENTRETIEN', 'DEMANDE' ou 'SOLUTION'
+    - var_pos : Position de la variable (ID unique pour les modalités)
+    """
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            # 1. GESTION TABLE VARIABLE (Uniquement pour ENTRETIEN)
+            # Pour DEMANDE et SOLUTION, la variable est "virtuelle", on ne touche qu'aux modalités
+            if context == 'ENTRETIEN':
+                if not is_new_var:
+                    cursor.execute("""
+                        UPDATE variable
+                        SET lib=%s, type_v=%s, rubrique=%s, commentaire=%s
+                        WHERE pos=%s AND tab='ENTRETIEN'
+                    """, (var_lib, var_type, rub_id, comment, var_pos))
+                else:
+                    cursor.execute("""
+                        INSERT INTO variable (tab, pos, lib, type_v, rubrique, commentaire)
+                        VALUES ('ENTRETIEN', %s, %s, %s, %s, %s)
+                    """, (var_pos, var_lib, var_type, rub_id, comment))
+
+            # 2. GESTION DES MODALITÉS (Pour TOUS les contextes)
+            if var_type == 'MOD':
+                # Suppression anciennes modalités pour ce contexte spécifique
+                cursor.execute("DELETE FROM modalite WHERE tab=%s AND pos=%s", (context, var_pos))
+
+                # Insertion des nouvelles
+                if modalites:
+                    values = []
+                    for idx, txt in enumerate(modalites):
+                        code = txt[:15].upper().replace(" ", "_") # Code auto
+                        values.append((context, var_pos, idx+1, txt, code))
+
+                    cursor.executemany("""
+                        INSERT INTO modalite (tab, pos, pos_m, lib_m, code)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, values)
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    # On n'invalide que les caches qui dépendent de ce contexte
+    changed = ['variable'] if context == 'ENTRETIEN' else []
+    if var_type == 'MOD':
+        changed.append(f"modalite:{context}")
+    if changed:
+        invalidate(*changed)
+    return True
+
+
+def upsert_rubrique(old_pos, new_pos, lib, conn=None):
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            # On vérifie si la rubrique existe déjà à cette position (old_pos)
+            cursor.execute("SELECT 1 FROM rubrique WHERE pos = %s", (old_pos,))
+            exists = cursor.fetchone()
+
+            if exists:
+                # Si elle existe, c'est une MISE À JOUR (UPDATE)
+                cursor.execute("UPDATE rubrique SET pos = %s, lib = %s WHERE pos = %s", (new_pos, lib, old_pos))
+            else:
+                # Sinon, c'est une CRÉATION (INSERT)
+                cursor.execute("INSERT INTO rubrique (pos, lib) VALUES (%s, %s)", (new_pos, lib))
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    invalidate('rubrique') # Seuls les caches dépendant des rubriques sont vidés
+    return True
+
+
+def add_variable_sql(libelle, type_v, rubrique_id, position, commentaire, conn=None):
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            # On fixe 'ENTRETIEN' comme table cible pour ce POC
+            cursor.execute("""
+                INSERT INTO variable (tab, pos, lib, type_v, rubrique, commentaire)
+                VALUES ('ENTRETIEN', %s, %s, %s, %s, %s)
+            """, (position, libelle, type_v, rubrique_id, commentaire))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    invalidate('variable')
+    return True
@@ -0,0 +1,278 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+from .traces_sql import TRACE_ENABLED, TracingConnection
+
+# =================================================================
+#  ACCÈS BASE : POOL DE CONNEXIONS PARTAGÉ
+# =================================================================
+# Remplace la connexion unique (st.cache_resource) partagée entre toutes
+# les sessions Streamlit : chaque requête emprunte sa propre connexion,
+# la rend au pool ensuite, et un rollback ne touche plus que sa session.
+
+# --- PARAMÈTRES DE CONNEXION (surchargeables par variables d'environnement) ---
+PG_HOST = os.environ.get("PG_HOST", "localhost")
+PG_PORT = int(os.environ.get("PG_PORT", 5437))
+PG_DB = os.environ.get("PG_DB", "db_maisondudroit")
+PG_USER = os.environ.get("PG_USER", "pgis")
+PG_PASSWORD = os.environ.get("PG_PASSWORD", "pgis")
+
+POOL_MIN = int(os.environ.get("PG_POOL_MIN", 1))
+POOL_MAX = int(os.environ.get("PG_POOL_MAX", 10))
+CHECKOUT_TIMEOUT = 30       # secondes d'attente max d'une connexion libre
+HEALTH_CHECK_AFTER = 30     # secondes d'inactivité avant un "SELECT 1"
+
+
+def connection_params(database=None):
+    return {
+        'host': PG_HOST, 'port': PG_PORT, 'database': database or PG_DB,
+        'user': PG_USER, 'password': PG_PASSWORD,
+    }
+
+
+class ConnectionPool:
+    """
+    Pool borné (min/max) avec attente d'une connexion libre, contrôle de
+    santé à l'emprunt et remplacement des connexions cassées.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=CHECKOUT_TIMEOUT, **params):
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **params)
+        # ThreadedConnectionPool lève PoolError quand il est plein : on attend plutôt
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+        self.timeout = timeout
+
+    def getconn(self):
+        deadline = time.monotonic() + self.timeout
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolError(f"Aucune connexion libre après {self.timeout}s")
+        try:
+            conn = self._pool.getconn()
+            # Après un redémarrage du serveur toutes les connexions inactives sont
+            # mortes : on les jette une à une jusqu'à en obtenir une valide
+            # (connexion inactive saine ou connexion neuve)
+            while not self._is_healthy(conn):
+                self._discard(conn)
+                if time.monotonic() > deadline:
+                    raise PoolError(f"Aucune connexion valide après {self.timeout}s")
+                conn = self._pool.getconn()
+            conn.autocommit = False
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, close=False):
+        try:
+            if conn.closed:
+                close = True
+            elif not close and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                # Une transaction oubliée ne doit pas fuiter vers la session suivante
+                conn.rollback()
+        except psycopg2.Error:
+            close = True
+        try:
+            if close:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        last = self._last_used.get(id(conn))
+        if last is not None and time.monotonic() - last < HEALTH_CHECK_AFTER:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def closeall(self):
+        self._pool.closeall()
+        self._last_used.clear()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(database=None):
+    """Pool du processus pour une base donnée (créé au premier appel)."""
+    params = connection_params(database)
+    with _pools_lock:
+        pool = _pools.get(params['database'])
+        if pool is None:
+            if TRACE_ENABLED:
+                # Requêtes chronométrées, requêtes lentes journalisées (traces_sql.py)
+                params['connection_factory'] = TracingConnection
+            pool = ConnectionPool(POOL_MIN, POOL_MAX, **params)
+            _pools[params['database']] = pool
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+@contextmanager
+def checkout(conn=None, database=None):
+    """
+    Emprunte une connexion au pool et la rend en sortie de bloc.
+    Si `conn` est fourni (tests, transaction englobante), il est utilisé
+    tel quel et reste sous la responsabilité de l'appelant.
+    """
+    if conn is not None:
+        yield conn
+        return
+
+    pool = get_pool(database)
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        # Connexion perdue : elle sera remplacée au prochain emprunt
+        broken = True
+        raise
+    except Exception:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+# =================================================================
+#  LECTURE EN FLUX (CURSEURS SERVEUR)
+# =================================================================
+# fetchall() sur un RealDictCursor crée un dict Python par ligne, que pandas
+# recopie ensuite : pic mémoire de 3 à 5 fois le DataFrame final. Ici les
+# lignes arrivent par lots de ITERSIZE via un curseur nommé (côté serveur)
+# et chaque lot est converti aussitôt en colonnes (Arrow si disponible).
+
+ITERSIZE = int(os.environ.get("PG_ITERSIZE", 10_000))
+
+
+def _open_stream(conn, query, params, itersize):
+    """(description du curseur, générateur de lots) sur un curseur nommé."""
+    cursor = conn.cursor(name=f"flux_{uuid.uuid4().hex}")
+    cursor.itersize = itersize
+    try:
+        cursor.execute(query, params)
+        # La description d'un curseur nommé n'existe qu'après le premier FETCH
+        first = cursor.fetchmany(itersize)
+        description = cursor.description
+    except Exception:
+        cursor.close()
+        raise
+
+    def chunks():
+        try:
+            rows = first
+            while rows:
+                yield rows
+                rows = cursor.fetchmany(itersize)
+        finally:
+            cursor.close()
+
+    return description, chunks()
+
+
+def stream(conn, query, params=None, itersize=ITERSIZE):
+    """
+    Exécute la requête sur un curseur serveur et retourne (colonnes, lots),
+    lots étant un générateur de listes de tuples (au plus itersize lignes).
+    Le générateur doit être consommé dans la transaction courante.
+    """
+    description, chunks = _open_stream(conn, query, params, itersize)
+    return [d[0] for d in description], chunks
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def arrow_schema(description):
+    """Schéma Arrow déduit des types PostgreSQL (OID) ; type inféré si inconnu."""
+    pa = _pyarrow()
+    types = {
+        16: pa.bool_(), 20: pa.int64(), 21: pa.int16(), 23: pa.int32(),
+        700: pa.float32(), 701: pa.float64(),
+        25: pa.string(), 1042: pa.string(), 1043: pa.string(),
+        1082: pa.date32(), 1114: pa.timestamp('us'),
+    }
+    return [(d[0], types.get(d[1]) if len(d) > 1 else None) for d in description]
+
+
+def stream_batches(conn, query, params=None, itersize=ITERSIZE):
+    """
+    Même lecture que stream(), lots convertis en pyarrow.RecordBatch (colonnes).
+    Les types viennent de la description du curseur : tous les lots ont le même schéma.
+    """
+    pa = _pyarrow()
+    if pa is None:
+        raise ImportError("pyarrow est requis pour stream_batches (pip install pyarrow)")
+    description, chunks = _open_stream(conn, query, params, itersize)
+    schema = arrow_schema(description)
+    for rows in chunks:
+        yield _to_batch(pa, rows, schema)
+
+
+def _to_batch(pa, rows, schema):
+    arrays = [pa.array(values, type=type_) for values, (_, type_) in zip(zip(*rows), schema)]
+    return pa.RecordBatch.from_arrays(arrays, names=[name for name, _ in schema])
+
+
+def read_frame(conn, query, params=None, itersize=ITERSIZE):
+    """
+    DataFrame lu en flux : un lot de tuples à la fois, converti en colonnes.
+    Entiers nullables (Int64) plutôt que float, dates en datetime64.
+    Sans pyarrow, les lots sont convertis par pandas et concaténés.
+    """
+    import pandas as pd
+
+    pa = _pyarrow()
+    if pa is None:
+        columns, chunks = stream(conn, query, params, itersize)
+        frames = [pd.DataFrame.from_records(rows, columns=columns) for rows in chunks]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+    description, chunks = _open_stream(conn, query, params, itersize)
+    schema = arrow_schema(description)
+    tables = [pa.Table.from_batches([_to_batch(pa, rows, schema)]) for rows in chunks]
+    if not tables:
+        return pd.DataFrame(columns=[name for name, _ in schema])
+    # Type inféré (OID inconnu) : un lot entièrement NULL est promu au type des autres lots
+    table = pa.concat_tables(tables, promote_options="default")
+    del tables
+    nullable_ints = {pa.int8(): pd.Int8Dtype(), pa.int16(): pd.Int16Dtype(),
+                     pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype()}
+    return table.to_pandas(types_mapper=nullable_ints.get, date_as_object=False, self_destruct=True)
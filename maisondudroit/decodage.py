@@ -0,0 +1,74 @@
+# =================================================================
+#  DONNÉES DE REPORTING DÉCODÉES CÔTÉ SERVEUR
+# =================================================================
+# Le décodage code -> libellé se fait dans PostgreSQL (LEFT JOIN sur
+# modalite, dont la clé (tab, pos, code) garantit une ligne au plus) au
+# lieu de .astype(str).map(...).fillna(...) colonne par colonne en pandas.
+# Ce module ne construit que le SQL (sans pandas) : reporting.py en tire
+# des DataFrames, export.py, graphiques.py et filtres.py des requêtes.
+
+# Colonnes d'entretien, variable associée (via son libellé) et présence de modalités
+SQL_PLAN = """
+    SELECT c.column_name, v.pos,
+           EXISTS (SELECT 1 FROM modalite m WHERE m.tab = %s AND m.pos = v.pos) AS decode
+    FROM information_schema.columns c
+    LEFT JOIN LATERAL (
+        SELECT pos FROM variable
+        WHERE tab = %s AND lower(lib) = c.column_name
+        ORDER BY pos DESC LIMIT 1
+    ) v ON TRUE
+    WHERE c.table_name = 'entretien' AND c.table_schema = current_schema()
+    ORDER BY c.ordinal_position
+"""
+
+SQL_CATEGORIES = "SELECT pos, lib_m FROM modalite WHERE tab = %s ORDER BY pos, pos_m"
+
+
+def _ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def build_reporting_query(plan, tab='ENTRETIEN', after_num=None, with_order=False, filters=()):
+    """
+    Construit le SELECT décodé à partir du plan [(colonne, pos, decode), ...].
+    Les colonnes sans modalités sont renvoyées telles quelles.
+    after_num : ne lit que les entretiens de numéro supérieur (chargement incrémental).
+    with_order : ajoute "<colonne>__ordre" (pos_m) pour chaque colonne décodée.
+    filters : [(condition sur les colonnes brutes "e.", paramètres), ...] combinées par AND.
+    """
+    selects, joins, params = [], [], []
+    for i, (col, pos, decode) in enumerate(plan):
+        c = _ident(col)
+        if decode:
+            alias = f"m{i}"
+            selects.append(f"COALESCE({alias}.lib_m, e.{c}::text) AS {c}")
+            if with_order:
+                selects.append(f"{alias}.pos_m AS {_ident(col + '__ordre')}")
+            joins.append(f"LEFT JOIN modalite {alias} ON {alias}.tab = %s AND {alias}.pos = %s AND {alias}.code = e.{c}::text")
+            params += [tab, pos]
+        else:
+            selects.append(f"e.{c}")
+    query = "SELECT " + ",\n       ".join(selects) + "\nFROM entretien e\n" + "\n".join(joins)
+    conditions = []
+    for cond, values in filters:
+        conditions.append(f"({cond})")
+        params += list(values)
+    if after_num is not None:
+        conditions.append("e.num > %s")
+        params.append(int(after_num))
+    if conditions:
+        query += "\nWHERE " + " AND ".join(conditions)
+    if after_num is not None:
+        query += " ORDER BY e.num"
+    return query, params
+
+
+def load_decoding_metadata(cursor, tab='ENTRETIEN'):
+    """Retourne (plan, catégories ordonnées par position de variable)."""
+    cursor.execute(SQL_PLAN, (tab, tab))
+    plan = cursor.fetchall()
+    cursor.execute(SQL_CATEGORIES, (tab,))
+    categories = {}
+    for pos, lib in cursor.fetchall():
+        categories.setdefault(pos, []).append(lib)
+    return plan, categories
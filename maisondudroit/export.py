@@ -0,0 +1,303 @@
+"""
+Exports des entretiens : Excel, Parquet, Arrow IPC et CSV.
+
+Les filtres (colonnes, période sur date_ent, communes, modalités : voir
+filtres.py) sont appliqués dans la requête ; les lignes sont lues en flux (curseur serveur) ou, pour le
+CSV, produites directement par PostgreSQL (COPY ... TO STDOUT).
+
+Usage :
+    python -m maisondudroit.export entretiens.parquet [--format parquet|arrow|csv|xlsx]
+                     [--colonnes num date_ent sexe ...] [--du 2024-01-01] [--au 2024-12-31]
+                     [--commune Vannes ...] [--codes]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date
+
+from . import cache_metadonnees
+from .db import _pyarrow, arrow_schema, checkout, stream, stream_batches
+from .filtres import filter_conditions
+from .decodage import build_reporting_query, load_decoding_metadata
+
+# =================================================================
+#  EXPORT EN FLUX, CONSTRUIT À LA DEMANDE
+# =================================================================
+# Le classeur n'est plus fabriqué en mémoire (BytesIO) à chaque rerun :
+#   - lecture par curseur serveur (nommé), CHUNK_SIZE lignes à la fois
+#   - écriture xlsxwriter en mode constant_memory dans un fichier temporaire
+#   - fichier conservé par version des données : les téléchargements
+#     suivants ne relisent pas la base
+# La mémoire reste constante quelle que soit la taille de la table.
+
+FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+    'csv': ('csv', 'text/csv'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "maison_du_droit_exports"))
+EXPORT_TTL = 3600          # secondes : exports non relus au-delà supprimés (sessions fermées)
+CHUNK_SIZE = 10_000
+EXCEL_MAX_ROWS = 1_048_576      # limite d'une feuille (en-tête compris)
+
+_build_lock = threading.Lock()
+
+
+def write_excel(path, columns, chunks, sheet_name="Export", na_rep=None):
+    """
+    Écrit les lots dans un classeur en mode constant_memory (ligne par ligne).
+    Au-delà de la limite Excel, la suite passe sur une feuille "<nom>_2", etc.
+    Retourne le nombre de lignes écrites.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'default_date_format': 'dd/mm/yyyy',
+        'remove_timezone': True,
+    })
+    try:
+        sheets, row_idx, total = 0, EXCEL_MAX_ROWS, 0
+        for rows in chunks:
+            for row in rows:
+                if row_idx >= EXCEL_MAX_ROWS:
+                    sheets += 1
+                    sheet = workbook.add_worksheet(sheet_name if sheets == 1 else f"{sheet_name}_{sheets}")
+                    sheet.write_row(0, 0, columns)
+                    row_idx = 1
+                if na_rep is not None:
+                    row = [na_rep if v is None else v for v in row]
+                sheet.write_row(row_idx, 0, row)
+                row_idx += 1
+                total += 1
+        if not sheets:
+            workbook.add_worksheet(sheet_name).write_row(0, 0, columns)
+    finally:
+        workbook.close()
+    return total
+
+
+def data_version(conn):
+    """
+    Version des données exportées, sans parcours de table : empreinte
+    d'entretien, demande et solution lue dans pg_stat_all_tables (écritures
+    de tous les processus, voir cache_metadonnees.ENTRETIEN_STAMP) et
+    versions locales de variable et modalite (libellés du décodage SQL).
+    """
+    return cache_metadonnees.entretien_stamp(conn), cache_metadonnees.version('variable', 'modalite')
+
+
+def export_path(name, version, ext="xlsx"):
+    key = hashlib.sha1(repr(version).encode()).hexdigest()[:12]
+    return os.path.join(EXPORT_DIR, f"{name}_{key}.{ext}")
+
+
+def _purge(name, keep, ext="xlsx"):
+    """
+    Supprime les versions précédentes de cet export (même nom exactement) et
+    tout export non relu depuis EXPORT_TTL secondes.
+    """
+    now = time.time()
+    for entry in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, entry)
+        if path == keep or entry.endswith(".tmp"):
+            continue
+        stem, _, key = os.path.splitext(entry)[0].rpartition("_")
+        try:
+            if (stem == name and entry.endswith(f".{ext}") and len(key) == 12) \
+                    or now - os.path.getmtime(path) > EXPORT_TTL:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+# --- Écriture par format : (conn, requête, paramètres, chemin) -> None ---
+
+def _write_xlsx(conn, query, params, path, sheet_name="Export", na_rep=None):
+    columns, chunks = stream(conn, query, params, CHUNK_SIZE)
+    write_excel(path, columns, chunks, sheet_name, na_rep)
+
+
+def _write_csv(conn, query, params, path, **_):
+    """CSV produit par PostgreSQL lui-même (COPY ... TO STDOUT)."""
+    cursor = conn.cursor()
+    try:
+        sql = cursor.mogrify(query, params).decode()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+    finally:
+        cursor.close()
+
+
+def _arrow_writer(path, schema, fmt):
+    pa = _pyarrow()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(path, schema, compression='zstd')
+    return pa.ipc.new_file(path, schema)
+
+
+def _write_arrow_format(fmt):
+    def write(conn, query, params, path, **_):
+        pa = _pyarrow()
+        if pa is None:
+            raise ImportError(f"pyarrow est requis pour l'export {fmt} (pip install pyarrow)")
+        writer = None
+        try:
+            for batch in stream_batches(conn, query, params, CHUNK_SIZE):
+                if writer is None:
+                    writer = _arrow_writer(path, batch.schema, fmt)
+                writer.write_batch(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            # Aucune ligne : fichier vide mais lisible, avec les colonnes
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT * FROM ({query}) q LIMIT 0", params)
+                schema = pa.schema([(name, type_ or pa.null()) for name, type_ in arrow_schema(cursor.description)])
+            finally:
+                cursor.close()
+            writer = _arrow_writer(path, schema, fmt)
+            writer.write_table(schema.empty_table())
+            writer.close()
+    return write
+
+
+WRITERS = {
+    'xlsx': _write_xlsx,
+    'csv': _write_csv,
+    'parquet': _write_arrow_format('parquet'),
+    'arrow': _write_arrow_format('arrow'),
+}
+
+
+def export_query(conn, columns=None, date_min=None, date_max=None, communes=None,
+                 decoded=True, tab='ENTRETIEN', **filters):
+    """
+    Requête d'export filtrée côté serveur : colonnes choisies (toutes par
+    défaut), date_ent dans [date_min, date_max], communes listées et autres
+    filtres globaux (voir filtres.py). decoded=False garde les codes bruts.
+    """
+    cursor = conn.cursor()
+    try:
+        plan, _ = load_decoding_metadata(cursor, tab)
+    finally:
+        cursor.close()
+    known = [col for col, _, _ in plan]
+    if columns:
+        unknown = [c for c in columns if c not in known]
+        if unknown:
+            raise ValueError(f"Colonne inconnue : {', '.join(unknown)}")
+        plan = [p for c in columns for p in plan if p[0] == c]
+    if not decoded:
+        plan = [(col, pos, False) for col, pos, _ in plan]
+
+    filters = dict(date_min=date_min, date_max=date_max, communes=communes, **filters)
+    query, params = build_reporting_query(plan, tab, filters=filter_conditions(filters))
+    return query + "\nORDER BY e.num", params
+
+
+def export_data(path, fmt='parquet', conn=None, **filters):
+    """Écrit l'export filtré dans path (sans cache). Voir export_query pour les filtres."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Format inconnu : {fmt}")
+    with checkout(conn) as conn:
+        query, params = export_query(conn, **filters)
+        WRITERS[fmt](conn, query, params, path)
+        conn.rollback()     # lecture seule : fin de la transaction du curseur serveur
+    return path
+
+
+def _reuse(path):
+    """Vrai si le fichier existe ; sa date est rafraîchie pour qu'il survive à la purge (EXPORT_TTL)."""
+    try:
+        os.utime(path)
+        return True
+    except OSError:
+        return False
+
+
+def cached_export(query, params=None, fmt='xlsx', name="export_entretiens", conn=None, version=None, **options):
+    """
+    Chemin d'un fichier à jour pour la requête, construit seulement s'il
+    n'existe pas déjà pour cette version des données (data_version par défaut).
+    """
+    ext = FORMATS[fmt][0]
+    with checkout(conn) as conn:
+        if version is None:
+            version = data_version(conn)
+        path = export_path(name, (query, params, version, options), ext)
+        if _reuse(path):
+            return path
+        with _build_lock:
+            if _reuse(path):
+                return path
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+            try:
+                WRITERS[fmt](conn, query, params, tmp, **options)
+                conn.rollback()     # fin de la transaction du curseur serveur
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            _purge(name, keep=path, ext=ext)
+    return path
+
+
+def excel_export(query, params=None, name="export_entretiens", sheet_name="Export",
+                 na_rep=None, conn=None, version=None):
+    return cached_export(query, params, 'xlsx', name, conn, version, sheet_name=sheet_name, na_rep=na_rep)
+
+
+def filtered_export(fmt='parquet', conn=None, version=None, name="export_filtre", **filters):
+    """
+    Export filtré mis en cache (téléchargement depuis l'interface). Un nom par
+    session : préparer un export ne supprime pas ceux des autres sessions.
+    """
+    with checkout(conn) as conn:
+        query, params = export_query(conn, **filters)
+        return cached_export(query, params, fmt, name, conn, version)
+
+
+def dataframe_to_excel(df, sheet_name="Export"):
+    """Petit DataFrame (données d'un graphique) -> octets xlsx, même écriture en flux."""
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "export.xlsx")
+        write_excel(path, [str(c) for c in df.columns], [rows], sheet_name)
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sortie", help="fichier à écrire")
+    parser.add_argument("--format", choices=sorted(FORMATS), help="déduit de l'extension par défaut")
+    parser.add_argument("--colonnes", nargs='+', help="colonnes d'entretien (toutes par défaut)")
+    parser.add_argument("--du", type=date.fromisoformat, help="date_ent minimale (AAAA-MM-JJ)")
+    parser.add_argument("--au", type=date.fromisoformat, help="date_ent maximale (AAAA-MM-JJ)")
+    parser.add_argument("--commune", nargs='+', help="communes à garder")
+    parser.add_argument("--codes", action='store_true', help="codes bruts au lieu des libellés")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or os.path.splitext(args.sortie)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        parser.error(f"format inconnu : {fmt} (choisir parmi {', '.join(sorted(FORMATS))})")
+    export_data(args.sortie, fmt, columns=args.colonnes, date_min=args.du, date_max=args.au,
+                communes=args.commune, decoded=not args.codes)
+    print(f"{args.sortie} : {os.path.getsize(args.sortie) / 2**20:.1f} Mo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""
+Filtres globaux de VISUALISATION, appliqués dans les requêtes.
+
+Les filtres (période sur date_ent, communes, modalités d'entretien,
+natures de demande / solution) deviennent des conditions WHERE
+paramétrées ajoutées aux requêtes du tableau de bord, du créateur de
+graphiques et des exports : rien n'est filtré en pandas.
+
+Index utilisés par ces conditions : migrations/0002_index_filtres.up.sql
+("le mois dernier pour une commune" se lit par un parcours d'intervalle
+sur entretien_commune_date_idx).
+"""
+from .decodage import _ident
+
+# Colonnes d'entretien filtrables par modalité (codes comparés en texte,
+# comme dans les jointures de décodage)
+FILTER_COLUMNS = ('mode', 'sexe', 'age')
+# Tables filles : entretien gardé s'il a au moins une des natures choisies
+CHILD_TABLES = {'demandes': 'demande', 'solutions': 'solution'}
+
+SQL_FILTER_MODALITES = """
+    SELECT lower(v.lib), m.lib_m, m.code
+    FROM variable v
+    JOIN modalite m ON m.tab = v.tab AND m.pos = v.pos
+    WHERE v.tab = %s AND lower(v.lib) = ANY(%s)
+    ORDER BY v.pos, m.pos_m
+"""
+
+
+def filter_conditions(filters=None):
+    """
+    Conditions [(condition sur "e.", paramètres), ...] pour build_reporting_query.
+    filters : {'date_min', 'date_max', 'communes', 'demandes', 'solutions',
+    <colonne de FILTER_COLUMNS>: [codes]} ; les valeurs vides sont ignorées.
+    """
+    conditions = []
+    for key, value in (filters or {}).items():
+        if value is None or (isinstance(value, (list, tuple, set)) and not value):
+            continue
+        if key == 'date_min':
+            conditions.append(("e.date_ent >= %s", [value]))
+        elif key == 'date_max':
+            conditions.append(("e.date_ent <= %s", [value]))
+        elif key == 'communes':
+            conditions.append(("e.commune = ANY(%s)", [list(value)]))
+        elif key in CHILD_TABLES:
+            table = CHILD_TABLES[key]
+            conditions.append((f"EXISTS (SELECT 1 FROM {table} f WHERE f.num = e.num AND f.nature = ANY(%s))",
+                               [[str(v) for v in value]]))
+        elif key in FILTER_COLUMNS:
+            conditions.append((f"e.{_ident(key)}::text = ANY(%s)", [[str(v) for v in value]]))
+        else:
+            raise ValueError(f"Filtre inconnu : {key}")
+    return conditions
+
+
+def active_filters(filters=None):
+    """Filtres non vides, dans un ordre stable (clé de cache)."""
+    return {k: v for k, v in sorted((filters or {}).items())
+            if v is not None and not (isinstance(v, (list, tuple, set)) and not v)}
+
+
+def load_filter_modalites(conn, tab='ENTRETIEN'):
+    """{colonne: {libellé: code}} des colonnes de FILTER_COLUMNS, ordre pos_m."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_FILTER_MODALITES, (tab, list(FILTER_COLUMNS)))
+        options = {}
+        for col, label, code in cursor.fetchall():
+            options.setdefault(col, {})[label] = code
+    finally:
+        cursor.close()
+    return options
@@ -0,0 +1,220 @@
+"""
+Générateur d'entretiens synthétiques pour les tests de performance.
+
+Les valeurs sont tirées des métadonnées de la base (variable, modalite,
+plage, valeurs_c) : codes de modalité et valeurs de liste pour les
+variables MOD / CHAINE, entiers dans la plage pour les variables NUM.
+Les fréquences suivent les entretiens déjà saisis (lissées pour que
+chaque modalité apparaisse) ; sur une base vide, les premières
+modalités sont les plus fréquentes. Chaque entretien reçoit 1 à 3
+demandes et 1 à 3 solutions.
+
+Génération vectorisée (numpy) par lots, chargés par COPY FROM STDIN,
+un COMMIT par lot. Même graine et même base de départ : mêmes données.
+
+Usage :
+    python -m maisondudroit.generateur 1000000 [--graine 42] [--lot 100000] [--du 2022-01-01] [--au 2024-12-31]
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .db import checkout
+from .import_excel import ENFANTS, copy_dataframe
+from .decodage import _ident
+
+CHUNK_SIZE = 100_000
+NULL_RATE = 0.03            # part de réponses manquantes sans historique
+CHILDREN_WEIGHTS = (0.6, 0.3, 0.1)    # probabilité de 1, 2 ou 3 demandes (solutions)
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 0.8, 0.1, 0.0)    # lundi .. dimanche
+
+# Colonnes d'entretien, type SQL et variable associée (même rapprochement que decodage.SQL_PLAN)
+SQL_COLUMNS = """
+    SELECT c.column_name, c.data_type, v.pos, v.type_v
+    FROM information_schema.columns c
+    LEFT JOIN LATERAL (
+        SELECT pos, type_v FROM variable
+        WHERE tab = %s AND lower(lib) = c.column_name
+        ORDER BY pos DESC LIMIT 1
+    ) v ON TRUE
+    WHERE c.table_name = 'entretien' AND c.table_schema = current_schema()
+    ORDER BY c.ordinal_position
+"""
+SQL_MODALITES = "SELECT pos, code FROM modalite WHERE tab = %s ORDER BY pos, pos_m"
+SQL_PLAGES = "SELECT pos, val_min, val_max FROM plage WHERE tab = %s"
+SQL_VALEURS = "SELECT pos, lib FROM valeurs_c WHERE tab = %s ORDER BY pos, pos_c"
+# Natures proposées à la saisie (voir structure_questionnaire.load_natures)
+SQL_NATURES = "SELECT code FROM modalite WHERE tab = %s AND pos = 3 ORDER BY pos_m"
+
+INTEGER_TYPES = ('smallint', 'integer', 'bigint')
+
+
+def _default_weights(n):
+    # Sans historique : décroissance douce dans l'ordre de saisie des modalités
+    return 1.0 / np.arange(1, n + 1) ** 0.8
+
+
+def _observed(cursor, query, values):
+    """Poids lissés (effectif + 1) et part de NULL observés ; None si rien n'est saisi."""
+    cursor.execute(query)
+    counts = dict(cursor.fetchall())
+    total = sum(counts.values())
+    if not total:
+        return None, None
+    weights = np.array([counts.get(str(v), 0) + 1 for v in values], dtype=float)
+    return weights, counts.get(None, 0) / total
+
+
+def load_generation_metadata(conn, tab='ENTRETIEN'):
+    """
+    Spécification de génération :
+    {'columns': {colonne: (type, valeurs | (min, max) | None, poids, part de NULL)},
+     'demande': (codes, poids), 'solution': (codes, poids)}
+    type : 'choice' (valeurs tirées selon les poids), 'range' (entier uniforme) ou 'null'.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_COLUMNS, (tab,))
+        columns = cursor.fetchall()
+        cursor.execute(SQL_MODALITES, (tab,))
+        modalites = {}
+        for pos, code in cursor.fetchall():
+            modalites.setdefault(pos, []).append(code)
+        cursor.execute(SQL_PLAGES, (tab,))
+        plages = {pos: (lo, hi) for pos, lo, hi in cursor.fetchall()}
+        cursor.execute(SQL_VALEURS, (tab,))
+        valeurs = {}
+        for pos, lib in cursor.fetchall():
+            valeurs.setdefault(pos, []).append(lib)
+
+        spec = {'columns': {}}
+        for col, data_type, pos, type_v in columns:
+            if col in ('num', 'date_ent'):
+                continue
+            values = modalites.get(pos) if type_v == 'MOD' else valeurs.get(pos) if type_v == 'CHAINE' else None
+            if values and data_type in INTEGER_TYPES:
+                values = [int(v) for v in values if str(v).lstrip('-').isdigit()]
+            if values:
+                weights, null_rate = _observed(
+                    cursor, f"SELECT {_ident(col)}::text, count(*) FROM entretien GROUP BY 1", values)
+                spec['columns'][col] = ('choice', values,
+                                        _default_weights(len(values)) if weights is None else weights,
+                                        NULL_RATE if null_rate is None else null_rate)
+            elif type_v == 'NUM' and pos in plages and data_type in INTEGER_TYPES:
+                lo, hi = plages[pos]
+                spec['columns'][col] = ('range', (lo or 0, hi if hi is not None else (lo or 0) + 99), None, NULL_RATE)
+            else:
+                spec['columns'][col] = ('null', None, None, 1.0)
+
+        for table in ENFANTS:
+            cursor.execute(SQL_NATURES, (table.upper(),))
+            codes = [row[0] for row in cursor.fetchall()]
+            weights, _ = _observed(cursor, f"SELECT nature, count(*) FROM {table} GROUP BY 1", codes) if codes else (None, None)
+            spec[table] = (codes, _default_weights(len(codes)) if weights is None else weights)
+    finally:
+        cursor.close()
+    return spec
+
+
+def _column(rng, n, kind, values, weights, null_rate):
+    if kind == 'null':
+        return pd.array([pd.NA] * n)
+    if kind == 'range':
+        lo, hi = values
+        out = pd.array(rng.integers(lo, hi + 1, n), dtype='Int64')
+    else:
+        picks = rng.choice(len(values), size=n, p=weights / weights.sum())
+        out = pd.array(np.asarray(values)[picks])
+    if null_rate:
+        out[rng.random(n) < null_rate] = pd.NA
+    return out
+
+
+def _dates(rng, n, date_min, date_max):
+    """Dates d'entretien, jours ouvrés surtout (WEEKDAY_WEIGHTS)."""
+    days = pd.date_range(date_min, date_max, freq='D')
+    weights = np.asarray(WEEKDAY_WEIGHTS)[days.dayofweek]
+    return days[rng.choice(len(days), size=n, p=weights / weights.sum())].strftime('%Y-%m-%d')
+
+
+def _children(rng, nums, codes, weights):
+    """1 à 3 natures distinctes par entretien -> (num, pos, nature)."""
+    if not codes:
+        return pd.DataFrame(columns=['num', 'pos', 'nature'])
+    counts = rng.choice(len(CHILDREN_WEIGHTS), size=len(nums), p=CHILDREN_WEIGHTS) + 1
+    num = np.repeat(nums, counts)
+    nature = np.asarray(codes, dtype=object)[rng.choice(len(codes), size=len(num), p=weights / weights.sum())]
+    df = pd.DataFrame({'num': num, 'nature': nature}).drop_duplicates()
+    df.insert(1, 'pos', df.groupby('num').cumcount() + 1)
+    return df
+
+
+def generate_chunk(rng, spec, first_num, n, date_min, date_max):
+    """Un lot de n entretiens numérotés à partir de first_num : {table: DataFrame}."""
+    nums = np.arange(first_num, first_num + n)
+    entretiens = pd.DataFrame({'num': nums, 'date_ent': _dates(rng, n, date_min, date_max)})
+    for col, (kind, values, weights, null_rate) in spec['columns'].items():
+        entretiens[col] = _column(rng, n, kind, values, weights, null_rate)
+    chunk = {'entretien': entretiens}
+    for table in ENFANTS:
+        chunk[table] = _children(rng, nums, *spec[table])
+    return chunk
+
+
+def generate(n, conn=None, seed=None, chunk_size=CHUNK_SIZE, date_min=None, date_max=None, progress=None):
+    """Génère et charge n entretiens (et leurs demandes / solutions). Retourne le rapport."""
+    date_max = date_max or date.today()
+    date_min = date_min or date_max - timedelta(days=3 * 365)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    totals = {'entretien': 0, **{table: 0 for table in ENFANTS}}
+    with checkout(conn) as conn:
+        spec = load_generation_metadata(conn)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COALESCE(max(num), 0) + 1 FROM entretien")
+            next_num = cursor.fetchone()[0]
+            conn.commit()
+            for offset in range(0, n, chunk_size):
+                size = min(chunk_size, n - offset)
+                for table, df in generate_chunk(rng, spec, next_num, size, date_min, date_max).items():
+                    copy_dataframe(cursor, df, table)
+                    totals[table] += len(df)
+                next_num += size
+                conn.commit()
+                if progress:
+                    progress(totals['entretien'], time.perf_counter() - start)
+            # NUM fournis par le générateur : la séquence suit pour les saisies futures
+            cursor.execute("SELECT setval(pg_get_serial_sequence('entretien', 'num'), GREATEST(max(num), 1)) FROM entretien")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    duree = time.perf_counter() - start
+    return {**totals, 'duree_s': duree, 'lignes_par_min': sum(totals.values()) / duree * 60 if duree else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("nombre", type=int, help="nombre d'entretiens à générer")
+    parser.add_argument("--graine", type=int, help="graine aléatoire (reproductibilité)")
+    parser.add_argument("--lot", type=int, default=CHUNK_SIZE, help="entretiens par COPY / COMMIT")
+    parser.add_argument("--du", type=date.fromisoformat, help="première date d'entretien (AAAA-MM-JJ)")
+    parser.add_argument("--au", type=date.fromisoformat, help="dernière date d'entretien (AAAA-MM-JJ)")
+    args = parser.parse_args(argv)
+
+    rapport = generate(args.nombre, seed=args.graine, chunk_size=args.lot, date_min=args.du, date_max=args.au,
+                       progress=lambda done, s: print(f"  {done} entretiens ({s:.1f}s)", file=sys.stderr))
+    print(f"Entretiens : {rapport['entretien']} | Demandes : {rapport['demande']} | Solutions : {rapport['solution']}")
+    print(f"Durée : {rapport['duree_s']:.2f}s ({rapport['lignes_par_min']:,.0f} lignes/min)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
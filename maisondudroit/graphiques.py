@@ -0,0 +1,145 @@
+from .filtres import filter_conditions
+from .decodage import _ident, build_reporting_query, load_decoding_metadata
+
+# =================================================================
+#  CRÉATEUR DE GRAPHIQUES : AGRÉGATION CÔTÉ SERVEUR
+# =================================================================
+# La sélection (X, Y, couleur, type) devient une requête agrégée sur le
+# SELECT décodé de decodage.py : seules les données à la taille du
+# graphique sortent de PostgreSQL.
+#   - Barres / Lignes / Aires / Camembert : GROUP BY + count / avg / sum
+#   - Boîte à moustache : quartiles calculés par percentile_cont
+#   - Nuage de points : points distincts pondérés, tirés au hasard au-delà de MAX_POINTS
+
+COUNT = "(Compte des dossiers)"
+COUNT_COLUMN = "Compte"
+CHART_TYPES = ["Barres", "Lignes", "Aires", "Camembert", "Boîte à moustache", "Nuage de points"]
+MAX_POINTS = 5000
+
+# Agrégat de Y selon le type (comme l'ancien calcul pandas)
+Y_AGGREGATES = {"Barres": "avg", "Lignes": "avg", "Aires": "sum"}
+
+SQL_NUMERIC = """
+    SELECT column_name FROM information_schema.columns
+    WHERE table_name = 'entretien' AND table_schema = current_schema()
+      AND data_type IN ('smallint', 'integer', 'bigint', 'numeric', 'real', 'double precision')
+"""
+
+ORDER_SUFFIX = "__ordre"
+
+
+def load_chart_columns(conn, tab='ENTRETIEN'):
+    """Retourne (plan de décodage, colonnes numériques non décodées)."""
+    cursor = conn.cursor()
+    try:
+        plan, _ = load_decoding_metadata(cursor, tab)
+        cursor.execute(SQL_NUMERIC)
+        numeric = {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+    return plan, [col for col, _, decode in plan if col in numeric and not decode]
+
+
+def plan_chart(plan, x, y=None, color=None, chart_type="Barres", tab='ENTRETIEN', max_points=MAX_POINTS,
+               filters=None):
+    """
+    Traduit la sélection du créateur en (requête, paramètres).
+    y=None ou COUNT : effectifs. filters : filtres globaux (voir filtres.py).
+    Lève ValueError pour une sélection invalide.
+    """
+    if chart_type not in CHART_TYPES:
+        raise ValueError(f"Type de graphique inconnu : {chart_type}")
+    y = None if y == COUNT else y
+    if chart_type == "Camembert":
+        # Effectifs par modalité de X, comme avant l'agrégation SQL : Y et couleur ignorés
+        y = color = None
+    if y is None and chart_type in ("Boîte à moustache", "Nuage de points"):
+        raise ValueError("Sélectionnez une variable numérique en Y.")
+
+    decoded = {col: decode for col, _, decode in plan}
+    wanted = [c for c in dict.fromkeys([x, color, y]) if c is not None]
+    unknown = [c for c in wanted if c not in decoded]
+    if unknown:
+        raise ValueError(f"Colonne inconnue : {', '.join(unknown)}")
+
+    # Sous-requête décodée limitée aux colonnes utiles, avec l'ordre des modalités
+    source, params = build_reporting_query([p for p in plan if p[0] in wanted], tab, with_order=True,
+                                           filters=filter_conditions(filters))
+    keys = [c for c in dict.fromkeys([x, color]) if c is not None]
+    group = ", ".join(_ident(c) for c in keys)
+    order = []
+    for c in keys:
+        if decoded[c]:
+            order.append(f"min({_ident(c + ORDER_SUFFIX)}) NULLS LAST")
+        order.append(_ident(c))
+    order = ", ".join(order)
+    count = f"count(*) AS {_ident(COUNT_COLUMN)}"
+
+    if chart_type == "Boîte à moustache":
+        yy = _ident(y)
+        stats = ", ".join(
+            f"percentile_cont({q}) WITHIN GROUP (ORDER BY {yy}) AS {name}"
+            for q, name in ((0.25, "q1"), (0.5, "median"), (0.75, "q3"))
+        )
+        query = (f"SELECT {group}, min({yy}) AS lowerfence, {stats}, max({yy}) AS upperfence, {count}\n"
+                 f"FROM ({source}) d\nWHERE {yy} IS NOT NULL\nGROUP BY {group}\nORDER BY {order}")
+    elif chart_type == "Nuage de points":
+        cols = ", ".join(_ident(c) for c in dict.fromkeys([x, y, color]) if c is not None)
+        query = (f"SELECT {cols}, {count}\nFROM ({source}) d\nGROUP BY {cols}\n"
+                 f"ORDER BY random()\nLIMIT %s")
+        params.append(max_points)
+    else:
+        value = count if y is None else f"{Y_AGGREGATES.get(chart_type, 'avg')}({_ident(y)}) AS {_ident(y)}"
+        query = f"SELECT {group}, {value}\nFROM ({source}) d\nGROUP BY {group}\nORDER BY {order}"
+    return query, params
+
+
+def load_chart_data(conn, plan, x, y=None, color=None, chart_type="Barres", tab='ENTRETIEN', filters=None):
+    """Exécute la requête planifiée et renvoie le résultat (taille du graphique)."""
+    query, params = plan_chart(plan, x, y, color, chart_type, tab, filters=filters)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        columns = [d[0] for d in cursor.description]
+    finally:
+        cursor.close()
+    import pandas as pd     # imports différés : le module reste léger à importer
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+
+def build_figure(data, x, y=None, color=None, chart_type="Barres", title=None, colors=None):
+    """Figure Plotly à partir du résultat agrégé de load_chart_data."""
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    y = None if y == COUNT or chart_type == "Camembert" else y
+    y_col = COUNT_COLUMN if y is None else y
+    if chart_type == "Barres":
+        fig = px.bar(data, x=x, y=y_col, color=color, barmode="group", title=title,
+                     color_discrete_sequence=colors, text_auto=True)
+        if y is not None:
+            fig.update_layout(yaxis_title=f"Moyenne de {y}")
+    elif chart_type == "Lignes":
+        fig = px.line(data, x=x, y=y_col, color=color, markers=True, title=title, color_discrete_sequence=colors)
+    elif chart_type == "Aires":
+        fig = px.area(data, x=x, y=y_col, color=color, title=title, color_discrete_sequence=colors)
+    elif chart_type == "Camembert":
+        fig = px.pie(data, names=x, values=COUNT_COLUMN, title=title, color_discrete_sequence=colors, hole=0.4)
+    elif chart_type == "Boîte à moustache":
+        # Boîtes pré-calculées : moustaches au min / max, sans points aberrants
+        fig = go.Figure()
+        groups = data.groupby(color, sort=False, dropna=False) if color else [(y, data)]
+        for i, (name, part) in enumerate(groups):
+            fig.add_trace(go.Box(
+                x=part[x], q1=part["q1"], median=part["median"], q3=part["q3"],
+                lowerfence=part["lowerfence"], upperfence=part["upperfence"], name=str(name),
+                marker_color=colors[i % len(colors)] if colors else None,
+            ))
+        fig.update_layout(title=title, boxmode="group", xaxis_title=x, yaxis_title=y)
+    elif chart_type == "Nuage de points":
+        fig = px.scatter(data, x=x, y=y, color=color, size=COUNT_COLUMN, title=title,
+                         color_discrete_sequence=colors)
+    else:
+        raise ValueError(f"Type de graphique inconnu : {chart_type}")
+    return fig
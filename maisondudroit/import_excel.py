@@ -0,0 +1,209 @@
+"""
+Import en masse des fichiers mensuels Excel de la Maison du Droit.
+
+Remplace les boucles df.iterrows() du notebook Partie2sae.ipynb :
+  - nettoyage vectorisé des colonnes (NaN, "nc", codes numériques/texte)
+  - Dem.N / Sol.N passés au format long en un seul melt
+  - chargement par COPY FROM STDIN dans une seule transaction
+
+Usage :
+    python -m maisondudroit.import_excel Maison_droit_decembre.xlsx [autres.xlsx ...] [--dry-run]
+"""
+import argparse
+import io
+import sys
+import time
+
+import pandas as pd
+
+from .db import checkout
+
+# --- Colonnes Excel -> colonnes de la table entretien ---
+ENTRETIEN_SMALLINT = {
+    'MODE_ENT': 'mode', 'DUREE': 'duree', 'SEXE': 'sexe', 'AGE': 'age',
+    'VIENT_PR': 'vient_pr', 'ENFANT': 'enfant', 'MODELE_FAM': 'modele_fam',
+    'PROFESSION': 'profession', 'RESS': 'ress',
+}
+# Colonnes texte et leur longueur maximale (varchar)
+ENTRETIEN_TEXTE = {
+    'SIT_FAM': ('sit_fam', 2), 'ORIGINE': ('origine', 2),
+    'COMMUNE': ('commune', 50), 'PARTENAIRE': ('partenaire', 50),
+}
+ENTRETIEN_COLUMNS = ['num', 'date_ent', 'mode', 'duree', 'sexe', 'age', 'vient_pr', 'sit_fam',
+                     'enfant', 'modele_fam', 'profession', 'ress', 'origine', 'commune', 'partenaire']
+
+# Tables filles : préfixe des colonnes Excel et longueur max de "nature"
+ENFANTS = {'demande': ('Dem.', 5), 'solution': ('Sol.', 50)}
+
+
+# =================================================================
+#  NETTOYAGE VECTORISÉ
+# =================================================================
+
+def _missing(s):
+    """Masque des valeurs absentes : NaN, chaîne vide ou "nc"."""
+    txt = s.astype('string').str.strip().str.lower()
+    return txt.isna() | txt.eq('') | txt.eq('nc')
+
+
+def to_smallint(s):
+    """Équivalent vectorisé de to_int_or_none : les valeurs non entières deviennent NULL."""
+    num = pd.to_numeric(s.mask(_missing(s)), errors='coerce')
+    num = num.where(num % 1 == 0)
+    return num.astype('Int16')
+
+
+def to_code(s):
+    """Codes mixtes (7, '5a', 1.0) -> texte ('7', '5a', '1'), NULL si absent."""
+    s = s.mask(_missing(s))
+    out = s.astype('string').str.strip()
+    num = pd.to_numeric(s, errors='coerce')
+    integral = num.notna() & (num % 1 == 0)
+    out[integral] = num[integral].astype('int64').astype('string')
+    return out
+
+
+def to_date(s):
+    if pd.api.types.is_numeric_dtype(s):
+        # Dates Excel stockées en numéro de série
+        return pd.to_datetime(s, unit='D', origin='1899-12-30', errors='coerce')
+    return pd.to_datetime(s, errors='coerce')
+
+
+def _rejets(lignes, nums, motif):
+    return pd.DataFrame({'ligne': list(lignes), 'num': list(nums), 'motif': motif})
+
+
+def clean_entretiens(raw):
+    """
+    Retourne (entretiens, rejets) : DataFrame prêt pour COPY et DataFrame
+    des lignes rejetées avec leur motif (index de ligne, num, motif).
+    """
+    rejets = []
+    num = pd.to_numeric(raw['NUM'], errors='coerce')
+    bad_num = num.isna() | (num % 1 != 0)
+    rejets.append(_rejets(raw.index[bad_num], raw['NUM'][bad_num], 'NUM invalide'))
+
+    df = pd.DataFrame({'num': num.astype('Int64')}, index=raw.index)
+    df['date_ent'] = to_date(raw['DATE_ENT']).dt.strftime('%Y-%m-%d') if 'DATE_ENT' in raw else None
+    for col, target in ENTRETIEN_SMALLINT.items():
+        df[target] = to_smallint(raw[col]) if col in raw else pd.NA
+    trop_long = pd.Series(False, index=raw.index)
+    for col, (target, max_len) in ENTRETIEN_TEXTE.items():
+        df[target] = to_code(raw[col]) if col in raw else pd.NA
+        trop_long |= df[target].str.len().gt(max_len).fillna(False).astype(bool)
+    rejets.append(_rejets(raw.index[trop_long & ~bad_num], df['num'][trop_long & ~bad_num], 'valeur texte trop longue'))
+
+    dup = df['num'].duplicated() & ~bad_num
+    rejets.append(_rejets(raw.index[dup], df['num'][dup], 'NUM en double'))
+
+    keep = ~(bad_num | trop_long | dup)
+    return df.loc[keep, ENTRETIEN_COLUMNS], pd.concat(rejets, ignore_index=True)
+
+
+def melt_enfants(raw, prefix, max_len):
+    """Dem.1..N (ou Sol.1..N) -> lignes (num, pos, nature) en un seul passage."""
+    cols = [c for c in raw.columns if c.startswith(prefix) and c[len(prefix):].isdigit()]
+    if not cols:
+        return pd.DataFrame(columns=['num', 'pos', 'nature']), _rejets([], [], None)
+    long = raw[['NUM'] + cols].reset_index(names='ligne').melt(
+        id_vars=['ligne', 'NUM'], value_vars=cols, var_name='pos', value_name='nature')
+    long['nature'] = to_code(long['nature'])
+    long = long[long['nature'].notna()]
+    long['pos'] = long['pos'].str[len(prefix):].astype('int16')
+    long['num'] = pd.to_numeric(long['NUM'], errors='coerce').astype('Int64')
+
+    trop_long = long['nature'].str.len() > max_len
+    rejets = _rejets(long['ligne'][trop_long], long['num'][trop_long], f"nature {prefix}N trop longue")
+    # L'index garde la ligne source pour écarter les enfants des lignes rejetées
+    long = long[~trop_long].set_index('ligne').sort_values(['num', 'pos'])
+    return long[['num', 'pos', 'nature']], rejets
+
+
+# =================================================================
+#  CHARGEMENT PAR COPY
+# =================================================================
+
+def copy_dataframe(cursor, df, table):
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep='')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(df.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def import_frame(raw, conn=None, dry_run=False):
+    """Nettoie et charge un DataFrame brut (une ou plusieurs feuilles mensuelles)."""
+    start = time.perf_counter()
+    raw = raw.reset_index(drop=True)
+    entretiens, rejets = clean_entretiens(raw)
+    enfants = {}
+    for table, (prefix, max_len) in ENFANTS.items():
+        enfants[table], rej = melt_enfants(raw, prefix, max_len)
+        rejets = pd.concat([rejets, rej], ignore_index=True)
+
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            # Entretiens déjà présents en base : rejetés plutôt que de faire échouer le COPY
+            cursor.execute("SELECT num FROM entretien WHERE num = ANY(%s)", (entretiens['num'].dropna().astype(int).tolist(),))
+            existants = {row[0] for row in cursor.fetchall()}
+            deja = entretiens['num'].isin(existants)
+            rejets = pd.concat([rejets, _rejets(entretiens.index[deja], entretiens['num'][deja], 'NUM déjà en base')],
+                               ignore_index=True)
+            entretiens = entretiens[~deja]
+            for table in enfants:
+                enfants[table] = enfants[table][enfants[table].index.isin(entretiens.index)]
+
+            if not dry_run:
+                copy_dataframe(cursor, entretiens, 'entretien')
+                for table, df in enfants.items():
+                    copy_dataframe(cursor, df, table)
+                # Les NUM viennent du fichier : on recale la séquence pour les saisies futures
+                cursor.execute("""
+                    SELECT setval(pg_get_serial_sequence('entretien', 'num'), GREATEST(MAX(num), 1))
+                    FROM entretien
+                """)
+                conn.commit()
+            else:
+                conn.rollback()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    duree = time.perf_counter() - start
+    lignes = len(entretiens) + sum(len(df) for df in enfants.values())
+    return {
+        'entretien': len(entretiens),
+        **{table: len(df) for table, df in enfants.items()},
+        'rejets': rejets,
+        'duree_s': duree,
+        'lignes_par_s': lignes / duree if duree else 0.0,
+    }
+
+
+def import_files(paths, conn=None, dry_run=False):
+    frames = [pd.read_excel(path) for path in paths]
+    return import_frame(pd.concat(frames, ignore_index=True), conn=conn, dry_run=dry_run)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("fichiers", nargs='+', help="fichiers Excel mensuels")
+    parser.add_argument("--dry-run", action='store_true', help="nettoie et contrôle sans écrire en base")
+    args = parser.parse_args(argv)
+
+    rapport = import_files(args.fichiers, dry_run=args.dry_run)
+    print(f"Entretiens : {rapport['entretien']} | Demandes : {rapport['demande']} | Solutions : {rapport['solution']}")
+    print(f"Durée : {rapport['duree_s']:.2f}s ({rapport['lignes_par_s']:.0f} lignes/s)"
+          + (" [dry-run, rien n'a été écrit]" if args.dry_run else ""))
+    rejets = rapport['rejets']
+    print(f"Lignes rejetées : {len(rejets)}")
+    if len(rejets):
+        print(rejets.to_string(index=False), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
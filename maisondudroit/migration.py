@@ -0,0 +1,160 @@
+"""
+Migrations versionnées du schéma (index, contraintes, tables de synthèse).
+
+Chaque migration du dossier migrations/ est soit une paire de scripts
+NNNN_nom.up.sql / NNNN_nom.down.sql, soit un module NNNN_nom.py qui
+définit up(cursor) et down(cursor). Les versions appliquées sont notées
+dans schema_migrations ; chaque migration tourne dans sa propre
+transaction, sous un verrou consultatif (un seul migrateur à la fois).
+
+Usage :
+    python -m maisondudroit.migration                 # applique les migrations en attente
+    python -m maisondudroit.migration --etat          # liste les migrations et leur état
+    python -m maisondudroit.migration --annuler 1     # revient à la version 1 (down des suivantes)
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import re
+import sys
+
+from .db import checkout
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+LOCK_ID = 501_2024     # pg_advisory_xact_lock : migrateurs concurrents sérialisés
+
+SQL_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version     integer      PRIMARY KEY,
+        nom         varchar(100) NOT NULL,
+        applique_le timestamptz  NOT NULL DEFAULT now()
+    )
+"""
+
+_NAME = re.compile(r"^(\d{4})_(\w+?)(\.up\.sql|\.down\.sql|\.py)$")
+
+
+def _sql_step(path):
+    def run(cursor):
+        with open(path, encoding="utf-8") as f:
+            cursor.execute(f.read())
+    return run
+
+
+def _python_steps(path, name):
+    spec = importlib.util.spec_from_file_location(f"migration_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.up, module.down
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Migrations [(version, nom, up, down), ...] triées par version."""
+    found = {}
+    for path in glob.glob(os.path.join(directory, "*")):
+        match = _NAME.match(os.path.basename(path))
+        if not match:
+            continue
+        version, name, kind = int(match.group(1)), match.group(2), match.group(3)
+        entry = found.setdefault(version, {'nom': name})
+        if entry['nom'] != name:
+            raise ValueError(f"Version {version} en double : {entry['nom']} et {name}")
+        if kind == ".py":
+            entry['up'], entry['down'] = _python_steps(path, name)
+        else:
+            entry['up' if kind == ".up.sql" else 'down'] = _sql_step(path)
+    migrations = []
+    for version in sorted(found):
+        entry = found[version]
+        if 'up' not in entry or 'down' not in entry:
+            raise ValueError(f"Migration {version:04d}_{entry['nom']} : script up ou down manquant")
+        migrations.append((version, entry['nom'], entry['up'], entry['down']))
+    return migrations
+
+
+def applied_versions(cursor):
+    cursor.execute(SQL_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _run(conn, version, name, step, up):
+    """Exécute un sens d'une migration et met à jour schema_migrations, en une transaction."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (LOCK_ID,))
+        if (version in applied_versions(cursor)) == up:
+            conn.rollback()     # déjà fait (par un autre migrateur)
+            return False
+        step(cursor)
+        if up:
+            cursor.execute("INSERT INTO schema_migrations (version, nom) VALUES (%s, %s)", (version, name))
+        else:
+            cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (version,))
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def pending(conn=None, directory=MIGRATIONS_DIR):
+    """Migrations pas encore appliquées [(version, nom), ...]."""
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            done = applied_versions(cursor)
+            conn.commit()
+        finally:
+            cursor.close()
+    return [(v, name) for v, name, _, _ in discover(directory) if v not in done]
+
+
+def migrate(conn=None, target=None, directory=MIGRATIONS_DIR):
+    """Applique (up) les migrations en attente jusqu'à target incluse. Retourne les versions appliquées."""
+    done = []
+    with checkout(conn) as conn:
+        for version, name, up, _ in discover(directory):
+            if target is not None and version > target:
+                break
+            if _run(conn, version, name, up, True):
+                done.append(version)
+    return done
+
+
+def rollback_to(target, conn=None, directory=MIGRATIONS_DIR):
+    """Annule (down) les migrations de version > target, de la plus récente à la plus ancienne."""
+    undone = []
+    with checkout(conn) as conn:
+        for version, name, _, down in reversed(discover(directory)):
+            if version <= target:
+                break
+            if _run(conn, version, name, down, False):
+                undone.append(version)
+    return undone
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--etat", action='store_true', help="liste les migrations appliquées / en attente")
+    action.add_argument("--jusqua", type=int, metavar="VERSION", help="applique jusqu'à cette version")
+    action.add_argument("--annuler", type=int, metavar="VERSION", help="revient à cette version (0 : tout annuler)")
+    args = parser.parse_args(argv)
+
+    if args.etat:
+        waiting = {v for v, _ in pending()}
+        for version, name, _, _ in discover():
+            print(f"{version:04d} {name:<30} {'en attente' if version in waiting else 'appliquée'}")
+    elif args.annuler is not None:
+        print(f"Annulées : {rollback_to(args.annuler) or 'aucune'}")
+    else:
+        print(f"Appliquées : {migrate(target=args.jusqua) or 'aucune (schéma à jour)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Tables de synthèse du tableau de bord (voir statistiques.py)."""
+from maisondudroit.statistiques import SQL_INSTALL, SQL_REBUILD
+
+
+def up(cursor):
+    # Idempotent : les bases déjà installées par "statistiques.py --installer" sont recalculées
+    cursor.execute(SQL_INSTALL)
+    cursor.execute(SQL_REBUILD)
+
+
+def down(cursor):
+    cursor.execute("""
+        DROP TRIGGER IF EXISTS stat_entretien_insert ON entretien;
+        DROP TRIGGER IF EXISTS stat_entretien_update ON entretien;
+        DROP TRIGGER IF EXISTS stat_entretien_delete ON entretien;
+        DROP FUNCTION IF EXISTS stat_entretien_maj();
+        DROP TABLE IF EXISTS stat_entretien;
+    """)
@@ -0,0 +1,4 @@
+DROP INDEX IF EXISTS entretien_date_ent_idx;
+DROP INDEX IF EXISTS entretien_commune_date_idx;
+DROP INDEX IF EXISTS demande_nature_num_idx;
+DROP INDEX IF EXISTS solution_nature_num_idx;
@@ -0,0 +1,22 @@
+-- Index des filtres globaux de VISUALISATION (voir filtres.py).
+-- Partiels : une condition "=" ou ">=" n'est jamais vraie pour NULL.
+
+CREATE INDEX IF NOT EXISTS entretien_date_ent_idx ON entretien (date_ent)
+    WHERE date_ent IS NOT NULL;
+COMMENT ON INDEX entretien_date_ent_idx IS
+    'filtres.filter_conditions : période seule (e.date_ent >= / <= %s)';
+
+CREATE INDEX IF NOT EXISTS entretien_commune_date_idx ON entretien (commune, date_ent)
+    WHERE commune IS NOT NULL;
+COMMENT ON INDEX entretien_commune_date_idx IS
+    'filtres.filter_conditions : communes (+ période), parcours d''intervalle par commune';
+
+CREATE INDEX IF NOT EXISTS demande_nature_num_idx ON demande (nature, num);
+COMMENT ON INDEX demande_nature_num_idx IS
+    'filtres.filter_conditions : EXISTS sur demande.nature (index seul)';
+
+CREATE INDEX IF NOT EXISTS solution_nature_num_idx ON solution (nature, num);
+COMMENT ON INDEX solution_nature_num_idx IS
+    'filtres.filter_conditions : EXISTS sur solution.nature (index seul)';
+
+ANALYZE entretien, demande, solution;
@@ -0,0 +1,4 @@
+-- Les clés étrangères font partie du schéma d'origine : elles sont conservées
+DROP INDEX IF EXISTS modalite_decodage_idx;
+DROP INDEX IF EXISTS modalite_ordre_idx;
+DROP INDEX IF EXISTS variable_rubrique_idx;
@@ -0,0 +1,45 @@
+-- Chemins d'accès du code : jointures et filtres par num ou (tab, pos).
+-- Chaque index note (COMMENT ON INDEX) les requêtes qu'il sert.
+
+-- Clés étrangères du schéma d'origine, recréées si la base a été
+-- restaurée sans contraintes. NOT VALID : pas de lecture des lignes
+-- existantes, le verrou de ADD CONSTRAINT n'est tenu qu'un instant. La
+-- vérification (VALIDATE) est la migration 0005, dans sa propre
+-- transaction, sous un verrou qui laisse passer lectures et saisies.
+DO $$
+DECLARE
+    fk record;
+BEGIN
+    FOR fk IN SELECT * FROM (VALUES
+        ('demande',   'demande_num_fkey',        'FOREIGN KEY (num) REFERENCES entretien (num)'),
+        ('solution',  'solution_num_fkey',       'FOREIGN KEY (num) REFERENCES entretien (num)'),
+        ('variable',  'variable_rubrique_fkey',  'FOREIGN KEY (rubrique) REFERENCES rubrique (pos)'),
+        ('modalite',  'modalite_tab_pos_fkey',   'FOREIGN KEY (tab, pos) REFERENCES variable (tab, pos)'),
+        ('plage',     'plage_tab_pos_fkey',      'FOREIGN KEY (tab, pos) REFERENCES variable (tab, pos)'),
+        ('valeurs_c', 'valeurs_c_tab_pos_fkey',  'FOREIGN KEY (tab, pos) REFERENCES variable (tab, pos)')
+    ) AS t(tbl, name, def)
+    LOOP
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = fk.name) THEN
+            EXECUTE format('ALTER TABLE %I ADD CONSTRAINT %I %s NOT VALID', fk.tbl, fk.name, fk.def);
+        END IF;
+    END LOOP;
+END $$;
+
+-- Décodage code -> libellé (une recherche par ligne et colonne décodée) :
+-- parcours d'index seul, lib_m et pos_m lus dans l'index
+CREATE INDEX IF NOT EXISTS modalite_decodage_idx ON modalite (tab, pos, code) INCLUDE (lib_m, pos_m);
+COMMENT ON INDEX modalite_decodage_idx IS
+    'reporting.build_reporting_query (LEFT JOIN modalite), statistiques.SQL_RESUME';
+
+-- Listes de modalités dans l'ordre de saisie, sans tri
+CREATE INDEX IF NOT EXISTS modalite_ordre_idx ON modalite (tab, pos, pos_m) INCLUDE (code, lib_m);
+COMMENT ON INDEX modalite_ordre_idx IS
+    'reporting.SQL_CATEGORIES, structure_questionnaire.SQL_OPTIONS, filtres.SQL_FILTER_MODALITES, '
+    'poc_global.get_demande_solution_modalites';
+
+-- Côté enfant de variable_rubrique_fkey (suppression de rubrique) et jointure du questionnaire
+CREATE INDEX IF NOT EXISTS variable_rubrique_idx ON variable (rubrique);
+COMMENT ON INDEX variable_rubrique_idx IS
+    'structure_questionnaire.SQL_VARIABLES, clé étrangère variable_rubrique_fkey';
+
+ANALYZE modalite, variable;
@@ -0,0 +1,14 @@
+-- Saisies différées (saisie_differee.py) : identifiant de saisie attribué
+-- par le poste client -> entretien créé. Inséré dans la même transaction
+-- que l'entretien : une saisie rejouée après une panne (journal local
+-- relu, commit déjà passé) est reconnue au lieu d'être insérée deux fois.
+CREATE TABLE IF NOT EXISTS saisie_recue (
+    id_saisie varchar(64) PRIMARY KEY,
+    num       integer     NOT NULL REFERENCES entretien (num) ON DELETE CASCADE,
+    saisie_le timestamptz NOT NULL,
+    recue_le  timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS saisie_recue_num_idx ON saisie_recue (num);
+COMMENT ON INDEX saisie_recue_num_idx IS
+    'clé étrangère saisie_recue.num (suppression d''entretien)';
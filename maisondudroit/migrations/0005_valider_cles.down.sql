@@ -0,0 +1,2 @@
+-- Une contrainte validée ne redevient pas NOT VALID : rien à annuler
+SELECT 1;
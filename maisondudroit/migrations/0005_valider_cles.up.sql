@@ -0,0 +1,16 @@
+-- Vérification des clés étrangères ajoutées NOT VALID par la migration 0003.
+-- Transaction distincte (une par migration) : VALIDATE CONSTRAINT ne prend
+-- qu'un verrou SHARE UPDATE EXCLUSIVE, qui n'empêche ni les lectures ni les
+-- saisies pendant le parcours des lignes existantes.
+DO $$
+DECLARE
+    fk record;
+BEGIN
+    FOR fk IN SELECT conrelid::regclass AS tbl, conname FROM pg_constraint
+              WHERE contype = 'f' AND NOT convalidated
+                AND conname IN ('demande_num_fkey', 'solution_num_fkey', 'variable_rubrique_fkey',
+                                'modalite_tab_pos_fkey', 'plage_tab_pos_fkey', 'valeurs_c_tab_pos_fkey')
+    LOOP
+        EXECUTE format('ALTER TABLE %s VALIDATE CONSTRAINT %I', fk.tbl, fk.conname);
+    END LOOP;
+END $$;
@@ -0,0 +1,2 @@
+-- Index inutilisé : il n'est pas recréé
+SELECT 1;
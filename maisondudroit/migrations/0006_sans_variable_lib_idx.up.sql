@@ -0,0 +1,5 @@
+-- Index créé par une version antérieure de la migration 0003, jamais
+-- choisi : la recherche de variable par libellé (decodage.SQL_PLAN,
+-- statistiques.SQL_RESUME) parcourt variable_pkey (tab, pos), qui sert
+-- aussi ORDER BY pos DESC LIMIT 1 sur une table de quelques lignes.
+DROP INDEX IF EXISTS variable_lib_idx;
@@ -0,0 +1,222 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .db import ITERSIZE, read_frame
+from .decodage import build_reporting_query, load_decoding_metadata
+
+# =================================================================
+#  DONNÉES DE REPORTING DÉCODÉES CÔTÉ SERVEUR
+# =================================================================
+# Décodage code -> libellé fait par PostgreSQL : voir decodage.py.
+# Les colonnes décodées reviennent en Categorical, ordonnées par pos_m.
+
+
+def to_reporting_frame(rows, columns, plan, categories):
+    """Construit le DataFrame en une fois, colonnes décodées en Categorical."""
+    return decode_frame(pd.DataFrame.from_records(rows, columns=columns), plan, categories)
+
+
+def decode_frame(df, plan, categories):
+    """Colonnes décodées en Categorical (ordre pos_m) puis dtypes compacts."""
+    for col, pos, decode in plan:
+        if decode and col in df.columns:
+            # Libellés dans l'ordre de saisie, puis codes restés sans traduction
+            labels = list(dict.fromkeys(categories.get(pos, [])))
+            known = set(labels)
+            extra = sorted({v for v in df[col].dropna().unique() if v not in known})
+            df[col] = pd.Categorical(df[col], categories=labels + extra)
+    return compact_reporting_frame(df)
+
+
+def load_reporting_frame(conn, tab='ENTRETIEN', itersize=ITERSIZE):
+    """Table entretien décodée côté serveur, en 3 requêtes (la dernière lue en flux)."""
+    cursor = conn.cursor()
+    try:
+        plan, categories = load_decoding_metadata(cursor, tab)
+    finally:
+        cursor.close()
+    if not plan:
+        return pd.DataFrame()
+    query, params = build_reporting_query(plan, tab)
+    return decode_frame(read_frame(conn, query, params, itersize), plan, categories)
+
+
+# =================================================================
+#  RAFRAÎCHISSEMENT INCRÉMENTAL
+# =================================================================
+# Les entretiens ne sont qu'ajoutés (num serial) : le chargeur garde le
+# plus grand num déjà lu et ne demande ensuite que "WHERE num > dernier".
+# Rechargement complet si les métadonnées de décodage changent (variable,
+# modalite) ou si le nombre de lignes en base ne correspond plus au cache
+# (suppression, import de NUM anciens), contrôlé au plus toutes les
+# COUNT_CHECK_INTERVAL secondes ou après une saisie.
+
+COUNT_CHECK_INTERVAL = 300
+
+
+def append_reporting_rows(frame, new):
+    """Concatène deux frames de reporting en conservant les dtypes compacts du premier."""
+    if frame.empty:
+        return new
+    if new.empty:
+        return frame
+    frame = frame.copy()
+    for col in frame.columns:
+        if col not in new.columns:
+            continue
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            # Nouvelles catégories ajoutées à la fin : les codes existants restent valides
+            values = new[col].astype(object)
+            add = [v for v in pd.unique(values.dropna()) if v not in frame[col].cat.categories]
+            if add:
+                frame[col] = frame[col].cat.add_categories(add)
+            new[col] = pd.Categorical(values, categories=frame[col].cat.categories)
+        elif pd.api.types.is_integer_dtype(frame[col]):
+            # Lot entièrement NULL (object/float64) : sans conversion, concat
+            # repasserait la colonne en object. Les entiers nullables sont
+            # élargis par concat (Int8 + Int16 -> Int16).
+            values = pd.to_numeric(new[col], errors='coerce')
+            present = values.dropna()
+            nullable = isinstance(frame[col].dtype, pd.api.extensions.ExtensionDtype)
+            if not nullable or len(present) != new[col].notna().sum() or (present % 1 != 0).any():
+                continue
+            info = np.iinfo(frame[col].dtype.name.lower())
+            fits = not len(present) or (info.min <= present.min() and present.max() <= info.max)
+            new[col] = values.astype(frame[col].dtype if fits else _smallest_int_dtype(present))
+        else:
+            new[col] = new[col].astype(frame[col].dtype)
+    return pd.concat([frame, new], ignore_index=True)
+
+
+class IncrementalReportingLoader:
+    """
+    Frame de reporting décodé, partagé entre sessions et complété par les
+    seuls nouveaux entretiens. Le frame renvoyé ne doit pas être modifié.
+    """
+
+    def __init__(self, tab='ENTRETIEN', count_check_interval=COUNT_CHECK_INTERVAL):
+        self.tab = tab
+        self.count_check_interval = count_check_interval
+        self.frame = pd.DataFrame()
+        self.last_num = None
+        self._plan = self._categories = None
+        self._meta_version = self._data_version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, conn, meta_version=None, data_version=None):
+        """
+        Met à jour le frame et le retourne.
+        meta_version : version des métadonnées de décodage (rechargement complet si elle change).
+        data_version : version des données entretien (contrôle du nombre de lignes si elle change).
+        """
+        with self._lock:
+            cursor = conn.cursor()
+            try:
+                if self._plan is None or meta_version != self._meta_version:
+                    self._full_load(conn, cursor)
+                else:
+                    self._append_new(conn)
+                    now = time.monotonic()
+                    if data_version != self._data_version or now - self._checked_at > self.count_check_interval:
+                        cursor.execute("SELECT count(*) FROM entretien")
+                        if cursor.fetchone()[0] != len(self.frame):
+                            self._full_load(conn, cursor)
+                        self._checked_at = now
+            finally:
+                cursor.close()
+            self._meta_version, self._data_version = meta_version, data_version
+            return self.frame
+
+    def _fetch(self, conn, after_num=None):
+        query, params = build_reporting_query(self._plan, self.tab, after_num=after_num)
+        return decode_frame(read_frame(conn, query, params), self._plan, self._categories)
+
+    def _full_load(self, conn, cursor):
+        self._plan, self._categories = load_decoding_metadata(cursor, self.tab)
+        self.frame = self._fetch(conn) if self._plan else pd.DataFrame()
+        self._update_last_num()
+        self._checked_at = time.monotonic()
+
+    def _append_new(self, conn):
+        if not self._plan:
+            return
+        new = self._fetch(conn, after_num=self.last_num if self.last_num is not None else 0)
+        if not new.empty:
+            self.frame = append_reporting_rows(self.frame, new)
+            self._update_last_num()
+
+    def _update_last_num(self):
+        if 'num' in self.frame.columns and self.frame['num'].notna().any():
+            self.last_num = int(self.frame['num'].max())
+        else:
+            self.last_num = None
+
+
+# =================================================================
+#  REPRÉSENTATION COMPACTE EN MÉMOIRE
+# =================================================================
+# Normalisation unique du jeu de reporting : catégories pour les textes
+# répétitifs, petits entiers nullables pour les codes, datetime pour la
+# date. Les KPI et figures comptent sur les codes des catégories et ne
+# passent aux libellés qu'au moment de l'affichage.
+
+MEMORY_BUDGET_MB = 256
+CATEGORY_MAX_RATIO = 0.5    # au-delà de 50 % de valeurs distinctes, on garde le texte
+
+
+def _smallest_int_dtype(values):
+    low, high = values.min(), values.max()
+    for dtype in ('Int8', 'Int16', 'Int32'):
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return dtype
+    return 'Int64'
+
+
+def compact_reporting_frame(df):
+    """Convertit les colonnes du reporting vers des dtypes compacts (en place)."""
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            continue
+        if col == 'date_ent':
+            df[col] = pd.to_datetime(s, errors='coerce')
+        elif pd.api.types.is_bool_dtype(s):
+            continue
+        elif pd.api.types.is_numeric_dtype(s):
+            values = s.dropna()
+            if len(values) and (values % 1 == 0).all():
+                df[col] = s.astype(_smallest_int_dtype(values))
+        elif len(s) and s.nunique(dropna=True) <= CATEGORY_MAX_RATIO * len(s):
+            df[col] = s.astype('category')
+    return df
+
+
+def memory_report(df, budget_mb=MEMORY_BUDGET_MB):
+    """Empreinte mémoire par colonne (Mo) et comparaison au budget."""
+    usage = df.memory_usage(deep=True, index=False) / 2**20
+    report = pd.DataFrame({'dtype': df.dtypes.astype(str), 'Mo': usage.round(3)})
+    total = float(usage.sum())
+    return report, total, total <= budget_mb
+
+
+def category_counts(s):
+    """Effectifs par modalité calculés sur les codes (bincount), libellés en sortie."""
+    if not isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype('category')
+    codes = s.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(s.cat.categories))
+    out = pd.DataFrame({'label': s.cat.categories, 'count': counts})
+    return out[out['count'] > 0].reset_index(drop=True)
+
+
+def top_label(s, default="N/A"):
+    """Modalité la plus fréquente (équivalent de .mode()[0]) sans hacher de chaînes."""
+    counts = category_counts(s)
+    if counts.empty:
+        return default
+    return counts.loc[counts['count'].idxmax(), 'label']
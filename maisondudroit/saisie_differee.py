@@ -0,0 +1,305 @@
+"""
+Saisie différée (write-behind) des entretiens.
+
+Le formulaire écrit la saisie dans un journal local SQLite (mode WAL,
+synchronous=FULL : la saisie est sur disque quand append() retourne) et
+l'acquitte aussitôt ; un thread la transmet ensuite à PostgreSQL par lots.
+Une base lente ou indisponible ne fait plus attendre ni perdre de saisie.
+
+  - chaque saisie porte un identifiant attribué par le poste (id_saisie) ;
+  - un lot = une transaction : entretiens, demandes et solutions en INSERT
+    multi-lignes, plus une ligne saisie_recue par saisie (migration 0004).
+    Une saisie déjà reçue (commit passé mais journal pas encore marqué,
+    journal rejoué par un autre processus) n'est pas insérée une seconde fois ;
+  - base injoignable, schéma incomplet (migration 0004 non appliquée),
+    droits insuffisants : le lot est retenté plus tard (attente doublée à
+    chaque échec, jusqu'à RETRY_MAX secondes), sans compter d'essai ;
+  - saisie refusée par la base (donnée invalide, contrainte violée) : le lot
+    est repris saisie par saisie ; la saisie refusée est retentée après une
+    attente croissante et, refusée MAX_ATTEMPTS fois, mise de côté (statut
+    'rejetee', voir --etat / --reprendre) sans bloquer les suivantes.
+
+Activée par SAISIE_DIFFEREE=1 (page ALIMENTATION) ; la date d'entretien
+est celle de la saisie, pas celle de la transmission.
+
+Usage :
+    python -m maisondudroit.saisie_differee --etat            # saisies en attente, transmises, rejetées
+    python -m maisondudroit.saisie_differee --transmettre     # vide le journal (application arrêtée)
+    python -m maisondudroit.saisie_differee --reprendre       # remet les saisies rejetées en attente
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+
+import psycopg2
+
+from .db import checkout
+from .saisie_entretien import ENTRETIEN_COLUMNS
+
+ENABLED = os.environ.get("SAISIE_DIFFEREE", "0") == "1"
+JOURNAL_PATH = os.environ.get("SAISIE_JOURNAL", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "journal", "saisies.sqlite"))
+BATCH_SIZE = int(os.environ.get("SAISIE_LOT", 200))
+FLUSH_INTERVAL = 1.0        # secondes entre deux transmissions sans nouvelle saisie
+RETRY_MAX = 60.0            # attente maximale entre deux essais quand la base est injoignable
+MAX_ATTEMPTS = 5
+RETENTION = 7 * 86400       # secondes de conservation des saisies transmises
+
+# Erreurs imputables à une saisie ; toutes les autres (connexion, table ou colonne
+# absente, droits...) concernent la base : le lot est retenté tel quel plus tard
+DATA_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+
+SQL_JOURNAL = """
+    CREATE TABLE IF NOT EXISTS saisie (
+        id_saisie    TEXT PRIMARY KEY,
+        saisie_le    REAL NOT NULL,
+        contenu      TEXT NOT NULL,
+        statut       TEXT NOT NULL DEFAULT 'en_attente',   -- en_attente | transmise | rejetee
+        tentatives   INTEGER NOT NULL DEFAULT 0,
+        erreur       TEXT,
+        essai_apres  REAL NOT NULL DEFAULT 0,              -- attente après un refus
+        num          INTEGER,
+        transmise_le REAL
+    );
+    CREATE INDEX IF NOT EXISTS saisie_statut_idx ON saisie (statut, saisie_le);
+"""
+
+
+# =================================================================
+#  TRANSMISSION D'UN LOT À POSTGRESQL
+# =================================================================
+
+def _values(rows):
+    """VALUES multi-lignes "(%s, ...), (...)" et paramètres aplatis."""
+    marks = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+    return ", ".join([marks] * len(rows)), [value for row in rows for value in row]
+
+
+def write_batch(conn, items):
+    """
+    Insère les saisies [(id_saisie, saisie_le, contenu), ...] en une transaction.
+    Retourne {id_saisie: num}, y compris pour les saisies déjà reçues.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id_saisie, num FROM saisie_recue WHERE id_saisie = ANY(%s)",
+                       ([id_saisie for id_saisie, _, _ in items],))
+        received = dict(cursor.fetchall())
+        new = [item for item in items if item[0] not in received]
+        if new:
+            # Numéros réservés d'avance : les lignes filles du lot les connaissent sans RETURNING
+            cursor.execute("SELECT nextval(pg_get_serial_sequence('entretien', 'num')) "
+                           "FROM generate_series(1, %s)", (len(new),))
+            nums = [row[0] for row in cursor.fetchall()]
+
+            entretiens, recues, enfants = [], [], {'demande': [], 'solution': []}
+            for num, (id_saisie, saisie_le, contenu) in zip(nums, new):
+                saisie_le = datetime.fromtimestamp(saisie_le, timezone.utc)
+                date_ent = contenu.get('date_ent') or saisie_le.astimezone().date().isoformat()
+                entretiens.append([num, date_ent] + [contenu['entretien'].get(c) for c in ENTRETIEN_COLUMNS])
+                for table in enfants:
+                    enfants[table] += [(num, i + 1, code) for i, code in enumerate(contenu[f"{table}s"])]
+                recues.append((id_saisie, num, saisie_le))
+                received[id_saisie] = num
+
+            cols = ", ".join(['num', 'date_ent'] + ENTRETIEN_COLUMNS)
+            for sql, rows in ((f"INSERT INTO entretien ({cols}) VALUES ", entretiens),
+                              ("INSERT INTO demande (num, pos, nature) VALUES ", enfants['demande']),
+                              ("INSERT INTO solution (num, pos, nature) VALUES ", enfants['solution']),
+                              ("INSERT INTO saisie_recue (id_saisie, num, saisie_le) VALUES ", recues)):
+                if rows:
+                    values, params = _values(rows)
+                    cursor.execute(sql + values, params)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return received
+
+
+# =================================================================
+#  JOURNAL LOCAL ET THREAD DE TRANSMISSION
+# =================================================================
+
+class WriteBehindJournal:
+    """Journal SQLite des saisies et transmission par lots en arrière-plan."""
+
+    def __init__(self, path=JOURNAL_PATH, batch_size=BATCH_SIZE, on_flush=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.on_flush = on_flush        # appelé avec le nombre de saisies transmises
+        self.last_error = None
+        self._local = threading.local()
+        self._lock = threading.Lock()   # une transmission à la fois dans le processus
+        self._thread_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._db() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SQL_JOURNAL)
+
+    def _db(self):
+        # Une connexion SQLite par thread (les objets sqlite3 ne se partagent pas)
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA synchronous=FULL")
+        return db
+
+    def append(self, data, demandes, solutions, date_ent=None, id_saisie=None):
+        """
+        Écrit la saisie dans le journal (durable au retour) et réveille la
+        transmission. Retourne (id_saisie, timings) ; un id_saisie déjà
+        journalisé n'est pas réécrit.
+        """
+        start = time.perf_counter()
+        id_saisie = id_saisie or uuid.uuid4().hex
+        contenu = json.dumps({'entretien': data, 'demandes': list(demandes), 'solutions': list(solutions),
+                              'date_ent': date_ent.isoformat() if isinstance(date_ent, date) else date_ent},
+                             default=str)
+        with self._db() as db:
+            db.execute("INSERT OR IGNORE INTO saisie (id_saisie, saisie_le, contenu) VALUES (?, ?, ?)",
+                       (id_saisie, time.time(), contenu))
+        self._wake.set()
+        return id_saisie, {'total': (time.perf_counter() - start) * 1000}
+
+    def pending(self, limit=None):
+        rows = self._db().execute(
+            "SELECT id_saisie, saisie_le, contenu FROM saisie WHERE statut = 'en_attente' AND essai_apres <= ? "
+            "ORDER BY saisie_le LIMIT ?", (time.time(), limit or -1)).fetchall()
+        return [(id_saisie, saisie_le, json.loads(contenu)) for id_saisie, saisie_le, contenu in rows]
+
+    def flush(self, conn=None):
+        """
+        Transmet un lot de saisies en attente. Retourne le nombre de saisies
+        transmises ; lève l'erreur si la base ne peut pas recevoir le lot
+        (injoignable, schéma incomplet...), sans toucher aux saisies.
+        """
+        with self._lock:
+            items = self.pending(self.batch_size)
+            if not items:
+                return 0
+            with checkout(conn) as conn:
+                try:
+                    sent = write_batch(conn, items)
+                except DATA_ERRORS:
+                    # Lot refusé : saisie par saisie, pour isoler celle qui bloque
+                    sent = {}
+                    for item in items:
+                        try:
+                            sent.update(write_batch(conn, [item]))
+                        except DATA_ERRORS as e:
+                            self._refused(item[0], e)
+            self._mark_sent(sent)
+        if sent and self.on_flush:
+            self.on_flush(len(sent))
+        return len(sent)
+
+    def flush_all(self, conn=None):
+        total = 0
+        while True:
+            sent = self.flush(conn)
+            total += sent
+            if sent < self.batch_size:
+                # Lot incomplet ou saisies refusées : plus rien à transmettre pour l'instant
+                return total
+
+    def _mark_sent(self, sent):
+        now = time.time()
+        with self._db() as db:
+            db.executemany("UPDATE saisie SET statut = 'transmise', num = ?, transmise_le = ?, erreur = NULL "
+                           "WHERE id_saisie = ?", [(num, now, id_saisie) for id_saisie, num in sent.items()])
+            db.execute("DELETE FROM saisie WHERE statut = 'transmise' AND transmise_le < ?", (now - RETENTION,))
+
+    def _refused(self, id_saisie, error):
+        with self._db() as db:
+            # Attente doublée à chaque refus : une base momentanément incohérente
+            # (métadonnées en cours de modification) ne rejette pas la saisie en quelques secondes
+            db.execute("UPDATE saisie SET tentatives = tentatives + 1, erreur = ?, "
+                       "essai_apres = ? + min(? * (1 << tentatives), ?), "
+                       "statut = CASE WHEN tentatives + 1 >= ? THEN 'rejetee' ELSE statut END "
+                       "WHERE id_saisie = ?",
+                       (str(error).strip(), time.time(), FLUSH_INTERVAL, RETRY_MAX, MAX_ATTEMPTS, id_saisie))
+
+    def retry_rejected(self):
+        """Remet les saisies rejetées en attente (après correction des métadonnées)."""
+        with self._db() as db:
+            count = db.execute("UPDATE saisie SET statut = 'en_attente', tentatives = 0, essai_apres = 0 "
+                               "WHERE statut = 'rejetee'").rowcount
+        self._wake.set()
+        return count
+
+    def status(self):
+        """{'en_attente', 'transmise', 'rejetee', 'plus_ancienne_s', 'erreur'} pour l'interface."""
+        db = self._db()
+        counts = dict(db.execute("SELECT statut, count(*) FROM saisie GROUP BY statut").fetchall())
+        oldest = db.execute("SELECT min(saisie_le) FROM saisie WHERE statut = 'en_attente'").fetchone()[0]
+        return {
+            **{statut: counts.get(statut, 0) for statut in ('en_attente', 'transmise', 'rejetee')},
+            'plus_ancienne_s': time.time() - oldest if oldest else None,
+            'erreur': str(self.last_error) if self.last_error else None,
+        }
+
+    # --- Thread de transmission ---
+
+    def start(self):
+        """Lance le thread de transmission (sans effet s'il tourne déjà)."""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="saisie-differee", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        delay = FLUSH_INTERVAL
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            try:
+                self.flush_all()
+                self.last_error, delay = None, FLUSH_INTERVAL
+            except Exception as e:
+                # Base injoignable ou incomplète : les saisies restent dans le journal, nouvel essai plus tard
+                self.last_error, delay = e, min(delay * 2, RETRY_MAX)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--journal", default=JOURNAL_PATH)
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--etat", action='store_true', help="compte les saisies par statut")
+    action.add_argument("--transmettre", action='store_true', help="transmet toutes les saisies en attente")
+    action.add_argument("--reprendre", action='store_true', help="remet les saisies rejetées en attente")
+    args = parser.parse_args(argv)
+
+    journal = WriteBehindJournal(args.journal)
+    if args.transmettre:
+        print(f"Saisies transmises : {journal.flush_all()}")
+    elif args.reprendre:
+        print(f"Saisies remises en attente : {journal.retry_rejected()}")
+    status = journal.status()
+    print(f"En attente : {status['en_attente']} | Transmises : {status['transmise']} | Rejetées : {status['rejetee']}")
+    for id_saisie, tentatives, erreur in journal._db().execute(
+            "SELECT id_saisie, tentatives, erreur FROM saisie WHERE erreur IS NOT NULL AND statut != 'transmise'"):
+        print(f"  {id_saisie} ({tentatives} essais) : {erreur}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
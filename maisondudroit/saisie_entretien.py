@@ -0,0 +1,163 @@
+import time
+from datetime import date
+
+from .db import checkout
+
+# =================================================================
+#  ENREGISTREMENT ATOMIQUE D'UN ENTRETIEN (ENTRETIEN + DEMANDES + SOLUTIONS)
+# =================================================================
+# Une seule instruction SQL (CTE "INSERT ... RETURNING num" chaînée aux
+# VALUES multi-lignes des demandes et solutions) et un seul COMMIT :
+# plus d'entretien orphelin si l'insertion d'une demande échoue.
+
+ENTRETIEN_COLUMNS = [
+    'mode', 'duree', 'sexe', 'age', 'vient_pr', 'sit_fam', 'enfant',
+    'modele_fam', 'profession', 'ress', 'origine', 'commune', 'partenaire',
+]
+
+MAX_CHOIX = 3
+
+
+def validate_submission(data, demandes, solutions, required_fields=()):
+    """Contrôles communs aux formulaires de saisie. Retourne la liste des erreurs."""
+    errors = []
+    missing = [lib for lib in required_fields if data.get(lib) in [None, ""]]
+    if missing:
+        errors.append(f"Veuillez remplir tous les champs obligatoires : {', '.join(missing)}")
+    if not demandes:
+        errors.append("Sélectionnez au moins une demande.")
+    if len(demandes) > MAX_CHOIX or len(solutions) > MAX_CHOIX:
+        errors.append(f"Sélection limitée à {MAX_CHOIX} demandes et {MAX_CHOIX} solutions.")
+    return errors
+
+
+def validate_values(data, structure, demande_opt, sol_opt, demandes=(), solutions=()):
+    """
+    Contrôles que les widgets du formulaire garantissent d'eux-mêmes (saisie
+    hors formulaire : API, lots) : codes de modalité et de nature connus,
+    nombres dans leur plage. structure : load_questionnaire_structure ;
+    demande_opt / sol_opt : load_natures. Retourne la liste des erreurs.
+    """
+    errors = []
+    unknown = sorted(set(data) - set(ENTRETIEN_COLUMNS))
+    if unknown:
+        errors.append(f"Champs inconnus : {', '.join(unknown)}")
+    variables = {var['lib'].lower(): var for variables in structure.values() for var in variables}
+    for col, value in data.items():
+        var = variables.get(col)
+        if var is None or value in [None, ""]:
+            continue
+        if var['type'] == 'MOD' and str(value) not in {str(code) for code in var['options'].values()}:
+            errors.append(f"{var['lib']} : code inconnu ({value})")
+        elif var['type'] == 'NUM':
+            low, high = var['options'].get('min'), var['options'].get('max')
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                errors.append(f"{var['lib']} : nombre attendu ({value})")
+                continue
+            if (low is not None and number < low) or (high is not None and number > high):
+                errors.append(f"{var['lib']} : hors plage [{low}, {high}]")
+    for label, codes, options in (("demande", demandes, demande_opt), ("solution", solutions, sol_opt)):
+        inconnues = [str(c) for c in codes if str(c) not in {str(code) for code in options.values()}]
+        if inconnues:
+            errors.append(f"Nature de {label} inconnue : {', '.join(inconnues)}")
+        if len(set(codes)) != len(codes):
+            errors.append(f"Nature de {label} en double.")
+    return errors
+
+
+def build_submission_sql(data, demandes, solutions, date_ent=None):
+    """Construit l'instruction unique et ses paramètres."""
+    cols = ", ".join(['date_ent'] + ENTRETIEN_COLUMNS)
+    marks = ", ".join(["%s"] * (len(ENTRETIEN_COLUMNS) + 1))
+    params = [date_ent or date.today()] + [data.get(c) for c in ENTRETIEN_COLUMNS]
+
+    ctes = [f"e AS (INSERT INTO entretien ({cols}) VALUES ({marks}) RETURNING num)"]
+    for table, codes in (('demande', demandes), ('solution', solutions)):
+        if not codes:
+            continue
+        rows = ", ".join(["(%s::smallint, %s)"] * len(codes))
+        ctes.append(
+            f"{table[0]} AS (INSERT INTO {table} (num, pos, nature) "
+            f"SELECT e.num, v.pos, v.nature FROM e, (VALUES {rows}) AS v(pos, nature))"
+        )
+        for i, code in enumerate(codes):
+            params += [i + 1, code]
+
+    query = "WITH " + ",\n     ".join(ctes) + "\nSELECT num FROM e"
+    return query, params
+
+
+def submit_entretien(data, demandes, solutions, conn=None, date_ent=None):
+    """
+    Enregistre l'entretien et ses demandes/solutions dans une transaction.
+    Retourne (num, timings) où timings donne la durée de chaque étape en ms.
+    Lève l'exception d'origine après rollback en cas d'échec.
+    """
+    timings = {}
+    start = time.perf_counter()
+    query, params = build_submission_sql(data, demandes, solutions, date_ent)
+    timings['preparation'] = (time.perf_counter() - start) * 1000
+
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            step = time.perf_counter()
+            cursor.execute(query, params)
+            new_num = cursor.fetchone()[0]
+            timings['execution'] = (time.perf_counter() - step) * 1000
+
+            step = time.perf_counter()
+            conn.commit()
+            timings['commit'] = (time.perf_counter() - step) * 1000
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    timings['total'] = (time.perf_counter() - start) * 1000
+    return new_num, timings
+
+
+# --- Insertions unitaires (ancien formulaire : une requête par table) ---
+
+def insert_full_entretien(data, conn=None, date_ent=None):
+    """Insère l'entretien seul et retourne son numéro (rollback et exception en cas d'échec)."""
+    cols = ", ".join(['date_ent'] + ENTRETIEN_COLUMNS)
+    marks = ", ".join(["%s"] * (len(ENTRETIEN_COLUMNS) + 1))
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"INSERT INTO entretien ({cols}) VALUES ({marks}) RETURNING num",
+                           [date_ent or date.today()] + [data.get(c) for c in ENTRETIEN_COLUMNS])
+            new_num = cursor.fetchone()[0]
+            conn.commit()
+            return new_num
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+def _insert_children(table, num, codes, conn=None):
+    if not codes:
+        return
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(f"INSERT INTO {table} (num, pos, nature) VALUES (%s,%s,%s)",
+                               [(num, i + 1, c) for i, c in enumerate(codes)])
+            conn.commit()
+        finally:
+            cursor.close()
+
+
+def insert_demandes(num, codes, conn=None):
+    _insert_children('demande', num, codes, conn)
+
+
+def insert_solutions(num, codes, conn=None):
+    _insert_children('solution', num, codes, conn)
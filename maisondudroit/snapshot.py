@@ -0,0 +1,331 @@
+"""
+Copie analytique locale (Parquet + DuckDB) des tables du reporting.
+
+Les agrégats de VISUALISATION et du créateur de graphiques tournent sur
+des fichiers Parquet lus par DuckDB, et non plus sur la base PostgreSQL
+alimentée par le formulaire : pas de concurrence avec la saisie, et des
+scans en colonnes.
+
+  - entretien, demande, solution : copie incrémentale (num > dernier copié),
+    un fichier Parquet par rafraîchissement, compactés au-delà de MAX_PARTS ;
+    recopie complète si le nombre de lignes ne correspond plus (suppression)
+  - tables de métadonnées et de synthèse : recopiées à chaque rafraîchissement
+
+Chaque rafraîchissement écrit une nouvelle génération (sous-dossier ; les
+fichiers inchangés y sont des liens physiques vers la précédente) puis la
+publie en remplaçant etat.json. Une requête lit la génération publiée à
+son début : une recopie ou un compactage ne touche jamais les fichiers
+qu'elle lit. Les générations remplacées sont supprimées quand aucune
+requête du processus ne les lit plus, après RETIRED_GRACE secondes (pour
+les lecteurs d'autres processus).
+
+Usage (tâche planifiée) :
+    python -m maisondudroit.snapshot [--dossier snapshot/] [--complet]
+"""
+import argparse
+import copy
+import glob
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+from .db import _pyarrow, checkout, stream_batches
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "snapshot"))
+SNAPSHOT_MAX_AGE = 300      # secondes avant un rafraîchissement automatique
+MAX_PARTS = 50
+RETIRED_GRACE = 120         # secondes de conservation d'une génération remplacée
+
+# Tables copiées par ajout (clé num croissante) et tables recopiées entièrement
+INCREMENTAL_TABLES = ('entretien', 'demande', 'solution')
+FULL_TABLES = ('rubrique', 'variable', 'modalite', 'plage', 'valeurs_c', 'stat_entretien')
+
+STATE_FILE = "etat.json"
+
+
+def _duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    return duckdb
+
+
+def _write_parquet(conn, query, params, path):
+    """Écrit le résultat en Parquet (fichier temporaire puis renommage). Retourne le nombre de lignes."""
+    import pyarrow.parquet as pq
+
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    writer, rows = None, 0
+    try:
+        for batch in stream_batches(conn, query, params):
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, batch.schema, compression='zstd')
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        return 0
+    os.replace(tmp, path)
+    return rows
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class Snapshot:
+    """Dossier Parquet + état (dernier num copié, lignes par table)."""
+
+    def __init__(self, directory=SNAPSHOT_DIR, max_age=SNAPSHOT_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._readers_lock = threading.Lock()
+        self._readers = {}      # génération -> requêtes en cours
+        self.state = self._load_state()
+        self.last_error = None
+
+    # --- État ---
+
+    def _load_state(self):
+        empty = {'tables': {}, 'refreshed_at': 0, 'version': 0, 'current': None, 'retired': []}
+        try:
+            with open(os.path.join(self.directory, STATE_FILE), encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return empty
+        # État antérieur aux générations : tout sera recopié
+        return state if 'current' in state else empty
+
+    def _save_state(self, state):
+        tmp = os.path.join(self.directory, f"{STATE_FILE}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, os.path.join(self.directory, STATE_FILE))
+
+    def folder(self, state=None):
+        """Dossier de la génération publiée (None avant la première copie)."""
+        current = (state or self.state)['current']
+        return os.path.join(self.directory, current) if current else None
+
+    @property
+    def version(self):
+        """Change à chaque rafraîchissement qui a copié des données."""
+        return self.state['version']
+
+    def available(self):
+        tables = self.state['tables']
+        return (_duckdb() is not None and tables.get('entretien', {}).get('rows', 0) > 0
+                and all(t in tables for t in INCREMENTAL_TABLES + ('variable', 'modalite')))
+
+    def is_stale(self):
+        return time.time() - self.state['refreshed_at'] > self.max_age
+
+    # --- Copie depuis PostgreSQL ---
+
+    def refresh(self, conn=None, full=False):
+        """Copie les nouvelles lignes (ou tout si full). Retourne {table: lignes copiées}."""
+        if _pyarrow() is None:
+            raise ImportError("pyarrow est requis pour la copie analytique (pip install pyarrow)")
+        with self._lock, checkout(conn) as conn:
+            os.makedirs(self.directory, exist_ok=True)
+            # Nouvelle génération construite à côté de celle que lisent les requêtes
+            state = copy.deepcopy(self.state)
+            previous = self.folder(state)
+            generation = f"gen-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            folder = os.path.join(self.directory, generation)
+            if previous and os.path.isdir(previous):
+                shutil.copytree(previous, folder, copy_function=_link_or_copy)
+            else:
+                os.makedirs(folder)
+                state['tables'] = {}
+            copied = {}
+            try:
+                cursor = conn.cursor()
+                try:
+                    # Une seule image cohérente de la base pour toutes les tables copiées
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+                    cursor.execute("SELECT to_regclass('stat_entretien') IS NOT NULL")
+                    has_stats = cursor.fetchone()[0]
+                finally:
+                    cursor.close()
+                for table in INCREMENTAL_TABLES:
+                    copied[table] = self._refresh_incremental(conn, state, folder, table, full)
+                for table in FULL_TABLES:
+                    if table == 'stat_entretien' and not has_stats:
+                        continue
+                    copied[table] = self._refresh_full(conn, state, folder, table)
+            except BaseException:
+                shutil.rmtree(folder, ignore_errors=True)
+                raise
+            finally:
+                conn.rollback()     # lecture seule
+            if any(copied.get(t) for t in INCREMENTAL_TABLES) or full:
+                state['version'] += 1
+            state['refreshed_at'] = time.time()
+            if state['current']:
+                state['retired'].append([state['current'], time.time()])
+            state['current'] = generation
+            # Publication : etat.json remplacé d'un bloc, puis self.state (une seule affectation)
+            self._save_state(state)
+            self.state = state
+            self._prune()
+        return copied
+
+    def _prune(self):
+        """Supprime les générations remplacées qui ne sont plus lues."""
+        state = copy.deepcopy(self.state)
+        kept = []
+        for generation, retired_at in state['retired']:
+            with self._readers_lock:
+                busy = self._readers.get(generation)
+            if busy or time.time() - retired_at < RETIRED_GRACE:
+                kept.append([generation, retired_at])
+            else:
+                shutil.rmtree(os.path.join(self.directory, generation), ignore_errors=True)
+        if len(kept) != len(state['retired']):
+            state['retired'] = kept
+            self._save_state(state)
+            self.state = state
+
+    def refresh_if_stale(self, conn=None):
+        if self.is_stale():
+            return self.refresh(conn)
+        return {}
+
+    def refresh_async(self, force=False):
+        """Rafraîchit en arrière-plan (si périmé ou forcé) sans bloquer l'affichage."""
+        if (force or self.is_stale()) and not self._lock.locked():
+            threading.Thread(target=self._refresh_quietly, daemon=True).start()
+
+    def _refresh_quietly(self):
+        try:
+            self.refresh()
+            self.last_error = None
+        except Exception as e:
+            # Le reporting retombe sur PostgreSQL ; l'erreur reste consultable
+            self.last_error = e
+
+    def _refresh_incremental(self, conn, state, generation, table, full):
+        info = state['tables'].get(table)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SELECT count(*) FROM {table}")
+            total = cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+        folder = os.path.join(generation, table)
+        if full or info is None or total < info['rows']:
+            # Première copie ou lignes supprimées : recopie complète
+            shutil.rmtree(folder, ignore_errors=True)
+            info = {'last_num': 0, 'rows': 0}
+        os.makedirs(folder, exist_ok=True)
+
+        path = os.path.join(folder, f"part-{info['last_num'] + 1:010d}.parquet")
+        rows = _write_parquet(conn, f"SELECT * FROM {table} WHERE num > %s ORDER BY num",
+                              (info['last_num'],), path)
+        if rows:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT max(num) FROM {table}")
+                info['last_num'] = cursor.fetchone()[0]
+            finally:
+                cursor.close()
+            info['rows'] += rows
+        state['tables'][table] = info
+
+        if info['rows'] != total and not full:
+            # NUM anciens importés après coup : l'ajout ne suffit pas
+            return self._refresh_incremental(conn, state, generation, table, full=True)
+        if len(glob.glob(os.path.join(folder, "*.parquet"))) > MAX_PARTS:
+            self._compact(folder)
+        return rows
+
+    def _refresh_full(self, conn, state, generation, table):
+        path = os.path.join(generation, f"{table}.parquet")
+        if os.path.exists(path):
+            os.remove(path)     # table vidée : pas de fichier (lien hérité de la génération précédente)
+        rows = _write_parquet(conn, f"SELECT * FROM {table}", None, path)
+        state['tables'][table] = {'rows': rows}
+        return rows
+
+    @staticmethod
+    def _compact(folder):
+        """Regroupe les fichiers d'une table en un seul."""
+        import pyarrow.parquet as pq
+
+        parts = sorted(glob.glob(os.path.join(folder, "*.parquet")))
+        merged = pq.ParquetDataset(parts).read()
+        target = os.path.join(folder, "part-0000000000.parquet")
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        pq.write_table(merged, tmp, compression='zstd')
+        os.replace(tmp, target)
+        for part in parts:
+            if part != target:
+                os.remove(part)
+
+    # --- Requêtes DuckDB ---
+
+    def connect(self, state=None):
+        """Connexion DuckDB en mémoire avec une vue par table de la génération publiée."""
+        duckdb = _duckdb()
+        if duckdb is None:
+            raise ImportError("duckdb est requis pour interroger la copie analytique (pip install duckdb)")
+        state = state or self.state
+        folder = self.folder(state)
+        con = duckdb.connect()
+        for table, info in state['tables'].items():
+            if not info['rows']:
+                continue    # pas de fichier Parquet pour une table vide
+            if table in INCREMENTAL_TABLES:
+                source = os.path.join(folder, table, "*.parquet")
+            else:
+                source = os.path.join(folder, f"{table}.parquet")
+            con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{source}')")
+        return con
+
+    def query(self, query, params=None):
+        """
+        Exécute une requête écrite pour PostgreSQL (paramètres %s) sur la copie
+        et renvoie un DataFrame.
+        """
+        state = self.state      # génération lue du début à la fin de la requête
+        with self._readers_lock:
+            self._readers[state['current']] = self._readers.get(state['current'], 0) + 1
+        try:
+            con = self.connect(state)
+            try:
+                return con.execute(query.replace("%s", "?"), list(params or [])).df()
+            finally:
+                con.close()
+        finally:
+            with self._readers_lock:
+                self._readers[state['current']] -= 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dossier", default=SNAPSHOT_DIR)
+    parser.add_argument("--complet", action='store_true', help="recopie complète de toutes les tables")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    copied = Snapshot(args.dossier).refresh(full=args.complet)
+    print(", ".join(f"{table} : {rows}" for table, rows in copied.items()))
+    print(f"Copie terminée en {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
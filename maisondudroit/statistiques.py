@@ -0,0 +1,236 @@
+"""
+Tables de synthèse du tableau de bord (VUE GLOBALE).
+
+Effectifs par jour, par mois et sur toute la période, pour chaque
+dimension suivie (sexe, age, mode, commune) et pour le total ('*').
+La table stat_entretien est tenue à jour par un trigger par instruction
+sur entretien (tables de transition) : une saisie, un import COPY ou une
+suppression met les compteurs à jour dans la même transaction.
+Le tableau de bord lit quelques centaines de lignes au lieu de l'historique.
+
+Contrepartie : chaque saisie met à jour les mêmes lignes (total '*' et
+modalités courantes du jour, du mois et de toute la période), verrouillées
+jusqu'au COMMIT. Les saisies simultanées passent donc l'une après l'autre
+à partir du trigger. Mesure (PostgreSQL 16 local, 1 cœur, 5 ms entre
+l'INSERT et le COMMIT pour figurer un aller-retour réseau) : 153 saisies/s
+pour 1 session, 146/s pour 8 sessions avec le trigger, 1036/s sans.
+Suffisant pour la saisie au guichet (quelques saisies par minute) ; les
+imports (COPY) et la saisie différée (lots) déclenchent le trigger une
+fois par instruction. Si la saisie concurrente devenait un besoin, il
+faudrait répartir les compteurs sur plusieurs lignes (colonne de
+partition sommée à la lecture).
+
+Installation : migration 0001 (python -m maisondudroit.migration).
+
+Usage :
+    python -m maisondudroit.statistiques --installer       # crée table + trigger et recalcule (hors migrations)
+    python -m maisondudroit.statistiques --reconstruire    # recalcule les compteurs (après TRUNCATE, restauration...)
+"""
+import argparse
+import sys
+
+from .db import checkout
+from .filtres import active_filters, filter_conditions
+
+# Colonnes d'entretien comptées (libellé de variable en minuscules)
+DIMENSIONS = ('sexe', 'age', 'mode', 'commune')
+TOTAL = '*'
+PERIODES = ('jour', 'mois', 'tout')
+TOUT = '-infinity'    # "debut" des compteurs toutes périodes confondues
+
+
+def _aggregate_sql(source):
+    """Effectifs (periode, debut, dimension, code, nb) des lignes de source."""
+    dims = ", ".join(f"('{d}', e.{d}::text)" for d in DIMENSIONS)
+    # ORDER BY : verrous pris dans le même ordre par les saisies concurrentes
+    return f"""
+        SELECT p.periode, p.debut, d.dimension, d.code, count(*) AS nb
+        FROM {source} e
+        CROSS JOIN LATERAL (VALUES ('jour', e.date_ent),
+                                   ('mois', date_trunc('month', e.date_ent)::date),
+                                   ('tout', '{TOUT}'::date)) AS p(periode, debut)
+        CROSS JOIN LATERAL (VALUES ('{TOTAL}', ''), {dims}) AS d(dimension, code)
+        WHERE p.debut IS NOT NULL AND d.code IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+    """
+
+
+SQL_INSTALL = f"""
+    CREATE TABLE IF NOT EXISTS stat_entretien (
+        periode   varchar(4)  NOT NULL,
+        debut     date        NOT NULL,
+        dimension varchar(30) NOT NULL,
+        code      varchar(50) NOT NULL,
+        nb        integer     NOT NULL DEFAULT 0,
+        PRIMARY KEY (periode, debut, dimension, code)
+    );
+
+    CREATE OR REPLACE FUNCTION stat_entretien_maj() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE stat_entretien s SET nb = s.nb - a.nb
+            FROM ({_aggregate_sql('anciens')}) a
+            WHERE s.periode = a.periode AND s.debut = a.debut
+              AND s.dimension = a.dimension AND s.code = a.code;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO stat_entretien (periode, debut, dimension, code, nb)
+            {_aggregate_sql('nouveaux')}
+            ON CONFLICT (periode, debut, dimension, code)
+            DO UPDATE SET nb = stat_entretien.nb + EXCLUDED.nb;
+        END IF;
+        RETURN NULL;
+    END $$;
+
+    DROP TRIGGER IF EXISTS stat_entretien_insert ON entretien;
+    DROP TRIGGER IF EXISTS stat_entretien_update ON entretien;
+    DROP TRIGGER IF EXISTS stat_entretien_delete ON entretien;
+    CREATE TRIGGER stat_entretien_insert AFTER INSERT ON entretien
+        REFERENCING NEW TABLE AS nouveaux
+        FOR EACH STATEMENT EXECUTE PROCEDURE stat_entretien_maj();
+    CREATE TRIGGER stat_entretien_update AFTER UPDATE ON entretien
+        REFERENCING OLD TABLE AS anciens NEW TABLE AS nouveaux
+        FOR EACH STATEMENT EXECUTE PROCEDURE stat_entretien_maj();
+    CREATE TRIGGER stat_entretien_delete AFTER DELETE ON entretien
+        REFERENCING OLD TABLE AS anciens
+        FOR EACH STATEMENT EXECUTE PROCEDURE stat_entretien_maj();
+"""
+
+SQL_REBUILD = f"""
+    LOCK TABLE entretien IN SHARE MODE;
+    DELETE FROM stat_entretien;
+    INSERT INTO stat_entretien (periode, debut, dimension, code, nb)
+    {_aggregate_sql('entretien')};
+"""
+
+# Effectifs d'une période, codes décodés par modalite (ordre pos_m)
+SQL_RESUME = """
+    SELECT s.debut, s.dimension, COALESCE(m.lib_m, s.code) AS label, s.nb
+    FROM {source} s
+    LEFT JOIN LATERAL (
+        SELECT pos FROM variable
+        WHERE tab = %s AND lower(lib) = s.dimension
+        ORDER BY pos DESC LIMIT 1
+    ) v ON TRUE
+    LEFT JOIN modalite m ON m.tab = %s AND m.pos = v.pos AND m.code = s.code
+    WHERE s.periode = %s AND s.nb > 0
+"""
+
+
+def install_summary_tables(conn=None):
+    """Crée la table et le trigger puis recalcule les compteurs."""
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SQL_INSTALL)
+            cursor.execute(SQL_REBUILD)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+def rebuild_summary_tables(conn=None):
+    with checkout(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SQL_REBUILD)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
+def summary_query(periode='tout', debut=None, fin=None, tab='ENTRETIEN', filters=None):
+    """
+    Requête et paramètres de load_summary (aussi exécutable sur la copie analytique).
+    Sans filtre autre que la période, les compteurs de stat_entretien suffisent ;
+    sinon les effectifs sont calculés sur les entretiens filtrés (voir filtres.py).
+    """
+    if periode not in PERIODES:
+        raise ValueError(f"Période inconnue : {periode}")
+    filters = active_filters(filters)
+    if filters.keys() <= {'date_min', 'date_max'}:
+        if filters and periode == 'tout':
+            # Période bornée : somme des compteurs journaliers
+            periode = 'jour'
+            debut = max(filter(None, (debut, filters.get('date_min'))), default=None)
+            fin = min(filter(None, (fin, filters.get('date_max'))), default=None)
+        query, params = SQL_RESUME.format(source="stat_entretien"), [tab, tab, periode]
+    else:
+        conditions = filter_conditions(filters)
+        where = " AND ".join(f"({cond})" for cond, _ in conditions)
+        source = f"({_aggregate_sql(f'(SELECT * FROM entretien e WHERE {where})')})"
+        query = SQL_RESUME.format(source=source)
+        params = [v for _, values in conditions for v in values] + [tab, tab, periode]
+    if debut is not None:
+        query += " AND s.debut >= %s"
+        params.append(debut)
+    if fin is not None:
+        query += " AND s.debut <= %s"
+        params.append(fin)
+    query += " ORDER BY s.debut, s.dimension, m.pos_m NULLS LAST, s.code"
+    return query, params
+
+
+def load_summary(conn, periode='tout', debut=None, fin=None, tab='ENTRETIEN', filters=None):
+    """
+    Effectifs (debut, dimension, label, nb) pour une granularité.
+    debut / fin bornent les jours ou mois lus (inclus).
+    """
+    query, params = summary_query(periode, debut, fin, tab, filters)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    import pandas as pd     # import différé (voir maisondudroit/__init__.py)
+    return pd.DataFrame.from_records(rows, columns=['debut', 'dimension', 'label', 'nb'])
+
+
+# --- Lecture des effectifs (même forme que reporting.category_counts) ---
+
+def summary_counts(summary, dimension):
+    """Effectifs (label, count) d'une dimension, sommés sur les périodes lues."""
+    import pandas as pd     # import différé (voir maisondudroit/__init__.py)
+    rows = summary[summary['dimension'] == dimension]
+    counts = rows.groupby('label', sort=False)['nb'].sum()
+    return pd.DataFrame({'label': counts.index, 'count': counts.to_numpy()})
+
+
+def summary_total(summary):
+    return int(summary.loc[summary['dimension'] == TOTAL, 'nb'].sum())
+
+
+def summary_top(summary, dimension, default="N/A"):
+    counts = summary_counts(summary, dimension)
+    if counts.empty:
+        return default
+    return counts.loc[counts['count'].idxmax(), 'label']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--installer", action='store_true', help="crée la table, le trigger et recalcule")
+    action.add_argument("--reconstruire", action='store_true', help="recalcule les compteurs")
+    args = parser.parse_args(argv)
+
+    if args.installer:
+        install_summary_tables()
+    else:
+        rebuild_summary_tables()
+    with checkout() as conn:
+        print(f"Entretiens comptés : {summary_total(load_summary(conn))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
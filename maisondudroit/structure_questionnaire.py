@@ -0,0 +1,99 @@
+from psycopg2.extras import RealDictCursor
+
+# =================================================================
+#  CHARGEMENT ENSEMBLISTE DE LA STRUCTURE DU QUESTIONNAIRE
+# =================================================================
+# Remplace l'ancien chargement "N+1" (une requête par variable) par
+# deux requêtes fixes, quel que soit le nombre de variables :
+#   1. variables + libellé de leur rubrique (LEFT JOIN)
+#   2. toutes les options (modalite / plage / valeurs_c) en UNION ALL
+
+SQL_VARIABLES = """
+    SELECT v.pos, v.lib, v.commentaire, v.type_v, v.rubrique, r.lib AS rubrique_lib
+    FROM variable v
+    LEFT JOIN rubrique r ON r.pos = v.rubrique
+    WHERE v.tab = %s AND v.type_v IN ('MOD','NUM','CHAINE')
+    ORDER BY v.rubrique, v.pos
+"""
+
+SQL_OPTIONS = """
+    SELECT 'MOD' AS type_v, pos, pos_m AS ordre, code, lib_m AS lib, NULL::smallint AS val_min, NULL::smallint AS val_max
+    FROM modalite WHERE tab = %s
+    UNION ALL
+    SELECT 'NUM', pos, 0, NULL, NULL, val_min, val_max
+    FROM plage WHERE tab = %s
+    UNION ALL
+    SELECT 'CHAINE', pos, pos_c, NULL, lib, NULL, NULL
+    FROM valeurs_c WHERE tab = %s
+    ORDER BY pos, ordre
+"""
+
+
+def load_questionnaire_structure(conn, tab='ENTRETIEN'):
+    """
+    Retourne {libellé rubrique: [variables]} avec la même forme que
+    l'ancien get_questionnaire_structure(), en 2 allers-retours SQL.
+    """
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        cursor.execute(SQL_VARIABLES, (tab,))
+        variables = cursor.fetchall()
+
+        cursor.execute(SQL_OPTIONS, (tab, tab, tab))
+        options = cursor.fetchall()
+    finally:
+        cursor.close()
+
+    return assemble_structure(variables, options)
+
+
+def assemble_structure(variables, options):
+    """Assemble en mémoire les lignes renvoyées par les deux requêtes."""
+    # Regroupement des options par (type, position de variable)
+    mods, plages, chaines = {}, {}, {}
+    for row in options:
+        pos = row['pos']
+        if row['type_v'] == 'MOD':
+            mods.setdefault(pos, {})[row['lib']] = row['code']
+        elif row['type_v'] == 'NUM':
+            # Comme l'ancien fetchone() : seule la première plage compte
+            plages.setdefault(pos, {'min': row['val_min'], 'max': row['val_max']})
+        elif row['type_v'] == 'CHAINE':
+            chaines.setdefault(pos, []).append(row['lib'])
+
+    structure = {}
+    for var in variables:
+        rubrique_lib = var['rubrique_lib'] or "Autres Champs"
+        if rubrique_lib not in structure:
+            structure[rubrique_lib] = []
+
+        var_data = {
+            'pos': var['pos'], 'lib': var['lib'], 'type': var['type_v'],
+            'comment': var['commentaire'], 'options': {}
+        }
+        if var['type_v'] == 'MOD':
+            var_data['options'] = mods.get(var['pos'], {})
+        elif var['type_v'] == 'NUM':
+            var_data['options'] = plages.get(var['pos'], {})
+        elif var['type_v'] == 'CHAINE':
+            var_data['options'] = chaines.get(var['pos'], [])
+
+        structure[rubrique_lib].append(var_data)
+    return structure
+
+
+# Natures proposées à la saisie des demandes et solutions (variable virtuelle pos = 3)
+SQL_NATURES = "SELECT code, lib_m FROM modalite WHERE tab = %s AND pos = 3 ORDER BY pos_m"
+
+
+def load_natures(conn):
+    """({libellé: code} des demandes, {libellé: code} des solutions)."""
+    cursor = conn.cursor()
+    try:
+        natures = []
+        for tab in ('DEMANDE', 'SOLUTION'):
+            cursor.execute(SQL_NATURES, (tab,))
+            natures.append({lib: code for code, lib in cursor.fetchall()})
+        return tuple(natures)
+    finally:
+        cursor.close()
@@ -0,0 +1,267 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+from psycopg2 import extensions
+
+# =================================================================
+#  TRAÇAGE DES REQUÊTES SQL
+# =================================================================
+# Les connexions du pool (db.get_pool) utilisent TracingConnection : chaque
+# requête est chronométrée et rattachée à son empreinte (texte normalisé),
+# au nombre de lignes et à la fonction appelante du projet. Les requêtes
+# au-delà de SLOW_QUERY_MS sont écrites dans le journal des requêtes
+# lentes avec leur plan (EXPLAIN ANALYZE, BUFFERS pour les lectures).
+# Désactivable par SQL_TRACE=0.
+#
+# Le plan est demandé sur la connexion de l'appelant, donc dans sa
+# transaction : seule une instruction unique d'un type que PostgreSQL sait
+# expliquer est rejouée (pas de DDL, LOCK, bloc DO ni script à plusieurs
+# instructions), entre SAVEPOINT et ROLLBACK TO SAVEPOINT pour qu'un échec
+# de l'EXPLAIN ne laisse pas la transaction en erreur. ANALYZE (qui
+# exécute la requête) est réservé aux lectures sans fonction volatile.
+
+TRACE_ENABLED = os.environ.get("SQL_TRACE", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 500))
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))     # racine du projet
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", os.path.join(ROOT, "logs", "requetes_lentes.jsonl"))
+EXPLAIN_INTERVAL = 300      # secondes entre deux plans capturés pour une même empreinte
+RECENT_MAX = 1000           # requêtes gardées pour la page d'administration
+
+_SKIPPED_FILES = {os.path.abspath(__file__), os.path.join(os.path.dirname(os.path.abspath(__file__)), "db.py")}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\((?:\s*(?:\?|%s)\s*,)+\s*(?:\?|%s)\s*\)")
+_SPACES = re.compile(r"\s+")
+_DOLLAR_QUOTE = re.compile(r"\$\w*\$")
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH|VALUES|TABLE)\b", re.IGNORECASE)
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|VALUES|TABLE|INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|CREATE|ALTER|DROP|TRUNCATE|LOCK)\b", re.IGNORECASE)
+# Appels qui modifient un état même dans une lecture : pas d'EXPLAIN ANALYZE
+_VOLATILE = re.compile(r"\b(nextval|setval|pg_advisory_\w+|pg_notify|set_config|pg_sleep|lo_\w+"
+                       r"|dblink\w*|pg_terminate_backend|pg_cancel_backend)\s*\(|\bFOR\s+(NO\s+KEY\s+|KEY\s+)?"
+                       r"(UPDATE|SHARE)\b", re.IGNORECASE)
+
+
+def fingerprint(query):
+    """Texte normalisé : littéraux remplacés par ?, listes repliées, espaces réduits."""
+    if isinstance(query, bytes):
+        query = query.decode(errors='replace')
+    text = _STRING.sub("?", str(query))
+    text = _NUMBER.sub("?", text)
+    text = _LIST.sub("(...)", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+def caller():
+    """Première fonction du projet dans la pile (hors db.py et ce module) : "module.fonction:ligne"."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(ROOT) and filename not in _SKIPPED_FILES:
+            module = os.path.splitext(os.path.relpath(filename, ROOT))[0].replace(os.sep, ".")
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryStats:
+    """Statistiques glissantes par empreinte + dernières requêtes (partagées par le processus)."""
+
+    def __init__(self, recent_max=RECENT_MAX):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent_max)
+        self.by_fingerprint = {}
+        self._explained = {}
+
+    def record(self, event):
+        with self._lock:
+            self.recent.append(event)
+            stats = self.by_fingerprint.setdefault(event['empreinte'], {
+                'appels': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'lignes': 0, 'appelants': set()})
+            stats['appels'] += 1
+            stats['total_ms'] += event['duree_ms']
+            stats['max_ms'] = max(stats['max_ms'], event['duree_ms'])
+            stats['lignes'] += max(event['lignes'], 0)
+            stats['appelants'].add(event['appelant'])
+
+    def should_explain(self, key, now=None):
+        """Au plus un plan par empreinte toutes les EXPLAIN_INTERVAL secondes."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if now - self._explained.get(key, -EXPLAIN_INTERVAL) < EXPLAIN_INTERVAL:
+                return False
+            self._explained[key] = now
+            return True
+
+    def summary(self):
+        """Une ligne par empreinte, triée par temps total décroissant."""
+        with self._lock:
+            rows = [{
+                'empreinte': key, 'appels': s['appels'], 'total_ms': round(s['total_ms'], 1),
+                'moyenne_ms': round(s['total_ms'] / s['appels'], 2), 'max_ms': round(s['max_ms'], 1),
+                'lignes': s['lignes'], 'appelants': ", ".join(sorted(s['appelants'])),
+            } for key, s in self.by_fingerprint.items()]
+        return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.recent.clear()
+            self.by_fingerprint.clear()
+            self._explained.clear()
+
+
+STATS = QueryStats()
+_log_lock = threading.Lock()
+
+
+def log_slow_query(event, path=None):
+    path = path or SLOW_QUERY_LOG
+    with _log_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+
+
+def read_slow_queries(limit=50, path=None):
+    """Dernières entrées du journal des requêtes lentes (plus récentes d'abord)."""
+    try:
+        with open(path or SLOW_QUERY_LOG, encoding="utf-8") as f:
+            lines = deque(f, maxlen=limit)
+    except OSError:
+        return []
+    return [json.loads(line) for line in reversed(lines)]
+
+
+def explain_options(query):
+    """Options d'EXPLAIN pour cette requête, None si elle ne doit pas être rejouée."""
+    if not _EXPLAINABLE.match(query):
+        return None
+    code = _STRING.sub("''", query).strip().rstrip(";")
+    if ";" in code or _DOLLAR_QUOTE.search(code):
+        return None         # plusieurs instructions : EXPLAIN rejouerait les suivantes
+    if _READ_ONLY.match(query) and not _WRITES.search(code) and not _VOLATILE.search(code):
+        return "ANALYZE, BUFFERS"
+    return "COSTS"
+
+
+def _explain(conn, query, params):
+    """Plan de la requête lente, calculé dans un point de sauvegarde de la transaction de l'appelant."""
+    options = explain_options(query)
+    if options is None or conn.get_transaction_status() == extensions.TRANSACTION_STATUS_INERROR:
+        return None
+    savepoint = not conn.autocommit
+    cursor = extensions.cursor(conn)    # curseur non tracé : pas de récursion
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT traces_sql_explain")
+        try:
+            cursor.execute(f"EXPLAIN ({options}) {query}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            return f"EXPLAIN impossible : {e}"
+        finally:
+            if savepoint:
+                # Annule aussi les effets d'un ANALYZE et l'erreur éventuelle de l'EXPLAIN
+                cursor.execute("ROLLBACK TO SAVEPOINT traces_sql_explain")
+                cursor.execute("RELEASE SAVEPOINT traces_sql_explain")
+    finally:
+        cursor.close()
+
+
+class TracingCursor(extensions.cursor):
+    """Curseur chronométré ; un curseur nommé est mesuré de l'exécution à la fermeture."""
+
+    _trace = None
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._traced(query, vars, start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._traced(query, None, start, explain=False)
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._traced(sql, None, start, explain=False)
+
+    def _traced(self, query, vars, start, explain=True):
+        elapsed = time.perf_counter() - start
+        if self.name:
+            # Curseur serveur : le travail se fait surtout aux FETCH, mesurés jusqu'à close()
+            self._trace = {'query': query, 'vars': vars, 'elapsed': elapsed, 'rows': 0, 'caller': caller()}
+            return
+        _record(self.connection, query, vars, elapsed, self.rowcount, caller(), explain)
+
+    def _fetched(self, start, rows):
+        if self._trace is not None:
+            self._trace['elapsed'] += time.perf_counter() - start
+            self._trace['rows'] += len(rows)
+        return rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, [] if row is None else [row])
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        return self._fetched(start, super().fetchmany(size) if size is not None else super().fetchmany())
+
+    def fetchall(self):
+        start = time.perf_counter()
+        return self._fetched(start, super().fetchall())
+
+    def close(self):
+        trace, self._trace = self._trace, None
+        super().close()
+        if trace is not None:
+            _record(self.connection, trace['query'], trace['vars'], trace['elapsed'], trace['rows'],
+                    trace['caller'], explain=False)
+
+
+def _record(conn, query, vars, elapsed, rows, appelant, explain=True):
+    key = fingerprint(query)
+    event = {'empreinte': key, 'duree_ms': elapsed * 1000, 'lignes': rows,
+             'appelant': appelant, 'le': time.time()}
+    STATS.record(event)
+    if event['duree_ms'] >= SLOW_QUERY_MS:
+        slow = dict(event)
+        if explain and not conn.closed and STATS.should_explain(key):
+            text = query.decode(errors='replace') if isinstance(query, bytes) else str(query)
+            plan = _explain(conn, text, vars)
+            if plan is not None:
+                slow['plan'] = plan
+        log_slow_query(slow)
+
+
+_mixed = {}
+
+
+class TracingConnection(extensions.connection):
+    """Connexion dont tous les curseurs sont tracés, y compris avec un cursor_factory (RealDictCursor...)."""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get('cursor_factory') or self.cursor_factory or extensions.cursor
+        if not issubclass(factory, TracingCursor):
+            if factory not in _mixed:
+                _mixed[factory] = type(f"Tracing{factory.__name__}", (TracingCursor, factory), {})
+            factory = _mixed[factory]
+        kwargs['cursor_factory'] = factory
+        return super().cursor(*args, **kwargs)
@@ -0,0 +1,37 @@
+import pandas as pd
+import streamlit as st
+
+# =================================================================
+# PAGE CACHÉE : ADMIN SQL (?admin=1)
+# =================================================================
+from maisondudroit.traces_sql import STATS as SQL_STATS, SLOW_QUERY_MS, read_slow_queries
+
+st.title("Requêtes SQL")
+st.caption(f"Statistiques du processus depuis son démarrage ou la dernière remise à zéro. "
+           f"Requêtes lentes : au-delà de {SLOW_QUERY_MS:.0f} ms.")
+
+if st.button("Remettre à zéro"):
+    SQL_STATS.reset()
+
+st.markdown("### Par empreinte (temps total décroissant)")
+stats = pd.DataFrame(SQL_STATS.summary())
+if stats.empty:
+    st.info("Aucune requête tracée (SQL_TRACE=0 ?).")
+else:
+    st.dataframe(stats, use_container_width=True)
+
+st.markdown("### Dernières requêtes")
+recent = pd.DataFrame(list(SQL_STATS.recent)[-200:][::-1])
+if not recent.empty:
+    recent['le'] = pd.to_datetime(recent['le'], unit='s')
+    st.dataframe(recent, use_container_width=True)
+
+st.markdown("### Journal des requêtes lentes")
+slow = read_slow_queries()
+if not slow:
+    st.info("Aucune requête lente enregistrée.")
+for entry in slow:
+    with st.expander(f"{entry['duree_ms']:.0f} ms | {entry['appelant']} | {entry['empreinte'][:80]}"):
+        st.code(entry['empreinte'], language="sql")
+        if entry.get('plan'):
+            st.code(entry['plan'])
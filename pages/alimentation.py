@@ -0,0 +1,98 @@
+import streamlit as st
+
+# =================================================================
+# PAGE 1 : ALIMENTATION
+# =================================================================
+# Page des opérateurs de saisie : ni pandas, ni plotly, ni reporting ne
+# sont chargés (voir benchmarks/bench_import.py).
+import profilage
+from interface import (COLOR_NAVY, get_demande_solution_modalites, get_questionnaire_structure, get_snapshot,
+                       get_write_behind)
+from maisondudroit.cache_metadonnees import invalidate
+from maisondudroit.saisie_entretien import submit_entretien, validate_submission
+
+profiler = profilage.current()
+
+st.title(" Saisie d'un nouvel entretien")
+
+structure = get_questionnaire_structure()
+demande_opt, sol_opt = get_demande_solution_modalites()
+# Saisie différée (SAISIE_DIFFEREE=1) : journal local, transmission en arrière-plan
+journal = get_write_behind()
+
+if structure:
+    data_entretien = {}
+    with st.form(key='main_form'), profiler.section("formulaire"):
+        for rubrique, variables in structure.items():
+            st.markdown(f"<div style='background-color: #E8EBF0; padding: 10px; border-radius: 5px; margin-bottom: 10px;'><h4 style='color: {COLOR_NAVY}; margin:0;'>{rubrique}</h4></div>", unsafe_allow_html=True)
+            cols = st.columns(2)
+            for i, var in enumerate(variables):
+                lib, comment, type_v = var['lib'], var['comment'], var['type']
+                with cols[i % 2]:
+                    label = f"**{lib}**"
+                    if type_v == 'MOD':
+                        opts = list(var['options'].keys())
+                        sel = st.selectbox(label, opts, index=None, placeholder=comment, key=f"f_{lib}")
+                        data_entretien[lib.lower()] = var['options'].get(sel) if sel else None
+                    elif type_v == 'NUM':
+                        val = st.number_input(label, min_value=var['options'].get('min',0), max_value=var['options'].get('max',99), key=f"f_{lib}")
+                        data_entretien[lib.lower()] = val
+                    elif type_v == 'CHAINE':
+                        val = st.text_input(label, key=f"f_{lib}", help=comment)
+                        data_entretien[lib.lower()] = val
+
+        st.markdown("---")
+        col_d, col_s = st.columns(2)
+        with col_d:
+            st.subheader("Nature de la demande")
+            sel_dem = st.multiselect("Sélection (max 3)", list(demande_opt.keys()), max_selections=3)
+        with col_s:
+            st.subheader("Réponse apportée")
+            sel_sol = st.multiselect("Sélection (max 3)", list(sol_opt.keys()), max_selections=3)
+
+        st.write("")
+        submit_col = st.columns([1,2,1])
+        with submit_col[1]:
+            submitted = st.form_submit_button("💾 ENREGISTRER L'ENTRETIEN", use_container_width=True)
+
+        if submitted:
+            codes_dem = [demande_opt[l] for l in sel_dem]
+            codes_sol = [sol_opt[l] for l in sel_sol]
+            errors = validate_submission(data_entretien, codes_dem, codes_sol)
+            if errors:
+                for err in errors: st.error(err)
+            elif journal is not None:
+                # Acquittée dès l'écriture dans le journal local ; PostgreSQL la reçoit par lot
+                try:
+                    id_saisie, timings = journal.append(data_entretien, codes_dem, codes_sol)
+                except Exception as e:
+                    st.error(f"Erreur du journal local : {e}")
+                else:
+                    st.success(f"Entretien enregistré (saisie {id_saisie[:8]}), transmission en cours.")
+                    st.caption(f"Enregistré localement en {timings['total']:.1f} ms")
+                    st.balloons()
+            else:
+                # Entretien + demandes + solutions : une transaction, un commit
+                try:
+                    new_id, timings = submit_entretien(data_entretien, codes_dem, codes_sol)
+                except Exception as e:
+                    st.error(f"Erreur insertion : {e}")
+                else:
+                    invalidate('entretien')
+                    get_snapshot().refresh_async(force=True)
+                    st.success(f"Entretien N°{new_id} enregistré !")
+                    st.caption(f"Enregistré en {timings['total']:.0f} ms (requête {timings['execution']:.0f} ms, commit {timings['commit']:.0f} ms)")
+                    st.balloons()
+else:
+    st.error("Impossible de charger les rubriques.")
+
+if journal is not None:
+    etat = journal.status()
+    if etat['en_attente'] or etat['rejetee']:
+        attente = f", la plus ancienne depuis {etat['plus_ancienne_s']:.0f} s" if etat['plus_ancienne_s'] else ""
+        st.caption(f"Saisies à transmettre : {etat['en_attente']}{attente}.")
+    if etat['rejetee']:
+        st.warning(f"{etat['rejetee']} saisie(s) refusée(s) par la base : "
+                   "python -m maisondudroit.saisie_differee --etat")
+    if etat['erreur']:
+        st.warning(f"Base injoignable, les saisies restent dans le journal local : {etat['erreur']}")
@@ -0,0 +1,225 @@
+import time
+import streamlit as st
+
+# =================================================================
+# PAGE 3 : CONFIGURATION (SÉQUENTIELLE & INTELLIGENTE)
+# =================================================================
+# Écritures dans maisondudroit/configuration.py ; chacune n'invalide que
+# les caches des tables modifiées, quelle que soit la page qui les lit.
+import profilage
+from maisondudroit import configuration
+
+profiler = profilage.current()
+
+
+def save_configuration(context, is_new_var, var_pos, var_lib, var_type, rub_id, comment, modalites):
+    try:
+        return configuration.save_configuration(context, is_new_var, var_pos, var_lib, var_type,
+                                                rub_id, comment, modalites)
+    except Exception as e:
+        st.error(f"Erreur Sauvegarde : {e}")
+        return False
+
+def upsert_rubrique(old_pos, new_pos, lib):
+    try:
+        return configuration.upsert_rubrique(old_pos, new_pos, lib)
+    except Exception as e:
+        st.error(f"Erreur SQL Rubrique : {e}")
+        return False
+
+
+st.title("Gestion de la Structure")
+st.info("Suivez les étapes ci-dessous pour modifier le formulaire.")
+
+# --- PRÉPARATION DES DONNÉES ---
+with profiler.section("rubriques"):
+    all_rubriques = configuration.load_rubriques() # [(1, 'Civil'), ...]
+
+dict_rubriques = {f"{r[1]}": r[0] for r in all_rubriques}
+
+# =========================================================
+# ÉTAPE 1 : LA RUBRIQUE
+# =========================================================
+st.markdown("### Choix de la Rubrique")
+
+col_r1, col_r2 = st.columns([1, 2])
+
+with col_r1:
+    options_rub = ["➕ Créer nouvelle..."] + list(dict_rubriques.keys())
+    choix_rubrique = st.selectbox("Sélectionner :", options_rub)
+
+# Variables de contexte pour l'étape 2
+selected_rub_id = None
+selected_rub_lib = ""
+is_special_context = False # Pour DEMANDE ou SOLUTION
+target_tab = 'ENTRETIEN'   # Par défaut
+
+with col_r2:
+    if choix_rubrique == "➕ Créer nouvelle...":
+        with st.form("new_rub_form"):
+            new_rub_lib = st.text_input("Nom de la nouvelle rubrique")
+            # Calc pos max
+            r_pos_def = (max(dict_rubriques.values()) + 1) if dict_rubriques else 1
+            new_rub_pos = st.number_input("Position", value=r_pos_def, step=1)
+            if st.form_submit_button("Créer"):
+                if upsert_rubrique(r_pos_def, new_rub_pos, new_rub_lib): # Fonction définie précédemment
+                    st.success("Rubrique créée !")
+                    st.rerun()
+    else:
+        # Mode édition rubrique existante
+        selected_rub_id = dict_rubriques[choix_rubrique]
+        selected_rub_lib = choix_rubrique
+
+        # --- DÉTECTION INTELLIGENTE DU CONTEXTE ---
+        # Si le nom contient "Demande" ou "Solution", on change le comportement
+        rub_lower = selected_rub_lib.lower()
+        if "demande" in rub_lower:
+            is_special_context = True
+            target_tab = 'DEMANDE'
+            st.info(f"💡 Mode détecté : Configuration des **Natures de Demande**.")
+        elif "solution" in rub_lower or "réponse" in rub_lower:
+            is_special_context = True
+            target_tab = 'SOLUTION'
+            st.info(f"💡 Mode détecté : Configuration des **Types de Réponses/Solutions**.")
+
+        # Formulaire léger pour renommer la rubrique si besoin
+        with st.expander(f"Modifier le nom de '{selected_rub_lib}'"):
+            with st.form("edit_rub"):
+                edit_lib = st.text_input("Renommer", value=selected_rub_lib)
+                edit_pos = st.number_input("Position", value=selected_rub_id)
+                if st.form_submit_button("Mettre à jour Rubrique"):
+                    upsert_rubrique(selected_rub_id, edit_pos, edit_lib)
+                    st.rerun()
+
+st.markdown("---")
+
+# =========================================================
+# ÉTAPE 2 : LA VARIABLE (Si Rubrique sélectionnée)
+# =========================================================
+if selected_rub_id:
+    st.markdown(f"### Configuration des Questions pour : *{selected_rub_lib}*")
+
+    # A. CAS SPÉCIAL : DEMANDE / SOLUTION
+    if is_special_context:
+        # On force une variable unique "Nature"
+        # Dans votre code précédent, ces données étaient stockées avec pos=3
+        FIXED_POS = 3 
+
+        # Chargement des modalités existantes
+        existing_mods = configuration.load_modalite_labels(target_tab, FIXED_POS)
+
+        st.warning("⚠️ Pour cette rubrique, vous configurez directement la liste des choix disponibles.")
+
+        # Interface simplifiée : Juste les modalités
+        nb_init = len(existing_mods) if existing_mods else 3
+        nb_choix = st.number_input("Nombre de choix possibles", min_value=1, value=nb_init, step=1)
+
+        with st.form("special_var_form"):
+            cols = st.columns(2)
+            final_mods = []
+            all_ok = True
+
+            for i in range(int(nb_choix)):
+                val_def = existing_mods[i] if i < len(existing_mods) else ""
+                with cols[i%2]:
+                    val = st.text_input(f"Option {i+1}", value=val_def, key=f"sp_mod_{i}")
+                    final_mods.append(val)
+                    if not val.strip(): all_ok = False
+
+            if st.form_submit_button(f"💾 ENREGISTRER LES {target_tab}S"):
+                if all_ok:
+                    # On appelle la sauvegarde avec context spécial
+                    save_configuration(
+                        context=target_tab,
+                        is_new_var=False, # Variable virtuelle
+                        var_pos=FIXED_POS,
+                        var_lib="Nature", # Nom fictif
+                        var_type="MOD",
+                        rub_id=selected_rub_id,
+                        comment="Liste système",
+                        modalites=final_mods
+                    )
+                    st.success("✅ Liste mise à jour avec succès !")
+                    time.sleep(1)
+                    st.rerun()
+                else:
+                    st.error("Remplissez tous les champs.")
+
+    # B. CAS STANDARD : ENTRETIEN
+    else:
+        # Récupération des variables de cette rubrique
+        vars_list = configuration.load_rubrique_variables(selected_rub_id)
+
+        dict_vars = {v['lib']: v for v in vars_list}
+        opt_vars = ["➕ Ajouter une question"] + list(dict_vars.keys())
+
+        choix_var = st.selectbox("Quelle question modifier ?", opt_vars)
+
+        # Prépare les données par défaut
+        if choix_var == "➕ Ajouter une question":
+            is_new = True
+            # Calcul ID variable (Max global + 1 pour éviter collisions)
+            v_pos = configuration.next_variable_pos()
+            v_lib = ""
+            v_type = "MOD"
+            v_com = ""
+            v_mods = []
+        else:
+            is_new = False
+            curr_var = dict_vars[choix_var]
+            v_pos = curr_var['pos']
+            v_lib = curr_var['lib']
+            v_type = curr_var['type_v']
+            v_com = curr_var['commentaire'] or ""
+
+            # Charger modalités si MOD
+            v_mods = []
+            if v_type == 'MOD':
+                v_mods = configuration.load_modalite_labels('ENTRETIEN', v_pos)
+
+        st.divider()
+
+        # Formulaire Standard
+        with st.container():
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                in_lib = st.text_input("Libellé de la question", value=v_lib)
+            with c2:
+                types = {"Liste déroulante": "MOD", "Texte": "CHAINE", "Chiffre": "NUM"}
+                idx = list(types.values()).index(v_type) if v_type in types.values() else 0
+                in_type_lbl = st.selectbox("Type", list(types.keys()), index=idx)
+                in_type = types[in_type_lbl]
+
+            # --- CORRECTION ICI (Height passé à 100px) ---
+            in_com = st.text_area("Aide / Commentaire", value=v_com, height=100)
+
+            final_mods_std = []
+            valid_mods = True
+
+            if in_type == "MOD":
+                st.write("**Configuration des choix :**")
+                nb_def = len(v_mods) if v_mods else 2
+                nb_ch = st.number_input("Nombre d'options", min_value=1, value=nb_def, step=1)
+
+                cc = st.columns(2)
+                for i in range(int(nb_ch)):
+                    txt_val = v_mods[i] if i < len(v_mods) else ""
+                    with cc[i%2]:
+                        vv = st.text_input(f"Choix {i+1}", value=txt_val, key=f"std_m_{i}")
+                        final_mods_std.append(vv)
+                        if not vv.strip(): valid_mods = False
+
+            st.write("")
+            if st.button("💾 SAUVEGARDER LA QUESTION", type="primary"):
+                if not in_lib:
+                    st.error("Le libellé est obligatoire.")
+                elif in_type == "MOD" and not valid_mods:
+                    st.error("Remplissez tous les choix.")
+                else:
+                    save_configuration('ENTRETIEN', is_new, v_pos, in_lib, in_type, selected_rub_id, in_com, final_mods_std)
+                    st.success("Enregistré !")
+                    time.sleep(1)
+                    st.rerun()
+
+else:
+    st.info("👈 Commencez par sélectionner ou créer une Rubrique ci-dessus.")
@@ -0,0 +1,244 @@
+import os
+import uuid
+import streamlit as st
+import plotly.express as px     # chargé seulement pour le tableau de bord
+
+# =================================================================
+# PAGE 2 : VISUALISATION (REFONDUE : GLOBAL vs CRÉATEUR)
+# =================================================================
+import profilage
+from interface import (COLOR_GOLD, COLOR_NAVY, analytical_snapshot, chart_version, get_chart_columns,
+                       get_chart_data, get_dashboard_summary, get_data_for_reporting,
+                       get_demande_solution_modalites, get_filter_modalites, show_figure, sync_entretien,
+                       to_excel)
+from maisondudroit.cache_figures import figure_key
+from maisondudroit.export import FORMATS as EXPORT_FORMATS, filtered_export
+from maisondudroit.filtres import active_filters
+from maisondudroit.graphiques import CHART_TYPES, COUNT as CHART_COUNT, MAX_POINTS, build_figure
+from maisondudroit.reporting import MEMORY_BUDGET_MB, memory_report
+from maisondudroit.statistiques import summary_counts, summary_top, summary_total
+
+profiler = profilage.current()
+
+st.title("Tableau de Bord Décisionnel")
+
+# Saisies arrivées par l'API ou un import : caches invalidés avant lecture
+sync_entretien()
+try:
+    all_summary = get_dashboard_summary()
+except Exception as e:
+    st.error(f"Tables de synthèse indisponibles ({e}). Lancez : python -m maisondudroit.migration")
+    st.stop()
+
+# FILTRES GLOBAUX : traduits en WHERE dans chaque requête (voir filtres.py)
+with st.sidebar, profiler.section("filtres"):
+    st.markdown("### Filtres")
+    periode = st.date_input("Période (date d'entretien)", value=[], format="DD/MM/YYYY")
+    raw_filters = {
+        'date_min': periode[0] if len(periode) > 0 else None,
+        'date_max': periode[1] if len(periode) > 1 else None,
+        'communes': st.multiselect("Communes", summary_counts(all_summary, "commune")["label"].tolist()),
+    }
+    for col, options in get_filter_modalites().items():
+        selected = st.multiselect(col.capitalize(), list(options))
+        raw_filters[col] = [options[label] for label in selected]
+    demande_opt, sol_opt = get_demande_solution_modalites()
+    raw_filters['demandes'] = [demande_opt[l] for l in st.multiselect("Nature de la demande", list(demande_opt))]
+    raw_filters['solutions'] = [sol_opt[l] for l in st.multiselect("Réponse apportée", list(sol_opt))]
+    filters = active_filters(raw_filters)
+
+# Effectifs pré-agrégés (quelques Ko) : le détail n'est lu que par le créateur
+summary = get_dashboard_summary(filters) if filters else all_summary
+dashboard_version = chart_version()
+
+if summary_total(summary) > 0:
+    # Palette stricte Charte Graphique
+    charter_colors = [COLOR_NAVY, COLOR_GOLD, '#5D738B', '#D4C5A3', '#829ab1']
+
+    # EXPORT FILTRÉ (colonnes choisies + filtres globaux appliqués dans la requête)
+    with st.expander("📦 Exporter les données", key="expander_export", on_change="rerun") as export_box:
+        if export_box.open:
+            export_plan, _ = get_chart_columns()
+            e1, e2 = st.columns(2)
+            export_cols = e1.multiselect("Colonnes (toutes si vide)", [col for col, _, _ in export_plan])
+            export_fmt = e2.radio("Format", ["parquet", "csv", "arrow", "xlsx"], horizontal=True)
+            if st.button("Préparer l'export"):
+                with st.spinner("Génération de l'export..."):
+                    # Fichiers propres à la session : les autres sessions ne les purgent pas
+                    session_name = "export_filtre_" + st.session_state.setdefault("export_id", uuid.uuid4().hex[:8])
+                    st.session_state["export_filtre"] = (export_fmt, filtered_export(
+                        export_fmt, columns=export_cols or None, name=session_name, **filters))
+            fmt_prepare, export_file = st.session_state.get("export_filtre", (None, None))
+            if export_file:
+                try:
+                    with open(export_file, "rb") as f:
+                        size = os.fstat(f.fileno()).st_size
+                        st.download_button(f"📥 Télécharger ({fmt_prepare}, {size / 2**20:.1f} Mo)",
+                                           data=f, file_name=f"entretiens.{EXPORT_FORMATS[fmt_prepare][0]}",
+                                           mime=EXPORT_FORMATS[fmt_prepare][1])
+                except FileNotFoundError:
+                    # Purgé (expiré) entre deux reruns : à préparer de nouveau
+                    del st.session_state["export_filtre"]
+                    st.info("L'export préparé a expiré : cliquez de nouveau sur « Préparer l'export ».")
+
+    # CRÉATION DES SOUS-ONGLETS : seul l'onglet affiché est calculé (changer d'onglet relance le script)
+    subtab_global, subtab_creator = st.tabs(["VUE GLOBALE", "CRÉATEUR DE GRAPHIQUES"],
+                                            key="onglet_visualisation", on_change="rerun")
+
+    # ---------------------------------------------------------
+    # SOUS-ONGLET 1 : TABLEAU DE BORD STANDARD
+    # ---------------------------------------------------------
+    if subtab_global.open:
+        with subtab_global:
+            st.markdown("### Indicateurs de Performance")
+
+            # --- KPIS (HTML CUSTOM) ---
+            k1, k2, k3, k4 = st.columns(4)
+
+            # Calculs (lus dans la table de synthèse stat_entretien)
+            total = summary_total(summary)
+            top_commune = summary_top(summary, "commune")
+            top_mode = summary_top(summary, "mode")
+
+            # CORRECTION ICI : On prend le MODE (le plus fréquent) au lieu de la moyenne
+            top_age = summary_top(summary, "age")
+
+            # Rendu HTML
+            with k1:
+                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Total Dossiers</div><div class="kpi-value">{total}</div><div class="kpi-sub">Entretiens réalisés</div></div>""", unsafe_allow_html=True)
+            with k2:
+                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Top Commune</div><div class="kpi-value" style="font-size:2.2rem;">{top_commune}</div><div class="kpi-sub">Provenance majeure</div></div>""", unsafe_allow_html=True)
+            with k3:
+                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Mode Dominant</div><div class="kpi-value" style="font-size:2.2rem;">{top_mode}</div><div class="kpi-sub">Type de contact</div></div>""", unsafe_allow_html=True)
+            with k4:
+                # On adapte la taille de la police (font-size) car "26-40 ans" prend plus de place qu'un chiffre
+                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Âge Dominant</div><div class="kpi-value" style="font-size:2.2rem;">{top_age}</div><div class="kpi-sub">Tranche majoritaire</div></div>""", unsafe_allow_html=True)
+
+            st.markdown("---")
+
+            # --- GRAPHIQUES STANDARDS ---
+            col_main1, col_main2 = st.columns([1, 1], gap="small")
+
+            with col_main1:
+                def build_sex():
+                    sexe_counts = summary_counts(summary, "sexe")
+                    fig = px.pie(sexe_counts, names="label", values="count", title="Répartition par Sexe",
+                                 hole=0.5, color_discrete_sequence=[COLOR_NAVY, COLOR_GOLD])
+                    fig.update_layout(height=320, margin=dict(t=40, b=0, l=0, r=0))
+                    fig.update_traces(textposition='inside', textinfo='percent+label')
+                    return fig
+                show_figure("sexe", figure_key(dashboard_version, "vue_globale", "sexe", filters=filters), build_sex)
+
+            with col_main2:
+                # Tranches d'âge ("26-40 ans") comptées dans stat_entretien
+                age_counts = summary_counts(summary, "age")
+                if not age_counts.empty:
+                    def build_age():
+                        # Effectifs pré-calculés : les tranches restent dans l'ordre des modalités (pos_m)
+                        fig = px.bar(age_counts, x="label", y="count", title="Distribution des Âges",
+                                     labels={"label": "age", "count": "count"},
+                                     color_discrete_sequence=[COLOR_GOLD])
+                        fig.update_layout(height=320, margin=dict(t=40, b=0, l=0, r=0), bargap=0.1)
+                        return fig
+                    show_figure("âge", figure_key(dashboard_version, "vue_globale", "age", filters=filters), build_age)
+                else:
+                    st.warning("Données d'âge non disponibles.")
+            # Volume par commune (Bar chart)
+            commune_counts = summary_counts(summary, "commune").sort_values("count", ascending=False)
+            if not commune_counts.empty:
+                commune_counts.columns = ['Commune', 'Nombre']
+                def build_commune():
+                    fig = px.bar(commune_counts, x="Nombre", y="Commune", orientation='h',
+                                 title="Fréquentation par Commune", text_auto=True,
+                                 color="Nombre", color_continuous_scale=[COLOR_GOLD, COLOR_NAVY])
+                    fig.update_layout(height=400, margin=dict(t=40, b=0, l=0, r=0))
+                    return fig
+                show_figure("commune", figure_key(dashboard_version, "vue_globale", "commune", filters=filters), build_commune)
+
+    # ---------------------------------------------------------
+    # SOUS-ONGLET 2 : CRÉATEUR DE GRAPHIQUES (SELF-SERVICE)
+    # ---------------------------------------------------------
+    if subtab_creator.open:
+        with subtab_creator:
+            st.markdown("### Espace d'Analyse Personnalisée")
+            st.info("Utilisez cet outil pour croiser les données et créer vos propres visualisations.")
+
+            # Colonnes disponibles (métadonnées seules, sans charger les entretiens)
+            chart_plan, numeric_cols = get_chart_columns()
+            all_cols = [col for col, _, _ in chart_plan]
+
+            # Zone de configuration (Style carte grise)
+            with st.container():
+                c1, c2, c3, c4 = st.columns(4)
+
+                # 1. Axe X (Catégorie)
+                var_x = c1.selectbox("1. Axe Horizontal (X)", options=all_cols, index=min(2, len(all_cols) - 1))
+
+                # 2. Axe Y (Valeur ou Compte)
+                # On ajoute une option "Compte (Lignes)" virtuelle
+                y_options = [CHART_COUNT] + numeric_cols
+                var_y = c2.selectbox("2. Axe Vertical (Y)", options=y_options)
+
+                # 3. Segmentation (Couleur)
+                color_options = [None] + all_cols
+                var_color = c3.selectbox("3. Grouper par (Couleur)", options=color_options, index=0)
+
+                # 4. Type de Graphique
+                chart_type = c4.selectbox("4. Type de Graphique", options=CHART_TYPES)
+
+            st.divider()
+
+            # --- GÉNÉRATION DYNAMIQUE ---
+            # L'agrégat est calculé par PostgreSQL : seules les données du graphique sont lues
+            try:
+                title_text = f"Analyse : {var_x}"
+                if var_y != CHART_COUNT: title_text += f" vs {var_y}"
+                if var_color: title_text += f" (par {var_color})"
+
+                if chart_type == "Camembert" and var_color:
+                    st.warning("⚠️ Le groupement couleur est ignoré pour le Camembert (utilise l'axe X).")
+                if chart_type == "Camembert" and var_y != CHART_COUNT:
+                    st.warning("⚠️ Le Camembert compte les dossiers par modalité de X : la variable Y est ignorée.")
+                if var_y == CHART_COUNT and chart_type == "Boîte à moustache":
+                    st.error("❌ Impossible de faire une boîte à moustache sans variable numérique en Y (ex: Âge, Durée).")
+                elif var_y == CHART_COUNT and chart_type == "Nuage de points":
+                    st.error("❌ Sélectionnez une variable numérique en Y pour le nuage de points.")
+                else:
+                    chart_data = get_chart_data(var_x, var_y, var_color, chart_type, filters)
+
+                    def build_custom():
+                        fig = build_figure(chart_data, var_x, var_y, var_color, chart_type,
+                                           title=title_text, colors=charter_colors)
+                        fig.update_layout(height=500, plot_bgcolor="white")
+                        return fig
+                    # Même sélection sur les mêmes données : figure relue depuis le cache
+                    key = figure_key(chart_version(analytical_snapshot()), chart_type, var_x, var_y, var_color, filters)
+                    show_figure("créateur", key, build_custom)
+                    if chart_type == "Nuage de points" and len(chart_data) >= MAX_POINTS:
+                        st.caption(f"Échantillon aléatoire de {MAX_POINTS} points distincts (taille = nombre de dossiers).")
+
+                    # Option d'export des données du graphique
+                    with st.expander("Voir les données de ce graphique", key="expander_donnees_graphique", on_change="rerun") as data_box:
+                        if data_box.open:     # classeur Excel écrit seulement à l'ouverture
+                            st.dataframe(chart_data.head(50))
+                            st.download_button("📥 Télécharger ces données (Excel)", data=to_excel(chart_data),
+                                               file_name="donnees_graphique.xlsx",
+                                               mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+            except Exception as e:
+                st.error(f"Impossible de générer ce graphique : {e}")
+
+            # Empreinte mémoire du détail (chargé seulement à la demande)
+            with st.expander("Mémoire du jeu de données"):
+                if st.checkbox("Charger le détail des entretiens"):
+                    with profiler.section("lecture et décodage du détail"):
+                        df = get_data_for_reporting()
+                    mem_report, mem_total, mem_ok = memory_report(df)
+                    st.caption(f"{len(df)} lignes, {mem_total:.1f} Mo / budget {MEMORY_BUDGET_MB} Mo")
+                    if not mem_ok: st.warning("⚠️ Budget mémoire dépassé.")
+                    st.dataframe(mem_report, use_container_width=True)
+
+elif filters:
+    st.info("Aucun entretien ne correspond aux filtres.")
+else:
+    st.info("Aucune donnée disponible pour le moment.")
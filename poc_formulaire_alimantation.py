@@ -1,204 +1,137 @@
 import streamlit as st
-import psycopg2
 from psycopg2.extras import RealDictCursor
 from datetime import date
 
+from maisondudroit.db import PG_USER, checkout, get_pool
+from maisondudroit.saisie_entretien import submit_entretien, validate_submission
+from maisondudroit.structure_questionnaire import load_questionnaire_structure
+
 # --- Configuration PostgreSQL ---
-PG_HOST = "localhost"
-PG_PORT = 5437
+# Hôte, port et identifiants : voir db.py (variables d'environnement PG_*)
 PG_DB = "DB_Maison_du_droit"
-PG_USER = "pgis"
-PG_PASSWORD = "pgis"
 
-# --- Connexion PostgreSQL ---
+# --- Pool de connexions (une connexion empruntée par requête) ---
 @st.cache_resource
-def init_connection():
+def init_pool():
     try:
-        conn = psycopg2.connect(
-            host=PG_HOST,
-            port=PG_PORT,
-            database=PG_DB,
-            user=PG_USER,
-            password=PG_PASSWORD
-        )
-        conn.autocommit = False
-        return conn
+        return get_pool(PG_DB)
     except Exception as e:
         st.error(f"❌ Impossible de se connecter à PostgreSQL : {e}")
         st.stop()
 
-connection = init_connection()
+pool = init_pool()
 
 # --- Récupération structure du questionnaire ---
 @st.cache_data
 def get_questionnaire_structure():
-    if not connection:
-        return {}
-    cursor = connection.cursor(cursor_factory=RealDictCursor)
-    structure = {}
     try:
-        # Rubriques
-        cursor.execute("SELECT pos, lib FROM rubrique ORDER BY pos")
-        rubriques = {row['pos']: row['lib'] for row in cursor.fetchall()}
-
-        # Variables
-        cursor.execute("""
-            SELECT pos, lib, commentaire, type_v, rubrique
-            FROM variable
-            WHERE tab = %s AND type_v IN ('MOD','NUM','CHAINE')
-            ORDER BY rubrique, pos
-        """, ('ENTRETIEN',))
-        variables = cursor.fetchall()
-
-        for var in variables:
-            rubrique_lib = rubriques.get(var['rubrique'], "Autres Champs")
-            if rubrique_lib not in structure:
-                structure[rubrique_lib] = []
-
-            var_data = {
-                'pos': var['pos'],
-                'lib': var['lib'],
-                'type': var['type_v'],
-                'comment': var['commentaire'],
-                'options': {}
-            }
-
-            # MOD : récupérer les options
-            if var['type_v'] == 'MOD':
-                cursor.execute("""
-                    SELECT code, lib_m
-                    FROM modalite
-                    WHERE tab = %s AND pos = %s
-                    ORDER BY pos_m
-                """, ('ENTRETIEN', var['pos']))
-                var_data['options'] = {row['lib_m']: row['code'] for row in cursor.fetchall()}
-
-            # NUM : récupérer les plages
-            elif var['type_v'] == 'NUM':
-                cursor.execute("""
-                    SELECT val_min, val_max
-                    FROM plage
-                    WHERE tab = %s AND pos = %s
-                """, ('ENTRETIEN', var['pos']))
-                plage = cursor.fetchone()
-                if plage:
-                    var_data['options'] = {'min': plage['val_min'], 'max': plage['val_max']}
-
-            # CHAINE : valeurs possibles
-            elif var['type_v'] == 'CHAINE':
-                cursor.execute("""
-                    SELECT lib
-                    FROM valeurs_c
-                    WHERE tab = %s AND pos = %s
-                    ORDER BY pos_c
-                """, ('ENTRETIEN', var['pos']))
-                var_data['options'] = [row['lib'] for row in cursor.fetchall()]
-
-            structure[rubrique_lib].append(var_data)
-
-        return structure
+        # Rubriques, variables et options en 2 requêtes ensemblistes
+        with checkout(database=PG_DB) as conn:
+            return load_questionnaire_structure(conn)
     except Exception as e:
         st.error(f"Erreur récupération structure : {e}")
         return {}
-    finally:
-        cursor.close()
 
 # --- Modalités Demande / Solution ---
 @st.cache_data
 def get_demande_solution_modalites():
-    cursor = connection.cursor(cursor_factory=RealDictCursor)
-    try:
-        # DEMANDE
-        cursor.execute("""
-            SELECT code, lib_m
-            FROM modalite
-            WHERE tab = %s AND pos = 3
-            ORDER BY pos_m
-        """, ('DEMANDE',))
-        demande_modalites = {row['lib_m']: row['code'] for row in cursor.fetchall()}
-
-        # SOLUTION
-        cursor.execute("""
-            SELECT code, lib_m
-            FROM modalite
-            WHERE tab = %s AND pos = 3
-            ORDER BY pos_m
-        """, ('SOLUTION',))
-        solution_modalites = {row['lib_m']: row['code'] for row in cursor.fetchall()}
-
-        return demande_modalites, solution_modalites
-    finally:
-        cursor.close()
+    with checkout(database=PG_DB) as conn:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            # DEMANDE
+            cursor.execute("""
+                SELECT code, lib_m
+                FROM modalite
+                WHERE tab = %s AND pos = 3
+                ORDER BY pos_m
+            """, ('DEMANDE',))
+            demande_modalites = {row['lib_m']: row['code'] for row in cursor.fetchall()}
+
+            # SOLUTION
+            cursor.execute("""
+                SELECT code, lib_m
+                FROM modalite
+                WHERE tab = %s AND pos = 3
+                ORDER BY pos_m
+            """, ('SOLUTION',))
+            solution_modalites = {row['lib_m']: row['code'] for row in cursor.fetchall()}
+
+            return demande_modalites, solution_modalites
+        finally:
+            cursor.close()
 
 # --- Insertion entretien ---
-def insert_full_entretien(data):
-    cursor = connection.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO entretien
-            (date_ent, mode, duree, sexe, age, vient_pr,
-             sit_fam, enfant, modele_fam, profession,
-             ress, origine, commune, partenaire)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            RETURNING num
-        """, (
-            date.today(),
-            data.get('mode'),
-            data.get('duree'),
-            data.get('sexe'),
-            data.get('age'),
-            data.get('vient_pr'),
-            data.get('sit_fam'),
-            data.get('enfant'),
-            data.get('modele_fam'),
-            data.get('profession'),
-            data.get('ress'),
-            data.get('origine'),
-            data.get('commune'),
-            data.get('partenaire')
-        ))
-        new_num = cursor.fetchone()[0]
-        connection.commit()
-        return new_num
-    except Exception as e:
-        connection.rollback()
-        st.error(f"Erreur insertion entretien : {e}")
-        return None
-    finally:
-        cursor.close()
+def insert_full_entretien(data, conn=None):
+    with checkout(conn, database=PG_DB) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                INSERT INTO entretien
+                (date_ent, mode, duree, sexe, age, vient_pr,
+                 sit_fam, enfant, modele_fam, profession,
+                 ress, origine, commune, partenaire)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                RETURNING num
+            """, (
+                date.today(),
+                data.get('mode'),
+                data.get('duree'),
+                data.get('sexe'),
+                data.get('age'),
+                data.get('vient_pr'),
+                data.get('sit_fam'),
+                data.get('enfant'),
+                data.get('modele_fam'),
+                data.get('profession'),
+                data.get('ress'),
+                data.get('origine'),
+                data.get('commune'),
+                data.get('partenaire')
+            ))
+            new_num = cursor.fetchone()[0]
+            conn.commit()
+            return new_num
+        except Exception as e:
+            conn.rollback()
+            st.error(f"Erreur insertion entretien : {e}")
+            return None
+        finally:
+            cursor.close()
 
 # --- Insertion Demande / Solution ---
-def insert_demandes(entretien_num, demandes_codes):
+def insert_demandes(entretien_num, demandes_codes, conn=None):
     if not demandes_codes: return
-    cursor = connection.cursor()
-    try:
-        cursor.executemany("""
-            INSERT INTO demande (num, pos, nature)
-            VALUES (%s,%s,%s)
-        """, [(entretien_num, i+1, c) for i,c in enumerate(demandes_codes)])
-        connection.commit()
-        st.success(f"✅ {len(demandes_codes)} Demande(s) insérée(s).")
-    except Exception as e:
-        connection.rollback()
-        st.error(f"Erreur insertion DEMANDE : {e}")
-    finally:
-        cursor.close()
-
-def insert_solutions(entretien_num, solutions_codes):
+    with checkout(conn, database=PG_DB) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany("""
+                INSERT INTO demande (num, pos, nature)
+                VALUES (%s,%s,%s)
+            """, [(entretien_num, i+1, c) for i,c in enumerate(demandes_codes)])
+            conn.commit()
+            st.success(f"✅ {len(demandes_codes)} Demande(s) insérée(s).")
+        except Exception as e:
+            conn.rollback()
+            st.error(f"Erreur insertion DEMANDE : {e}")
+        finally:
+            cursor.close()
+
+def insert_solutions(entretien_num, solutions_codes, conn=None):
     if not solutions_codes: return
-    cursor = connection.cursor()
-    try:
-        cursor.executemany("""
-            INSERT INTO solution (num, pos, nature)
-            VALUES (%s,%s,%s)
-        """, [(entretien_num, i+1, c) for i,c in enumerate(solutions_codes)])
-        connection.commit()
-        st.success(f"✅ {len(solutions_codes)} Solution(s) insérée(s).")
-    except Exception as e:
-        connection.rollback()
-        st.error(f"Erreur insertion SOLUTION : {e}")
-    finally:
-        cursor.close()
+    with checkout(conn, database=PG_DB) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany("""
+                INSERT INTO solution (num, pos, nature)
+                VALUES (%s,%s,%s)
+            """, [(entretien_num, i+1, c) for i,c in enumerate(solutions_codes)])
+            conn.commit()
+            st.success(f"✅ {len(solutions_codes)} Solution(s) insérée(s).")
+        except Exception as e:
+            conn.rollback()
+            st.error(f"Erreur insertion SOLUTION : {e}")
+        finally:
+            cursor.close()
 
 # --- Génération du formulaire ---
 def generate_form(structure, demande_options, solution_options):
@@ -255,7 +188,7 @@ def generate_form(structure, demande_options, solution_options):
     return {}, [], [], False
 
 # --- Logique principale ---
-if connection:
+if pool:
     structure_entretien = get_questionnaire_structure()
     demande_options, solution_options = get_demande_solution_modalites()
 
@@ -264,17 +197,20 @@ if connection:
 
         if submitted:
             required_fields = ['mode', 'duree', 'sexe', 'age', 'vient_pr', 'sit_fam', 'profession', 'ress', 'origine', 'commune']
-            missing_fields = [lib for lib in required_fields if data_entretien.get(lib) in [None, ""]]
-            if missing_fields:
-                st.error(f"Veuillez remplir tous les champs obligatoires : {', '.join(missing_fields)}")
-            elif not data_demandes:
-                st.error("Veuillez sélectionner au moins une Nature de Demande.")
+            errors = validate_submission(data_entretien, data_demandes, data_solutions, required_fields)
+            if errors:
+                for err in errors:
+                    st.error(err)
             else:
-                new_num = insert_full_entretien(data_entretien)
-                if new_num:
-                    insert_demandes(new_num, data_demandes)
-                    insert_solutions(new_num, data_solutions)
-                    st.success(f"Opération COMPLÈTE réussie pour l'entretien N°{new_num}.")
+                # Une seule transaction : pas d'entretien orphelin en cas d'échec
+                try:
+                    with checkout(database=PG_DB) as conn:
+                        new_num, timings = submit_entretien(data_entretien, data_demandes, data_solutions, conn=conn)
+                except Exception as e:
+                    st.error(f"Erreur insertion entretien : {e}")
+                else:
+                    st.success(f"Opération COMPLÈTE réussie pour l'entretien N°{new_num} "
+                               f"({len(data_demandes)} demande(s), {len(data_solutions)} solution(s), {timings['total']:.0f} ms).")
                     st.balloons()
     else:
         st.warning("Impossible de charger la structure du questionnaire.")
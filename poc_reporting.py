@@ -1,79 +1,64 @@
 import streamlit as st
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import pandas as pd
 import plotly.express as px
 import numpy as np
-from io import BytesIO
+import os
+
+from maisondudroit.db import checkout, get_pool, read_frame
+from maisondudroit.export import excel_export
 
 # --- Configuration de la page --- 
 st.set_page_config(page_title="Reporting Statistique - Maison du Droit", layout="wide")
 
-# --- Configuration PostgreSQL ---
-PG_HOST = "localhost"
-PG_PORT = 5437
-PG_DB = "db_maisondudroit"
-PG_USER = "pgis"
-PG_PASSWORD = "pgis"
-
-# --- Connexion PostgreSQL ---
+# --- Pool de connexions PostgreSQL (paramètres : voir db.py) ---
 @st.cache_resource
-def init_connection():
+def init_pool():
     try:
-        conn = psycopg2.connect(
-            host=PG_HOST,
-            port=PG_PORT,
-            database=PG_DB,
-            user=PG_USER,
-            password=PG_PASSWORD
-        )
-        return conn
+        return get_pool()
     except Exception as e:
         st.error(f"❌ Erreur connexion PostgreSQL : {e}")
         st.stop()
 
-connection = init_connection()
+pool = init_pool()
 
 # --- Récupération des données ---
+# Note : On récupère les libellés via des JOIN pour éviter le mapping manuel lourd
+QUERY_ENTRETIENS = """
+SELECT 
+    e.num as "Numéro",
+    e.date_ent as "Date",
+    e.sexe as "Sexe",
+    e.age as "Age",
+    e.sit_fam as "Situation familiale",
+    e.enfant as "Enfants à charge",
+    e.profession as "Profession",
+    e.duree as "Durée",
+    e.commune as "Commune",
+    e.mode as "Mode d'entretien",
+    e.vient_pr as "Vient pour"
+FROM entretien e
+ORDER BY e.num
+"""
+
 @st.cache_data
 def get_data_for_reporting():
-    if not connection:
+    if not pool:
         return pd.DataFrame()
     
-    # Utilisation de RealDictCursor pour récupérer les noms de colonnes facilement
-    cursor = connection.cursor(cursor_factory=RealDictCursor)
-    try:
-        # Note : On récupère les libellés via des JOIN pour éviter le mapping manuel lourd
-        query = """
-        SELECT 
-            e.num as "Numéro",
-            e.date_ent as "Date",
-            e.sexe as "Sexe",
-            e.age as "Age",
-            e.sit_fam as "Situation familiale",
-            e.enfant as "Enfants à charge",
-            e.profession as "Profession",
-            e.duree as "Durée",
-            e.commune as "Commune",
-            e.mode as "Mode d'entretien",
-            e.vient_pr as "Vient pour"
-        FROM entretien e
-        """
-        cursor.execute(query)
-        data = cursor.fetchall()
-        return pd.DataFrame(data)
-    except Exception as e:
-        st.error(f"Erreur SQL : {e}")
-        return pd.DataFrame()
-    finally:
-        cursor.close()
-
-# --- Fonction d'export Excel (Demande Client) ---
-def to_excel(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, index=False, sheet_name='Export_Entretiens')
-    return output.getvalue()
+    with checkout() as conn:
+        try:
+            # Lecture en flux (curseur serveur, lots convertis en colonnes) au lieu d'un dict par ligne
+            return read_frame(conn, QUERY_ENTRETIENS)
+        except Exception as e:
+            st.error(f"Erreur SQL : {e}")
+            return pd.DataFrame()
+
+# --- Export Excel (Demande Client) ---
+# Construit seulement au clic, en flux (curseur serveur + xlsxwriter constant_memory),
+# puis réutilisé tant que les données n'ont pas changé
+def build_excel_export():
+    return excel_export(QUERY_ENTRETIENS, name="export_entretiens",
+                        sheet_name="Export_Entretiens", na_rep="Non Renseigné")
 
 # --- Interface Principale ---
 def main():
@@ -86,19 +71,29 @@ def main():
         return
 
     # --- Nettoyage rapide ---
-    df = df.fillna("Non Renseigné")
+    # (seules les colonnes incomplètes passent en object pour accueillir le libellé)
+    df = df.astype({c: object for c in df.columns if df[c].hasnans}).fillna("Non Renseigné")
 
     # --- Barre latérale : Filtres et Export ---
     st.sidebar.header("Options")
     
-    # Bouton d'export Excel
-    excel_data = to_excel(df)
-    st.sidebar.download_button(
-        label="📥 Télécharger l'export Excel",
-        data=excel_data,
-        file_name=f"export_maison_du_droit_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # Bouton d'export Excel (fichier généré à la demande)
+    if st.sidebar.button("📄 Préparer l'export Excel"):
+        with st.spinner("Génération de l'export..."):
+            st.session_state["export_path"] = build_excel_export()
+    export_file = st.session_state.get("export_path")
+    if export_file:
+        try:
+            with open(export_file, "rb") as f:
+                st.sidebar.download_button(
+                    label="📥 Télécharger l'export Excel",
+                    data=f,
+                    file_name=f"export_maison_du_droit_{pd.Timestamp.now().strftime('%Y%m%d')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                )
+        except FileNotFoundError:
+            # Remplacé par une version plus récente des données : à préparer de nouveau
+            del st.session_state["export_path"]
 
     # --- Organisation en Onglets ---
     tab_dash, tab_custom = st.tabs(["📈 Tableau de Bord", "🔍 Explorateur de données"])
@@ -0,0 +1,223 @@
+import functools
+import json
+import os
+import subprocess
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# =================================================================
+#  PROFILAGE D'UNE RÉ-EXÉCUTION STREAMLIT
+# =================================================================
+# Streamlit ré-exécute tout poc_global.py à chaque interaction. Activé
+# depuis la sidebar (mode développeur), le profileur mesure chaque
+# section nommée (lecture, décodage, construction des figures, rendu des
+# widgets), compte les hits / misses des caches et relève les plus gros
+# allocateurs (tracemalloc) de la ré-exécution. Chaque mesure est ajoutée
+# à logs/profils.jsonl avec la version de l'application, pour comparer
+# les ré-exécutions lentes d'une version à l'autre.
+#
+# tracemalloc est global au processus : le pic et les allocateurs relevés
+# incluent les sessions servies en même temps. Le suivi reste actif tant
+# qu'une ré-exécution profilée est en cours (compteur partagé) et s'arrête
+# avec la dernière, même interrompue (st.rerun, exception).
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HISTORY_PATH = os.environ.get("PROFILAGE_LOG", os.path.join(ROOT, "logs", "profils.jsonl"))
+TOP_ALLOCATIONS = 15
+TRACEMALLOC_FRAMES = 5
+
+_local = threading.local()      # une ré-exécution par thread de script Streamlit
+_history_lock = threading.Lock()
+_tracing_lock = threading.Lock()
+_tracing_users = 0              # ré-exécutions profilées en cours qui ont démarré tracemalloc
+
+
+@functools.lru_cache(maxsize=1)
+def release():
+    """Version de l'application : APP_RELEASE, sinon commit git courant."""
+    if os.environ.get("APP_RELEASE"):
+        return os.environ["APP_RELEASE"]
+    try:
+        return subprocess.run(["git", "describe", "--tags", "--always", "--dirty"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or "dev"
+    except (OSError, subprocess.SubprocessError):
+        return "dev"
+
+
+class RerunProfiler:
+    """Mesures d'une ré-exécution : sections, caches et mémoire. Inactif : aucun coût."""
+
+    def __init__(self, enabled=False, page=None, trace_memory=True):
+        self.enabled = enabled
+        self.page = page
+        self.sections = []      # (nom, profondeur, début ms, durée ms)
+        self.caches = {}        # nom -> {'hits', 'misses', 'ms'}
+        self.report = None
+        self._missed = False
+        self._depth = 0
+        self._started_tracing = False
+        self._start = self._last = time.perf_counter()
+        if enabled and trace_memory:
+            self._start_tracing()
+        if enabled and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+
+    def _start_tracing(self):
+        global _tracing_users
+        with _tracing_lock:
+            if _tracing_users == 0 and tracemalloc.is_tracing():
+                return          # suivi démarré par ailleurs (python -X tracemalloc) : on n'y touche pas
+            if _tracing_users == 0:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            _tracing_users += 1
+            self._started_tracing = True
+
+    def stop_tracing(self):
+        """Libère le suivi mémoire de cette ré-exécution (arrêté avec la dernière). Idempotent."""
+        global _tracing_users
+        with _tracing_lock:
+            if not self._started_tracing:
+                return
+            self._started_tracing = False
+            _tracing_users -= 1
+            if _tracing_users == 0:
+                tracemalloc.stop()
+
+    @contextmanager
+    def section(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.sections.append((name, self._depth, (start - self._start) * 1000,
+                                  (time.perf_counter() - start) * 1000))
+
+    def checkpoint(self, name):
+        """Section de premier niveau : temps écoulé depuis le point précédent (ou le début)."""
+        if self.enabled:
+            now = time.perf_counter()
+            self.sections.append((name, 0, (self._last - self._start) * 1000, (now - self._last) * 1000))
+            self._last = now
+
+    def cache(self, name, hit, ms=0.0):
+        if self.enabled:
+            stats = self.caches.setdefault(name, {'hits': 0, 'misses': 0, 'ms': 0.0})
+            stats['hits' if hit else 'misses'] += 1
+            stats['ms'] += ms
+
+    def finish(self, history_path=None):
+        """Clôt la mesure, l'ajoute à l'historique et retourne le rapport."""
+        if not self.enabled or self.report is not None:
+            return self.report
+        self.report = {
+            'le': time.time(), 'version': release(), 'page': self.page,
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 1),
+            'sections': [{'section': name, 'niveau': depth, 'debut_ms': round(begin, 1), 'duree_ms': round(ms, 1)}
+                         for name, depth, begin, ms in sorted(self.sections, key=lambda s: s[2])],
+            'caches': [{'cache': name, **stats, 'ms': round(stats['ms'], 1)} for name, stats in self.caches.items()],
+        }
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            self.report['pic_mo'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            self.report['allocations'] = [
+                {'ligne': f"{_short(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                 'ko': round(stat.size / 1024, 1), 'blocs': stat.count}
+                for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+            ]
+        self.stop_tracing()
+        append_history(self.report, history_path)
+        return self.report
+
+
+def _short(filename):
+    # Fichiers du projet relatifs à la racine, bibliothèques à partir de site-packages
+    if filename.startswith(ROOT):
+        return os.path.relpath(filename, ROOT)
+    return filename.split("site-packages" + os.sep)[-1]
+
+
+def start(enabled, page=None):
+    """Ouvre la mesure de la ré-exécution courante (à appeler en tête de script)."""
+    _local.profiler = RerunProfiler(enabled, page)
+    return _local.profiler
+
+
+_INACTIVE = RerunProfiler()
+
+
+def current():
+    """Profileur de la ré-exécution courante (inactif s'il n'a pas été démarré)."""
+    return getattr(_local, 'profiler', None) or _INACTIVE
+
+
+def cached(name, cache):
+    """
+    Remplace @cache (st.cache_data, st.cache_resource) : même cache, appel
+    mesuré et compté en hit ou miss (le corps ne s'exécute qu'en cas de miss).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            current()._missed = True
+            return fn(*args, **kwargs)
+        cached_fn = cache(body)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            profiler = current()
+            if not profiler.enabled:
+                return cached_fn(*args, **kwargs)
+            # Appels imbriqués (un cache qui en lit un autre) : le drapeau de l'appelant est restauré
+            outer, profiler._missed = profiler._missed, False
+            start = time.perf_counter()
+            try:
+                with profiler.section(f"cache {name}"):
+                    return cached_fn(*args, **kwargs)
+            finally:
+                profiler.cache(name, hit=not profiler._missed, ms=(time.perf_counter() - start) * 1000)
+                profiler._missed = outer
+        call.clear = cached_fn.clear        # invalidation (cache_metadonnees.invalidate)
+        return call
+    return decorator
+
+
+def append_history(report, path=None):
+    path = path or HISTORY_PATH
+    with _history_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+
+
+def read_history(limit=2000, path=None):
+    try:
+        with open(path or HISTORY_PATH, encoding="utf-8") as f:
+            return [json.loads(line) for line in deque(f, maxlen=limit)]
+    except OSError:
+        return []
+
+
+def compare_releases(history):
+    """Durée des ré-exécutions par version et par page : nombre, médiane, p95, max (ms)."""
+    import pandas as pd
+
+    df = pd.DataFrame([{'version': r['version'], 'page': r['page'], 'total_ms': r['total_ms'],
+                        'le': r['le']} for r in history])
+    if df.empty:
+        return df
+    grouped = df.groupby(['version', 'page'], sort=False)
+    out = grouped['total_ms'].agg(mesures='count', mediane_ms='median',
+                                  p95_ms=lambda s: s.quantile(0.95), max_ms='max')
+    out['depuis'] = pd.to_datetime(grouped['le'].min(), unit='s')
+    return out.reset_index().sort_values(['page', 'depuis'])
@@ -3,3 +3,19 @@ import os
 
 # Ajoute le dossier racine du projet au PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+
+@pytest.fixture
+def pg_params():
+    """Paramètres d'un PostgreSQL local joignable ; sinon le test est ignoré."""
+    import psycopg2
+    from maisondudroit.db import connection_params
+
+    params = connection_params()
+    try:
+        psycopg2.connect(connect_timeout=2, **params).close()
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL local indisponible : {e}")
+    return params
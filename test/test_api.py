@@ -0,0 +1,142 @@
+import asyncio
+import json
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("starlette")
+from maisondudroit import api
+
+PgType = namedtuple('PgType', 'name')
+
+STRUCTURE = {"Usager": [
+    {'pos': 1, 'lib': 'Sexe', 'type': 'MOD', 'comment': '', 'options': {'Homme': '1', 'Femme': '2'}},
+    {'pos': 2, 'lib': 'Duree', 'type': 'NUM', 'comment': '', 'options': {'min': 0, 'max': 10}},
+]}
+NATURES = ({'Famille': '1a', 'Travail': '2a'}, {'Information': '1'})
+
+
+class FakeStatement:
+    def __init__(self, query):
+        self.query = query
+
+    def get_parameters(self):
+        # date_ent, 13 colonnes d'entretien (sexe et duree en smallint), puis (pos, nature) des enfants
+        types = [PgType('date')] + [PgType('int2') if i in (1, 2) else PgType('varchar') for i in range(13)]
+        return types + [PgType('int2'), PgType('varchar')] * (self.query.count("::smallint"))
+
+
+class FakeConn:
+    def __init__(self):
+        self.executed = []
+        self.prepared = []
+
+    async def prepare(self, query):
+        self.prepared.append(query)
+        return FakeStatement(query)
+
+    async def fetchval(self, query, *params):
+        self.executed.append((query, params))
+        return 42
+
+
+class _Ctx:
+    def __init__(self, value):
+        self.value = value
+
+    async def __aenter__(self):
+        return self.value
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConn()
+
+    def acquire(self):
+        return _Ctx(self.conn)
+
+
+def _call(method, path, body=None):
+    """Appel ASGI direct (sans serveur ni client HTTP) : (statut, corps JSON)."""
+    messages = []
+    payload = json.dumps(body).encode() if body is not None else b""
+
+    async def receive():
+        return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    path, _, query = path.partition("?")
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+             'headers': [(b'content-type', b'application/json')], 'app': api.app}
+    asyncio.run(api.app(scope, receive, send))
+    status = next(m['status'] for m in messages if m['type'] == 'http.response.start')
+    return status, json.loads(b"".join(m.get('body', b"") for m in messages if m['type'] == 'http.response.body'))
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    api.app.state.pool = pool
+    monkeypatch.setattr(api, "_parameter_types", {})
+    async def questionnaire(_pool, tab='ENTRETIEN'):
+        return (STRUCTURE, *NATURES)
+    monkeypatch.setattr(api, "load_questionnaire", questionnaire)
+    return pool
+
+
+def test_to_asyncpg_numbers_placeholders():
+    assert api.to_asyncpg("a = %s AND b LIKE 'x%%' AND c = ANY(%s)") == "a = $1 AND b LIKE 'x%' AND c = ANY($2)"
+
+
+def test_coerce_params_follows_parameter_types():
+    types = [PgType('int2'), PgType('varchar'), PgType('date'), PgType('int4')]
+    assert api.coerce_params(["3", 1, "2024-05-02", ""], types) == [3, "1", api.date(2024, 5, 2), None]
+    with pytest.raises(ValueError):
+        api.coerce_params(["abc"], [PgType('int2')])
+
+
+def test_post_entretien_uses_form_statement(pool):
+    status, body = _call("POST", "/entretiens", {
+        'entretien': {'sexe': '2', 'duree': 5}, 'demandes': ['1a', '2a'], 'solutions': ['1'],
+        'date_ent': '2024-05-02'})
+
+    assert status == 201 and body['num'] == 42
+    query, params = pool.conn.executed[0]
+    assert query.startswith("WITH e AS (INSERT INTO entretien") and "%s" not in query
+    assert params[:3] == (api.date(2024, 5, 2), None, 5)     # mode absent, duree convertie en entier
+    assert params[-6:] == (1, '1a', 2, '2a', 1, '1')
+
+
+def test_post_entretien_describes_each_shape_once(pool):
+    body = {'entretien': {'sexe': '1'}, 'demandes': ['1a'], 'solutions': []}
+    for _ in range(3):
+        assert _call("POST", "/entretiens", body)[0] == 201
+    _call("POST", "/entretiens", {**body, 'demandes': ['1a', '2a']})
+
+    assert len(pool.conn.executed) == 4
+    assert len(pool.conn.prepared) == 2      # une description par forme, pas par saisie
+
+
+def test_post_entretien_rejects_what_the_form_would_not_allow(pool):
+    status, body = _call("POST", "/entretiens", {
+        'entretien': {'sexe': '9', 'duree': 50, 'inconnu': 1}, 'demandes': ['zz'], 'solutions': []})
+
+    assert status == 422 and pool.conn.executed == []
+    assert body['erreurs'] == [
+        "Champs inconnus : inconnu",
+        "Sexe : code inconnu (9)",
+        "Duree : hors plage [0, 10]",
+        "Nature de demande inconnue : zz",
+    ]
+    assert _call("POST", "/entretiens", {'entretien': {}, 'demandes': [], 'solutions': []})[1]['erreurs'] == [
+        "Sélectionnez au moins une demande."]
+
+
+def test_statistiques_rejects_unknown_period(pool):
+    status, body = _call("GET", "/statistiques?periode=semaine")
+    assert status == 422 and "Période inconnue" in body['erreurs'][0]
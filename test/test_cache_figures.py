@@ -0,0 +1,52 @@
+import plotly.graph_objects as go
+
+from maisondudroit.cache_figures import FigureCache, figure_key
+
+
+def bar(n):
+    return go.Figure(go.Bar(x=list(range(n)), y=list(range(n))), layout=dict(title="Test"))
+
+
+def test_build_called_once_per_key():
+    cache, calls = FigureCache(), []
+
+    def build():
+        calls.append(1)
+        return bar(3)
+
+    key = figure_key((1,), "Barres", "age", "Compte", None)
+    first = cache.get_or_build(key, build)
+    second = cache.get_or_build(key, build)
+
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (1, 1)
+    assert list(second.data[0].x) == list(first.data[0].x)
+    assert second.layout.title.text == "Test"
+
+
+def test_key_changes_with_version_and_filters():
+    base = figure_key((1,), "Barres", "age", filters={'commune': ['Vannes']})
+
+    assert base == figure_key((1,), "Barres", "age", filters={'commune': ['Vannes']})
+    assert base != figure_key((2,), "Barres", "age", filters={'commune': ['Vannes']})
+    assert base != figure_key((1,), "Barres", "age")
+
+
+def test_lru_eviction_respects_size_cap():
+    cache = FigureCache(max_bytes=10**9)
+    cache.put("a", bar(200))
+    one = cache.size
+    cache.max_bytes = int(one * 2.5)
+    cache.put("b", bar(200))
+    cache.get("a")                  # "a" devient la plus récente
+    cache.put("c", bar(200))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size <= cache.max_bytes
+
+
+def test_oversized_figure_not_stored():
+    cache = FigureCache(max_bytes=100)
+    cache.put("a", bar(1000))
+
+    assert len(cache) == 0 and cache.size == 0
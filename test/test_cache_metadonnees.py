@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from maisondudroit import cache_metadonnees
+from maisondudroit.cache_metadonnees import depends_on, invalidate, version
+
+
+@pytest.fixture(autouse=True)
+def registre(monkeypatch):
+    # Registres globaux propres à chaque test, restaurés ensuite
+    monkeypatch.setattr(cache_metadonnees, "_dependants", {})
+    monkeypatch.setattr(cache_metadonnees, "_versions", {})
+    monkeypatch.setattr(cache_metadonnees, "_stamps", {})
+
+
+def _cached(name):
+    # Imite une fonction décorée par st.cache_data (méthode clear())
+    fn = MagicMock()
+    fn.__module__ = "test_cache"
+    fn.__qualname__ = name
+    return fn
+
+
+def test_invalidate_only_clears_dependants():
+    structure = depends_on('variable', 'modalite:ENTRETIEN')(_cached("structure"))
+    listes = depends_on('modalite:DEMANDE', 'modalite:SOLUTION')(_cached("listes"))
+    reporting = depends_on('entretien', 'modalite:ENTRETIEN')(_cached("reporting"))
+
+    invalidate('modalite:DEMANDE')
+
+    listes.clear.assert_called_once()
+    structure.clear.assert_not_called()
+    reporting.clear.assert_not_called()
+
+
+def test_unscoped_key_clears_every_tab():
+    structure = depends_on('modalite:ENTRETIEN')(_cached("structure_all"))
+    listes = depends_on('modalite:DEMANDE')(_cached("listes_all"))
+
+    invalidate('modalite')
+
+    structure.clear.assert_called_once()
+    listes.clear.assert_called_once()
+
+
+def test_version_changes_with_invalidation():
+    before = version('rubrique', 'modalite:SOLUTION', 'modalite')
+    invalidate('modalite:DEMANDE')
+    after = version('rubrique', 'modalite:SOLUTION', 'modalite')
+
+    assert after[0] == before[0]
+    assert after[1] == before[1]
+    assert after[2] == before[2] + 1
+
+
+def test_unknown_table_is_rejected():
+    with pytest.raises(ValueError):
+        invalidate('inconnue')
+    assert 'inconnue' not in cache_metadonnees._versions
+
+
+def test_synchronize_invalidates_when_database_stamp_changes():
+    reporting = depends_on('entretien')(_cached("reporting_sync"))
+    before = version('entretien')
+
+    assert not cache_metadonnees.synchronize('entretien', (10, 0, 0, 10))   # première lecture
+    assert not cache_metadonnees.synchronize('entretien', (10, 0, 0, 10))
+    assert cache_metadonnees.synchronize('entretien', (11, 0, 0, 11))       # saisie reçue par l'API
+
+    reporting.clear.assert_called_once()
+    assert version('entretien') == (before[0] + 1,)
@@ -0,0 +1,191 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from maisondudroit import db
+
+
+def _fake_conn():
+    conn = MagicMock()
+    conn.closed = 0
+    conn.get_transaction_status.return_value = extensions.TRANSACTION_STATUS_IDLE
+    return conn
+
+
+@patch('maisondudroit.db.ThreadedConnectionPool')
+def test_checkout_returns_connection_to_pool(mock_pool_cls):
+    conn = _fake_conn()
+    mock_pool_cls.return_value.getconn.return_value = conn
+    pool = db.ConnectionPool(1, 2)
+
+    with patch('maisondudroit.db.get_pool', return_value=pool):
+        with db.checkout() as c:
+            assert c is conn
+
+    mock_pool_cls.return_value.putconn.assert_called_once_with(conn)
+
+
+@patch('maisondudroit.db.ThreadedConnectionPool')
+def test_checkout_discards_broken_connection(mock_pool_cls):
+    conn = _fake_conn()
+    mock_pool_cls.return_value.getconn.return_value = conn
+    pool = db.ConnectionPool(1, 2)
+
+    with patch('maisondudroit.db.get_pool', return_value=pool):
+        with pytest.raises(psycopg2.OperationalError):
+            with db.checkout():
+                raise psycopg2.OperationalError("server closed the connection")
+
+    mock_pool_cls.return_value.putconn.assert_called_once_with(conn, close=True)
+
+
+@patch('maisondudroit.db.ThreadedConnectionPool')
+def test_unhealthy_connection_is_replaced(mock_pool_cls):
+    dead, fresh = _fake_conn(), _fake_conn()
+    dead.cursor.return_value.execute.side_effect = psycopg2.OperationalError("dead")
+    mock_pool_cls.return_value.getconn.side_effect = [dead, fresh]
+    pool = db.ConnectionPool(1, 2)
+
+    assert pool.getconn() is fresh
+    mock_pool_cls.return_value.putconn.assert_called_once_with(dead, close=True)
+
+
+@patch('maisondudroit.db.ThreadedConnectionPool')
+def test_every_dead_idle_connection_is_replaced(mock_pool_cls):
+    # Serveur redémarré : les deux connexions inactives du pool sont mortes
+    dead = [_fake_conn(), _fake_conn()]
+    for conn in dead:
+        conn.cursor.return_value.execute.side_effect = psycopg2.OperationalError("dead")
+    fresh = _fake_conn()
+    mock_pool_cls.return_value.getconn.side_effect = [*dead, fresh]
+    pool = db.ConnectionPool(2, 3)
+
+    assert pool.getconn() is fresh
+    assert mock_pool_cls.return_value.putconn.call_args_list == [((conn,), {'close': True}) for conn in dead]
+
+
+@patch('maisondudroit.db.ThreadedConnectionPool')
+def test_unhealthy_connections_until_timeout_raise_pool_error(mock_pool_cls):
+    def dead_conn():
+        conn = _fake_conn()
+        conn.cursor.return_value.execute.side_effect = psycopg2.OperationalError("dead")
+        return conn
+    mock_pool_cls.return_value.getconn.side_effect = lambda: dead_conn()
+    pool = db.ConnectionPool(1, 1, timeout=0.05)
+
+    with pytest.raises(PoolError):
+        pool.getconn()
+    assert pool._slots.acquire(timeout=0)     # créneau rendu malgré l'échec
+
+
+@patch('maisondudroit.db.ThreadedConnectionPool')
+def test_pool_waits_then_fails_when_full(mock_pool_cls):
+    mock_pool_cls.return_value.getconn.side_effect = lambda: _fake_conn()
+    pool = db.ConnectionPool(1, 1, timeout=0.1)
+
+    pool.getconn()
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+
+@patch('maisondudroit.db.ThreadedConnectionPool')
+def test_checkout_with_given_connection_does_not_touch_pool(mock_pool_cls):
+    conn = _fake_conn()
+    with db.checkout(conn) as c:
+        assert c is conn
+    mock_pool_cls.assert_not_called()
+
+
+def test_concurrent_sessions_are_isolated(pg_params):
+    """N sessions simultanées : les rollbacks des unes n'effacent rien chez les autres."""
+    sessions = 16
+    pool = db.ConnectionPool(2, 4, **pg_params)
+    setup = pool.getconn()
+    cursor = setup.cursor()
+    cursor.execute("CREATE TABLE IF NOT EXISTS test_pool_sessions (session int, ok boolean)")
+    cursor.execute("TRUNCATE test_pool_sessions")
+    setup.commit()
+    pool.putconn(setup)
+
+    errors = []
+
+    def session(n):
+        try:
+            conn = pool.getconn()
+            try:
+                cur = conn.cursor()
+                cur.execute("INSERT INTO test_pool_sessions VALUES (%s, %s)", (n, n % 2 == 0))
+                cur.execute("SELECT pg_sleep(0.05)")
+                # Une session sur deux annule son travail
+                conn.commit() if n % 2 == 0 else conn.rollback()
+            finally:
+                pool.putconn(conn)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    conn = pool.getconn()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT count(*), bool_and(ok) FROM test_pool_sessions")
+        count, all_ok = cur.fetchone()
+        cur.execute("DROP TABLE test_pool_sessions")
+        conn.commit()
+    finally:
+        pool.putconn(conn)
+        pool.closeall()
+
+    assert errors == []
+    assert count == sessions // 2
+    assert all_ok
+
+
+def _streaming_conn(chunks, description):
+    cursor = MagicMock()
+    cursor.fetchmany.side_effect = chunks + [[]]
+    cursor.description = description
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    return conn, cursor
+
+
+def test_stream_uses_named_cursor_and_itersize():
+    conn, cursor = _streaming_conn([[(1, "a"), (2, "b")], [(3, "c")]], [("num",), ("lib",)])
+
+    columns, chunks = db.stream(conn, "SELECT num, lib FROM t", itersize=2)
+
+    assert columns == ["num", "lib"]
+    assert [len(rows) for rows in chunks] == [2, 1]
+    assert conn.cursor.call_args.kwargs["name"].startswith("flux_")
+    assert cursor.itersize == 2
+    cursor.fetchmany.assert_called_with(2)
+    cursor.close.assert_called_once()
+
+
+def test_read_frame_builds_columns_from_chunks():
+    pytest.importorskip("pyarrow")
+    # Premier lot sans commune (type "null") : promu en texte avec le lot suivant
+    conn, _ = _streaming_conn([[(1, None), (2, None)], [(3, "Vannes")]], [("num",), ("commune",)])
+
+    df = db.read_frame(conn, "SELECT num, commune FROM entretien", itersize=2)
+
+    assert df["num"].tolist() == [1, 2, 3]
+    assert str(df["num"].dtype) == "Int64"
+    assert df["commune"].isna().sum() == 2 and df.loc[2, "commune"] == "Vannes"
+
+
+def test_read_frame_empty_result_keeps_columns():
+    conn, _ = _streaming_conn([], [("num",), ("commune",)])
+
+    df = db.read_frame(conn, "SELECT num, commune FROM entretien")
+
+    assert df.empty and list(df.columns) == ["num", "commune"]
@@ -0,0 +1,144 @@
+import os
+from datetime import date
+from unittest.mock import MagicMock
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from maisondudroit import export
+
+
+def make_conn(chunks, version=(2, 2)):
+    mock_cursor = MagicMock()
+    mock_cursor.fetchmany.side_effect = chunks + [[]]
+    mock_cursor.fetchone.return_value = version
+    mock_cursor.description = [("Numéro",), ("Date",), ("Commune",)]
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    return mock_conn, mock_cursor
+
+
+def test_write_excel_rolls_over_to_new_sheet(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "EXCEL_MAX_ROWS", 3)
+    path = tmp_path / "out.xlsx"
+    chunks = [[(1, date(2024, 1, 2), "Vannes"), (2, None, None)], [(3, date(2024, 1, 3), "Séné")]]
+
+    total = export.write_excel(str(path), ["Numéro", "Date", "Commune"], chunks, "Export", na_rep="NR")
+
+    wb = openpyxl.load_workbook(path)
+    assert total == 3
+    assert wb.sheetnames == ["Export", "Export_2"]
+    assert [c.value for c in wb["Export"][3]] == [2, "NR", "NR"]
+    assert wb["Export_2"]["A2"].value == 3
+
+
+def test_excel_export_streams_once_per_data_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_DIR", str(tmp_path))
+    conn, cursor = make_conn([[(1, date(2024, 1, 2), "Vannes"), (2, date(2024, 1, 3), "Séné")]])
+
+    path = export.excel_export("SELECT ...", conn=conn)
+    again = export.excel_export("SELECT ...", conn=conn)
+
+    assert path == again
+    # Curseur nommé (côté serveur) et requête d'export exécutée une seule fois
+    assert "name" in conn.cursor.call_args_list[1].kwargs
+    assert [c.args[0] for c in cursor.execute.call_args_list].count("SELECT ...") == 1
+    assert openpyxl.load_workbook(path).active.max_row == 3
+
+
+def test_new_data_version_replaces_previous_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_DIR", str(tmp_path))
+    first = export.excel_export("SELECT ...", conn=make_conn([[(1, None, None)]], version=(1, 1))[0])
+    second = export.excel_export("SELECT ...", conn=make_conn([[(1, None, None)], [(2, None, None)]], version=(2, 2))[0])
+
+    assert first != second
+    assert [p.name for p in tmp_path.iterdir()] == [second.split("/")[-1]]
+
+
+def test_purge_spares_other_sessions_and_drops_expired_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_DIR", str(tmp_path))
+    other = export.excel_export("SELECT ...", name="export_filtre_b", conn=make_conn([[(1, None, None)]])[0])
+    old = tmp_path / "export_filtre_c_0123456789ab.xlsx"
+    old.write_bytes(b"")
+    os.utime(old, (0, 0))
+
+    mine = export.excel_export("SELECT ...", name="export_filtre_a", conn=make_conn([[(1, None, None)]])[0])
+
+    assert os.path.exists(other) and os.path.exists(mine) and not old.exists()
+
+
+def test_data_version_reads_activity_counters_and_local_metadata_versions(monkeypatch):
+    monkeypatch.setattr(export.cache_metadonnees, "_versions", {})
+    conn, cursor = make_conn([], version=(812, 3, 1, 640))
+
+    before = export.data_version(conn)
+    export.cache_metadonnees.invalidate('modalite:ENTRETIEN')     # libellé renommé
+
+    assert before == ((812, 3, 1, 640), (0, 0))
+    assert export.data_version(conn) == ((812, 3, 1, 640), (0, 1))
+    query = cursor.execute.call_args.args[0]
+    assert "pg_stat_all_tables" in query and "'solution'::regclass" in query
+    assert "count(" not in query and "xmin" not in query
+
+
+def test_dataframe_to_excel_returns_bytes():
+    excel_bytes = export.dataframe_to_excel(pd.DataFrame({"a": [1.0, None], "b": ["x", "y"]}))
+
+    assert excel_bytes[:2] == b"PK"
+
+
+PLAN = [("num", None, False), ("date_ent", None, False), ("sexe", 3, True), ("commune", None, False)]
+
+
+def make_export_conn(rows):
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [PLAN, [(3, "Homme")]]
+    mock_cursor.fetchmany.side_effect = [rows, []]
+    # (nom, OID) : int4, date, text, varchar
+    mock_cursor.description = [("num", 23), ("date_ent", 1082), ("sexe", 25), ("commune", 1043)]
+    mock_cursor.mogrify.side_effect = lambda query, params: query.encode()
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    return mock_conn, mock_cursor
+
+
+def test_export_query_pushes_filters_down():
+    conn, _ = make_export_conn([])
+
+    query, params = export.export_query(conn, columns=["num", "sexe"], date_min=date(2024, 1, 1),
+                                        communes=["Vannes"])
+
+    assert '"commune"' not in query.split("WHERE")[0]
+    assert "(e.date_ent >= %s) AND (e.commune = ANY(%s))" in query
+    assert params == ["ENTRETIEN", 3, date(2024, 1, 1), ["Vannes"]]
+
+
+def test_export_unknown_column():
+    conn, _ = make_export_conn([])
+    with pytest.raises(ValueError):
+        export.export_query(conn, columns=["inconnue"])
+
+
+def test_parquet_and_arrow_exports_keep_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    import pyarrow as pa
+
+    rows = [(1, date(2024, 1, 2), "Homme", "Vannes"), (2, None, None, None)]
+    export.export_data(str(tmp_path / "e.parquet"), "parquet", conn=make_export_conn(rows)[0])
+    export.export_data(str(tmp_path / "e.arrow"), "arrow", conn=make_export_conn(rows)[0])
+
+    table = pq.read_table(tmp_path / "e.parquet")
+    assert table.schema.field("num").type == pa.int32()
+    assert table.schema.field("date_ent").type == pa.date32()
+    assert table.column("commune").to_pylist() == ["Vannes", None]
+    assert pa.ipc.open_file(str(tmp_path / "e.arrow")).read_all().num_rows == 2
+
+
+def test_csv_export_uses_copy_to_stdout(tmp_path):
+    conn, cursor = make_export_conn([])
+
+    export.export_data(str(tmp_path / "e.csv"), "csv", conn=conn, communes=["Vannes"])
+
+    sql = cursor.copy_expert.call_args.args[0]
+    assert sql.startswith("COPY (SELECT") and sql.endswith("TO STDOUT WITH (FORMAT csv, HEADER)")
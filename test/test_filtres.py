@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+from maisondudroit.filtres import active_filters, filter_conditions
+from maisondudroit.graphiques import COUNT, plan_chart
+from maisondudroit.statistiques import summary_query
+
+PLAN = [("num", None, False), ("sexe", 3, True), ("commune", None, False)]
+
+
+def test_filters_become_parameterized_conditions():
+    conditions = filter_conditions({
+        'date_min': date(2024, 1, 1), 'communes': ["Vannes"], 'sexe': [1, 2],
+        'demandes': ["a1"], 'solutions': [], 'date_max': None,
+    })
+
+    assert conditions == [
+        ("e.date_ent >= %s", [date(2024, 1, 1)]),
+        ("e.commune = ANY(%s)", [["Vannes"]]),
+        ('e."sexe"::text = ANY(%s)', [["1", "2"]]),
+        ("EXISTS (SELECT 1 FROM demande f WHERE f.num = e.num AND f.nature = ANY(%s))", [["a1"]]),
+    ]
+    assert active_filters({'communes': [], 'date_max': None, 'age': ["2"]}) == {'age': ["2"]}
+
+
+def test_unknown_filter():
+    with pytest.raises(ValueError):
+        filter_conditions({'commune; DROP TABLE entretien': ["x"]})
+
+
+def test_chart_query_filters_before_aggregation():
+    query, params = plan_chart(PLAN, "sexe", COUNT, chart_type="Barres", filters={'communes': ["Vannes"]})
+
+    assert "WHERE (e.commune = ANY(%s))" in query.split("GROUP BY")[0]
+    assert params == ["ENTRETIEN", 3, ["Vannes"]]
+
+
+def test_summary_uses_daily_counters_for_a_period_only():
+    query, params = summary_query(filters={'date_min': date(2024, 1, 1)})
+
+    assert "FROM stat_entretien s" in query
+    assert params == ["ENTRETIEN", "ENTRETIEN", "jour", date(2024, 1, 1)]
+
+
+def test_summary_aggregates_filtered_entretiens():
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    con.execute("CREATE TABLE entretien (num int, date_ent date, mode smallint, sexe smallint, age smallint, commune varchar)")
+    con.execute("""INSERT INTO entretien VALUES (1, '2024-01-02', 1, 1, 2, 'Vannes'),
+                   (2, '2024-01-03', 1, 2, 2, 'Vannes'), (3, '2024-01-03', 2, 1, 3, 'Séné')""")
+    con.execute("CREATE TABLE variable (tab varchar, pos int, lib varchar)")
+    con.execute("INSERT INTO variable VALUES ('ENTRETIEN', 3, 'Sexe')")
+    con.execute("CREATE TABLE modalite (tab varchar, pos int, code varchar, lib_m varchar, pos_m int)")
+    con.execute("INSERT INTO modalite VALUES ('ENTRETIEN', 3, '1', 'Homme', 1), ('ENTRETIEN', 3, '2', 'Femme', 2)")
+
+    query, params = summary_query(filters={'communes': ["Vannes"]})
+    rows = con.execute(query.replace("%s", "?"), params).fetchall()
+    counts = {(dim, label): nb for _, dim, label, nb in rows}
+
+    assert counts[("*", "")] == 2
+    assert counts[("sexe", "Homme")] == 1 and counts[("sexe", "Femme")] == 1
+    assert ("commune", "Séné") not in counts
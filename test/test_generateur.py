@@ -0,0 +1,85 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+import numpy as np
+
+from maisondudroit.generateur import generate, generate_chunk, load_generation_metadata
+
+SPEC = {
+    'columns': {
+        'mode': ('choice', [1, 2, 3], np.array([3.0, 2.0, 1.0]), 0.0),
+        'duree': ('range', (1, 5), None, 0.1),
+        'commune': ('choice', ["Vannes", "Séné"], np.array([1.0, 1.0]), 0.0),
+        'partenaire': ('null', None, None, 1.0),
+    },
+    'demande': (["1a", "2b", "3c"], np.array([1.0, 1.0, 1.0])),
+    'solution': (["s1", "s2"], np.array([1.0, 1.0])),
+}
+
+
+def test_chunk_is_reproducible_and_follows_metadata():
+    first = generate_chunk(np.random.default_rng(7), SPEC, 100, 2000, date(2024, 1, 1), date(2024, 3, 31))
+    again = generate_chunk(np.random.default_rng(7), SPEC, 100, 2000, date(2024, 1, 1), date(2024, 3, 31))
+    entretiens = first['entretien']
+
+    assert entretiens.equals(again['entretien'])
+    assert entretiens['num'].tolist() == list(range(100, 2100))
+    assert set(entretiens['mode'].dropna()) <= {1, 2, 3}
+    assert entretiens['duree'].dropna().between(1, 5).all() and entretiens['duree'].isna().any()
+    assert entretiens['partenaire'].isna().all()
+    assert entretiens['date_ent'].min() >= "2024-01-01" and entretiens['date_ent'].max() <= "2024-03-31"
+    # Pas d'entretien le dimanche
+    assert not (np.array([date.fromisoformat(d).weekday() for d in entretiens['date_ent']]) == 6).any()
+
+
+def test_children_are_one_to_three_distinct_natures():
+    chunk = generate_chunk(np.random.default_rng(1), SPEC, 1, 500, date(2024, 1, 1), date(2024, 1, 31))
+    demandes = chunk['demande']
+    per_num = demandes.groupby('num')
+
+    assert set(demandes['num']) == set(range(1, 501))
+    assert per_num.size().between(1, 3).all()
+    assert not demandes.duplicated(['num', 'nature']).any()
+    assert (per_num['pos'].max() == per_num.size()).all()
+
+
+def test_metadata_maps_columns_to_modalites_plages_and_lists():
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = [
+        [("num", "integer", None, None), ("date_ent", "date", None, None), ("sexe", "smallint", 3, "MOD"),
+         ("enfant", "smallint", 8, "NUM"), ("commune", "character varying", 13, "CHAINE"),
+         ("partenaire", "character varying", None, None)],
+        [(3, "1"), (3, "2")],           # modalite
+        [(8, 0, 6)],                    # plage
+        [(13, "Vannes"), (13, "Séné")], # valeurs_c
+        [(None, 4), ("1", 6)],          # effectifs observés de sexe
+        [],                             # commune : aucun entretien
+        [("1a",)], [],                  # natures de demande, effectifs
+        [],
+    ]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    spec = load_generation_metadata(conn)
+
+    kind, values, weights, null_rate = spec['columns']['sexe']
+    assert (kind, values, weights.tolist(), null_rate) == ('choice', [1, 2], [7.0, 1.0], 0.4)
+    assert spec['columns']['enfant'][:2] == ('range', (0, 6))
+    assert spec['columns']['commune'][1] == ["Vannes", "Séné"]
+    assert spec['columns']['partenaire'][0] == 'null'
+    assert spec['demande'][0] == ["1a"] and spec['solution'][0] == []
+
+
+def test_generate_copies_each_chunk_then_commits(monkeypatch):
+    monkeypatch.setattr("maisondudroit.generateur.load_generation_metadata", lambda conn: SPEC)
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (42,)
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    rapport = generate(250, conn=conn, seed=3, chunk_size=100)
+
+    copies = [c.args[0] for c in cursor.copy_expert.call_args_list]
+    assert len(copies) == 9 and copies[0].startswith("COPY entretien (num, date_ent, mode")
+    assert rapport['entretien'] == 250
+    assert conn.commit.call_count == 5     # lecture de max(num), 3 lots, séquence
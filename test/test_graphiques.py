@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from maisondudroit.graphiques import COUNT, build_figure, load_chart_data, plan_chart
+
+PLAN = [("num", None, False), ("sexe", 3, True), ("age", 4, True), ("enfant", None, False)]
+
+
+def test_count_bars_group_by_in_modalite_order():
+    query, params = plan_chart(PLAN, "age", COUNT, "sexe", "Barres")
+
+    assert 'GROUP BY "age", "sexe"' in query
+    assert 'count(*) AS "Compte"' in query
+    assert query.index('min("age__ordre")') < query.index('min("sexe__ordre")')
+    # Seules les colonnes utiles sont décodées
+    assert query.count("LEFT JOIN modalite") == 2 and '"enfant"' not in query
+    assert params == ["ENTRETIEN", 3, "ENTRETIEN", 4]
+
+
+def test_aggregate_follows_chart_type():
+    assert 'avg("enfant")' in plan_chart(PLAN, "age", "enfant", None, "Lignes")[0]
+    assert 'sum("enfant")' in plan_chart(PLAN, "age", "enfant", None, "Aires")[0]
+
+
+def test_pie_ignores_colour():
+    query, _ = plan_chart(PLAN, "age", COUNT, "sexe", "Camembert")
+
+    assert 'GROUP BY "age"\n' in query and '"sexe"' not in query
+
+
+def test_pie_with_numeric_y_counts_rows():
+    query, _ = plan_chart(PLAN, "sexe", "enfant", None, "Camembert")
+    assert 'count(*) AS "Compte"' in query and 'avg(' not in query
+
+    counts = pd.DataFrame({"sexe": ["Homme", "Femme"], "Compte": [3, 5]})
+    fig = build_figure(counts, "sexe", "enfant", None, "Camembert")
+    assert list(fig.data[0]["values"]) == [3, 5]
+
+
+def test_box_quartiles_and_scatter_sample_in_sql():
+    query, _ = plan_chart(PLAN, "sexe", "enfant", None, "Boîte à moustache")
+    assert query.count("percentile_cont") == 3
+
+    query, params = plan_chart(PLAN, "age", "enfant", "sexe", "Nuage de points", max_points=100)
+    assert query.endswith("ORDER BY random()\nLIMIT %s") and params[-1] == 100
+
+
+def test_invalid_selection():
+    with pytest.raises(ValueError):
+        plan_chart(PLAN, "inconnue")
+    with pytest.raises(ValueError):
+        plan_chart(PLAN, "age", COUNT, None, "Nuage de points")
+
+
+def test_load_chart_data_and_figures():
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = [("Homme", 0, 1, 2, 3, 5, 10), ("Femme", 0, 0, 1, 2, 4, 7)]
+    mock_cursor.description = [(c,) for c in ("sexe", "lowerfence", "q1", "median", "q3", "upperfence", "Compte")]
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    data = load_chart_data(mock_conn, PLAN, "sexe", "enfant", None, "Boîte à moustache")
+    fig = build_figure(data, "sexe", "enfant", None, "Boîte à moustache")
+
+    mock_cursor.execute.assert_called_once()
+    assert len(fig.data) == 1 and list(fig.data[0].median) == [2, 1]
+
+    counts = pd.DataFrame({"age": ["18-25 ans", "26-40 ans"], "Compte": [3, 5]})
+    assert build_figure(counts, "age", COUNT, None, "Camembert").data[0].type == "pie"
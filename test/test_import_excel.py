@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+from maisondudroit.import_excel import clean_entretiens, import_frame, melt_enfants
+
+
+def _raw():
+    return pd.DataFrame({
+        "NUM": [1, 2, 2, "x"],
+        "DATE_ENT": [np.nan] * 4,
+        "MODE_ENT": [1, "nc", 3, 1],
+        "DUREE": [2, 2.5, np.nan, 1],
+        "SEXE": [1, 2, 1, 1], "AGE": [3, 4, 4, 4], "VIENT_PR": [1, 1, 1, 1],
+        "SIT_FAM": ["5a", 7, "4", "1"],
+        "ENFANT": [0, "nc", 1, 0], "MODELE_FAM": [np.nan, 1.0, np.nan, np.nan],
+        "PROFESSION": [6, 6, 6, 6], "RESS": [1, 1, 1, 1],
+        "ORIGINE": ["1b", "2a", "1b", "1b"], "COMMUNE": ["Vannes", "Séné", "Vannes", "Vannes"],
+        "PARTENAIRE": [np.nan] * 4,
+        "Dem.1": ["1a", "2b", "3c", "1a"], "Dem.2": [np.nan, "nc", "3d", np.nan], "Dem.3": [np.nan] * 4,
+        "Sol.1": [1, "2c", 1, 1], "Sol.2": [np.nan] * 4, "Sol.3": [np.nan] * 4,
+    })
+
+
+def test_clean_entretiens_vectorized():
+    entretiens, rejets = clean_entretiens(_raw())
+
+    assert entretiens["num"].tolist() == [1, 2]
+    assert entretiens["mode"].isna().tolist() == [False, True]       # "nc" -> NULL
+    assert entretiens["duree"].isna().tolist() == [False, True]      # 2.5 -> NULL
+    assert entretiens["sit_fam"].tolist() == ["5a", "7"]              # code numérique -> texte
+    assert sorted(rejets["motif"]) == ["NUM en double", "NUM invalide"]
+
+
+def test_melt_enfants_single_pass():
+    demandes, _ = melt_enfants(_raw(), "Dem.", 5)
+    solutions, _ = melt_enfants(_raw(), "Sol.", 50)
+
+    assert list(demandes.itertuples(index=False, name=None))[:3] == [(1, 1, "1a"), (2, 1, "2b"), (2, 1, "3c")]
+    assert (2, 2, "3d") in set(demandes.itertuples(index=False, name=None))
+    assert solutions["nature"].tolist()[:2] == ["1", "2c"]
+
+
+def test_import_frame_uses_copy_and_one_commit():
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = []
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    rapport = import_frame(_raw(), conn=mock_conn)
+
+    assert mock_cursor.copy_expert.call_count == 3
+    mock_conn.commit.assert_called_once()
+    assert rapport["entretien"] == 2
+    assert rapport["demande"] == 2      # les demandes de la ligne doublon sont écartées
+    assert rapport["lignes_par_s"] > 0
+
+
+def test_import_frame_dry_run_writes_nothing():
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = [(1,)]
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    rapport = import_frame(_raw(), conn=mock_conn, dry_run=True)
+
+    mock_cursor.copy_expert.assert_not_called()
+    mock_conn.commit.assert_not_called()
+    assert rapport["entretien"] == 1
+    assert "NUM déjà en base" in set(rapport["rejets"]["motif"])
@@ -1,4 +1,4 @@
-from poc_global import insert_demandes
+from maisondudroit.saisie_entretien import insert_demandes
 from unittest.mock import MagicMock
 
 def test_insert_demandes_success():
@@ -1,4 +1,4 @@
-from poc_global import insert_full_entretien
+from maisondudroit.saisie_entretien import insert_full_entretien
 from unittest.mock import MagicMock
 
 
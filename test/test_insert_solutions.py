@@ -1,5 +1,5 @@
 from unittest.mock import MagicMock
-from poc_global import insert_solutions
+from maisondudroit.saisie_entretien import insert_solutions
 
 def test_insert_solutions_success():
     mock_cursor = MagicMock()
@@ -0,0 +1,183 @@
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from maisondudroit import migration
+from maisondudroit.filtres import filter_conditions
+from maisondudroit.decodage import SQL_CATEGORIES, build_reporting_query
+from maisondudroit.statistiques import summary_query
+
+
+def write(folder, name, content=""):
+    (folder / name).write_text(content, encoding="utf-8")
+
+
+def make_conn(applied):
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = lambda: [(v,) for v in applied]
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    return conn, cursor
+
+
+def test_discover_pairs_sql_scripts_and_python_modules(tmp_path):
+    write(tmp_path, "0002_index.up.sql", "CREATE INDEX i ON t (c);")
+    write(tmp_path, "0002_index.down.sql", "DROP INDEX i;")
+    write(tmp_path, "0001_tables.py", "def up(cursor): cursor.execute('UP')\ndef down(cursor): cursor.execute('DOWN')\n")
+    write(tmp_path, "notes.txt")
+
+    migrations = migration.discover(str(tmp_path))
+
+    assert [(v, name) for v, name, _, _ in migrations] == [(1, "tables"), (2, "index")]
+
+
+def test_discover_rejects_missing_down(tmp_path):
+    write(tmp_path, "0001_index.up.sql", "SELECT 1")
+    with pytest.raises(ValueError):
+        migration.discover(str(tmp_path))
+
+
+def test_migrate_applies_pending_in_order_one_commit_each(tmp_path):
+    write(tmp_path, "0001_a.up.sql", "SELECT 'a'")
+    write(tmp_path, "0001_a.down.sql", "SELECT 'non a'")
+    write(tmp_path, "0002_b.up.sql", "SELECT 'b'")
+    write(tmp_path, "0002_b.down.sql", "SELECT 'non b'")
+    applied = [1]
+    conn, cursor = make_conn(applied)
+
+    assert migration.migrate(conn=conn, directory=str(tmp_path)) == [2]
+
+    executed = [c.args[0] for c in cursor.execute.call_args_list]
+    assert "SELECT 'b'" in executed and "SELECT 'a'" not in executed
+    assert any("INSERT INTO schema_migrations" in q for q in executed)
+    assert conn.commit.call_count == 1
+
+
+def test_rollback_runs_down_newest_first(tmp_path):
+    for v in (1, 2, 3):
+        write(tmp_path, f"000{v}_m{v}.up.sql", f"UP {v}")
+        write(tmp_path, f"000{v}_m{v}.down.sql", f"DOWN {v}")
+    conn, cursor = make_conn([1, 2, 3])
+
+    assert migration.rollback_to(1, conn=conn, directory=str(tmp_path)) == [3, 2]
+
+    executed = [c.args[0] for c in cursor.execute.call_args_list]
+    assert executed.index("DOWN 3") < executed.index("DOWN 2") and "DOWN 1" not in executed
+
+
+def test_shipped_migrations_are_complete():
+    versions = [v for v, _, _, _ in migration.discover()]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+# --- Plans d'exécution sur une base migrée (ignorés sans PostgreSQL) ---
+
+SEEDED_ROWS = 20_000
+GRAINE = 17
+
+
+def _migrated_conn(pg_params):
+    import psycopg2
+
+    conn = psycopg2.connect(**pg_params)
+    if migration.pending(conn):
+        conn.close()
+        pytest.skip("Migrations en attente : python migration.py")
+    return conn
+
+
+@pytest.fixture
+def metadata(pg_params):
+    conn = _migrated_conn(pg_params)
+    cursor = conn.cursor()
+    # Tables de métadonnées de quelques centaines de lignes : le planificateur y préfère
+    # souvent un parcours séquentiel. On vérifie seulement que l'index est utilisable.
+    cursor.execute("SET enable_seqscan = off")
+    yield cursor
+    conn.rollback()
+    conn.close()
+
+
+@pytest.fixture
+def seeded(pg_params):
+    """
+    Base migrée + SEEDED_ROWS entretiens synthétiques (generateur.py) sur trois ans,
+    dans une transaction annulée en fin de test ; réglages du planificateur par défaut.
+    """
+    from maisondudroit.generateur import generate_chunk, load_generation_metadata
+    from maisondudroit.import_excel import copy_dataframe
+
+    conn = _migrated_conn(pg_params)
+    cursor = conn.cursor()
+    try:
+        spec = load_generation_metadata(conn)
+        if spec['columns'].get('commune', ('null',))[0] != 'choice':
+            pytest.skip("Aucune liste de communes (valeurs_c) pour générer les entretiens")
+        cursor.execute("SELECT COALESCE(max(num), 0) + 1 FROM entretien")
+        first_num = cursor.fetchone()[0]
+        chunk = generate_chunk(np.random.default_rng(GRAINE), spec, first_num, SEEDED_ROWS,
+                               date.today() - timedelta(days=3 * 365), date.today())
+        for table, df in chunk.items():
+            copy_dataframe(cursor, df, table)    # le trigger tient stat_entretien à jour
+        cursor.execute("ANALYZE entretien, demande, solution, stat_entretien")
+        yield cursor, spec, first_num + SEEDED_ROWS - 1
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def plan_indexes(cursor, query, params=None):
+    cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    found, todo = set(), [cursor.fetchone()[0][0]["Plan"]]
+    while todo:
+        node = todo.pop()
+        if "Index Name" in node:
+            found.add(node["Index Name"])
+        todo.extend(node.get("Plans", []))
+    return found
+
+
+def test_reporting_decoding_uses_covering_indexes(metadata):
+    query, params = build_reporting_query([("sexe", 3, True)])
+    assert "modalite_decodage_idx" in plan_indexes(metadata, query, params)
+    assert "modalite_ordre_idx" in plan_indexes(metadata, SQL_CATEGORIES, ("ENTRETIEN",))
+
+
+def test_demande_solution_options_use_order_index(metadata):
+    # Requête de structure_questionnaire.load_natures
+    query = "SELECT code, lib_m FROM modalite WHERE tab = %s AND pos = 3 ORDER BY pos_m"
+    assert "modalite_ordre_idx" in plan_indexes(metadata, query, ("DEMANDE",))
+
+
+def test_rare_nature_filter_uses_child_index(seeded):
+    cursor, spec, _ = seeded
+    codes, weights = spec['demande']
+    rare = codes[int(np.argmin(weights))]
+    conditions = filter_conditions({'demandes': [rare]})
+    query = f"SELECT count(*) FROM entretien e WHERE {conditions[0][0]}"
+    assert "demande_nature_num_idx" in plan_indexes(cursor, query, conditions[0][1])
+
+
+def test_last_month_for_one_commune_is_an_index_range_scan(seeded):
+    cursor, spec, _ = seeded
+    commune = spec['columns']['commune'][1][0]
+    conditions = filter_conditions({'date_min': date.today() - timedelta(days=30), 'communes': [commune]})
+    where = " AND ".join(f"({cond})" for cond, _ in conditions)
+    params = [v for _, values in conditions for v in values]
+    query = f"SELECT count(*) FROM entretien e WHERE {where}"
+    assert "entretien_commune_date_idx" in plan_indexes(cursor, query, params)
+
+
+def test_incremental_reporting_reads_by_primary_key(seeded):
+    cursor, _, last_num = seeded
+    query, params = build_reporting_query([("num", None, False)], after_num=last_num - 100)
+    assert "entretien_pkey" in plan_indexes(cursor, query, params)
+
+
+def test_dashboard_summary_reads_summary_rows_by_key(seeded):
+    # statistiques.SQL_RESUME : requête de la VUE GLOBALE à chaque affichage
+    cursor, _, _ = seeded
+    for query, params in (summary_query('tout'), summary_query('jour', debut=date.today() - timedelta(days=30))):
+        assert "stat_entretien_pkey" in plan_indexes(cursor, query, params)
@@ -0,0 +1,25 @@
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _loaded_by(page, modules):
+    """Modules (parmi modules) chargés par les seuls imports de premier niveau d'une page."""
+    with open(os.path.join(ROOT, page), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imports = "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+    check = f"import sys\nprint(' '.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", imports + "\n" + check], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+def test_data_entry_page_does_not_load_reporting_stack():
+    heavy = ["pandas", "plotly.express", "maisondudroit.reporting"]
+    assert _loaded_by("poc_global.py", heavy) == []
+    assert _loaded_by("pages/alimentation.py", heavy) == []
+    assert _loaded_by("pages/configuration.py", heavy) == []
+    assert _loaded_by("pages/visualisation.py", heavy) == heavy
@@ -0,0 +1,84 @@
+import json
+
+import profilage
+
+
+def _memo(fn):
+    # Cache minimal au protocole de st.cache_data (appel + clear)
+    store = {}
+    def cached(*args):
+        if args not in store:
+            store[args] = fn(*args)
+        return store[args]
+    cached.clear = store.clear
+    return cached
+
+
+def test_cached_counts_hits_and_misses_including_nested_calls(tmp_path):
+    @profilage.cached("colonnes", _memo)
+    def columns(tab):
+        return [tab]
+
+    @profilage.cached("données", _memo)
+    def data(tab, x):
+        return columns(tab) + [x]
+
+    profiler = profilage.start(True, "VISUALISATION")
+    assert data("E", "sexe") == ["E", "sexe"]
+    data("E", "sexe")
+    data("E", "age")        # miss, colonnes déjà en cache
+    data.clear()
+    data("E", "sexe")
+    report = profiler.finish(history_path=str(tmp_path / "profils.jsonl"))
+
+    caches = {c['cache']: (c['hits'], c['misses']) for c in report['caches']}
+    assert caches == {"données": (1, 3), "colonnes": (2, 1)}
+    assert [s['section'] for s in report['sections']][:2] == ["cache données", "cache colonnes"]
+    assert report['sections'][1]['niveau'] == 1
+
+
+def test_inactive_profiler_records_nothing(tmp_path):
+    profiler = profilage.start(False)
+    with profiler.section("figure"):
+        pass
+    profiler.checkpoint("style")
+    profiler.cache("figure", hit=True)
+
+    assert profiler.finish(history_path=str(tmp_path / "profils.jsonl")) is None
+    assert not profiler.sections and not profiler.caches
+    assert not (tmp_path / "profils.jsonl").exists()
+
+
+def test_history_is_appended_and_compared_by_release(tmp_path, monkeypatch):
+    path = str(tmp_path / "profils.jsonl")
+    for release, durations in (("v1", [100, 120]), ("v2", [300])):
+        monkeypatch.setenv("APP_RELEASE", release)
+        profilage.release.cache_clear()
+        for ms in durations:
+            profilage.append_history({'le': 0, 'version': profilage.release(), 'page': "VISUALISATION",
+                                      'total_ms': ms}, path)
+    profilage.release.cache_clear()
+
+    profiler = profilage.start(True, "ALIMENTATION")
+    profiler.checkpoint("style")
+    report = profiler.finish(history_path=path)
+    assert report['allocations'] and report['pic_mo'] >= 0
+    assert json.loads(open(path, encoding="utf-8").read().splitlines()[-1])['page'] == "ALIMENTATION"
+
+    table = profilage.compare_releases(profilage.read_history(path=path)).set_index(['version', 'page'])
+    assert table.loc[("v1", "VISUALISATION"), 'mediane_ms'] == 110
+    assert table.loc[("v2", "VISUALISATION"), 'mesures'] == 1
+
+
+def test_tracing_stops_with_the_last_profiled_rerun_even_if_interrupted(tmp_path):
+    import tracemalloc
+
+    first = profilage.RerunProfiler(True)
+    second = profilage.RerunProfiler(True)      # session concurrente
+    assert tracemalloc.is_tracing()
+
+    first.stop_tracing()        # ré-exécution interrompue (st.rerun) : pas de rapport
+    first.stop_tracing()
+    assert tracemalloc.is_tracing()
+    assert 'pic_mo' in second.finish(history_path=str(tmp_path / "profils.jsonl"))
+    assert not tracemalloc.is_tracing()
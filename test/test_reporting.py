@@ -1,28 +1,19 @@
-from poc_global import get_data_for_reporting
+from maisondudroit.reporting import load_reporting_frame
 from unittest.mock import MagicMock
 import pandas as pd
 
 def test_get_data_for_reporting():
     mock_cursor = MagicMock()
-    mock_cursor.fetchall.return_value = [
-        {
-            "num": 1,
-            "date_ent": "2024-01-01",
-            "sexe": 1,
-            "age": 30,
-            "sit_fam": 2,
-            "profession": 3,
-            "duree": 45,
-            "commune": "Nantes",
-            "mode": 1,
-            "vient_pr": 1
-        }
-    ]
+    # Plan de décodage (aucune colonne codée), aucune modalité, puis les lignes lues en flux
+    columns = ["num", "date_ent", "sexe", "age", "sit_fam", "profession", "duree", "commune", "mode", "vient_pr"]
+    mock_cursor.fetchall.side_effect = [[(col, None, False) for col in columns], []]
+    mock_cursor.fetchmany.side_effect = [[(1, "2024-01-01", 1, 30, 2, 3, 45, "Nantes", 1, 1)], []]
+    mock_cursor.description = [(col,) for col in columns]
 
     mock_conn = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
-    df = get_data_for_reporting(conn=mock_conn)
+    df = load_reporting_frame(mock_conn)
 
     assert isinstance(df, pd.DataFrame)
     assert len(df) == 1
@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock
+
+from maisondudroit.reporting import build_reporting_query, load_reporting_frame, to_reporting_frame
+
+PLAN = [("num", None, False), ("sexe", 3, True), ("age", 4, True), ("commune", None, False)]
+
+
+def test_build_reporting_query_joins_only_coded_columns():
+    query, params = build_reporting_query(PLAN)
+
+    assert query.count("LEFT JOIN modalite") == 2
+    assert 'COALESCE(m1.lib_m, e."sexe"::text) AS "sexe"' in query
+    assert 'e."commune"' in query
+    assert params == ["ENTRETIEN", 3, "ENTRETIEN", 4]
+
+
+def test_to_reporting_frame_categorical_in_modalite_order():
+    rows = [(1, "Femme", "26-40 ans", "Vannes"), (2, "Homme", "9", None), (3, None, "18-25 ans", "Séné")]
+    categories = {3: ["Homme", "Femme"], 4: ["18-25 ans", "26-40 ans"]}
+
+    df = to_reporting_frame(rows, ["num", "sexe", "age", "commune"], PLAN, categories)
+
+    assert str(df["sexe"].dtype) == "category"
+    assert list(df["sexe"].cat.categories) == ["Homme", "Femme"]
+    # Code sans libellé conservé comme catégorie supplémentaire
+    assert list(df["age"].cat.categories) == ["18-25 ans", "26-40 ans", "9"]
+    assert df["sexe"].isna().sum() == 1
+    assert str(df["commune"].dtype) != "category"
+
+
+def test_load_reporting_frame_three_queries():
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = [PLAN, [(3, "Homme")]]
+    mock_cursor.fetchmany.side_effect = [[(1, "Homme", None, "Vannes")], []]
+    mock_cursor.description = [("num",), ("sexe",), ("age",), ("commune",)]
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    df = load_reporting_frame(mock_conn)
+
+    assert mock_cursor.execute.call_count == 3
+    # Lignes décodées lues par curseur serveur (nommé)
+    assert "name" in mock_conn.cursor.call_args_list[-1].kwargs
+    assert df.loc[0, "sexe"] == "Homme"
+
+
+def test_compact_reporting_frame_dtypes():
+    import pandas as pd
+    from maisondudroit.reporting import compact_reporting_frame, memory_report
+
+    df = pd.DataFrame({
+        "num": [1, 2, 3, 4],
+        "date_ent": ["2024-01-02", None, "2024-02-03", "2024-03-04"],
+        "enfant": [0, None, 2, 1],
+        "commune": ["Vannes", "Vannes", "Séné", "Vannes"],
+    })
+
+    compact_reporting_frame(df)
+
+    assert str(df["num"].dtype) == "Int8"
+    assert str(df["enfant"].dtype) == "Int8" and df["enfant"].isna().sum() == 1
+    assert pd.api.types.is_datetime64_any_dtype(df["date_ent"])
+    assert str(df["commune"].dtype) == "category"
+    report, total, ok = memory_report(df, budget_mb=1)
+    assert list(report.index) == list(df.columns) and ok
+
+
+def test_top_label_and_counts_on_codes():
+    import pandas as pd
+    from maisondudroit.reporting import category_counts, top_label
+
+    s = pd.Categorical(["26-40 ans", "18-25 ans", "26-40 ans", None], categories=["18-25 ans", "26-40 ans", "41-60 ans"])
+    s = pd.Series(s)
+
+    assert top_label(s) == "26-40 ans"
+    assert category_counts(s).values.tolist() == [["18-25 ans", 1], ["26-40 ans", 2]]
+    assert top_label(pd.Series([], dtype="category")) == "N/A"
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from maisondudroit.reporting import IncrementalReportingLoader, append_reporting_rows, build_reporting_query
+
+PLAN = [("num", None, False), ("sexe", 3, True)]
+CATEGORIES = [(3, "Homme"), (3, "Femme")]
+DESCRIPTION = [("num",), ("sexe",)]
+
+
+def make_conn(fetchall, reads, fetchone=()):
+    """fetchall : métadonnées ; reads : résultat de chaque lecture en flux."""
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.side_effect = fetchall
+    mock_cursor.fetchmany.side_effect = [chunk for rows in reads for chunk in ([rows, []] if rows else [[]])]
+    mock_cursor.fetchone.side_effect = list(fetchone)
+    mock_cursor.description = DESCRIPTION
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+    return mock_conn, mock_cursor
+
+
+def test_build_reporting_query_after_num():
+    query, params = build_reporting_query(PLAN, after_num=41)
+
+    assert query.endswith("WHERE e.num > %s ORDER BY e.num")
+    assert params == ["ENTRETIEN", 3, 41]
+
+
+def test_append_reporting_rows_keeps_categories_and_adds_new_codes():
+    old = pd.DataFrame({"num": pd.array([1, 2], dtype="Int8"),
+                        "sexe": pd.Categorical(["Homme", "Femme"], categories=["Homme", "Femme"])})
+    new = pd.DataFrame({"num": pd.array([300], dtype="Int16"), "sexe": ["9"]})
+
+    df = append_reporting_rows(old, new)
+
+    assert list(df["sexe"].cat.categories) == ["Homme", "Femme", "9"]
+    assert str(df["num"].dtype) == "Int16"
+    assert df["num"].tolist() == [1, 2, 300]
+
+
+def test_append_reporting_rows_keeps_integer_dtype_for_all_null_batch():
+    old = pd.DataFrame({"num": pd.array([1, 2], dtype="Int16"), "age": pd.array([3, None], dtype="Int8")})
+    new = pd.DataFrame({"num": [3, 4], "age": [None, None]})
+
+    df = append_reporting_rows(old, new)
+
+    assert str(df["age"].dtype) == "Int8"
+    assert str(df["num"].dtype) == "Int16"
+    assert df["age"].isna().tolist() == [False, True, True, True]
+
+
+def test_loader_fetches_only_new_rows():
+    conn, cursor = make_conn([PLAN, CATEGORIES], [[(1, "Homme"), (2, "Femme")], [(3, "Femme")], []])
+    loader = IncrementalReportingLoader()
+
+    df = loader.refresh(conn, meta_version=(0,), data_version=(0,))
+    assert len(df) == 2 and loader.last_num == 2
+
+    df = loader.refresh(conn, meta_version=(0,), data_version=(0,))
+    last_query, last_params = cursor.execute.call_args.args
+    assert "WHERE e.num > %s" in last_query and last_params[-1] == 2
+    assert df["num"].tolist() == [1, 2, 3]
+
+    loader.refresh(conn, meta_version=(0,), data_version=(0,))
+    assert cursor.execute.call_args.args[1][-1] == 3
+
+
+def test_loader_full_reload_when_metadata_changes():
+    conn, cursor = make_conn([PLAN, CATEGORIES, PLAN, [(3, "H")]], [[(1, "Homme")], [(1, "H")]])
+    loader = IncrementalReportingLoader()
+
+    loader.refresh(conn, meta_version=(0,), data_version=(0,))
+    df = loader.refresh(conn, meta_version=(1,), data_version=(0,))
+
+    assert list(df["sexe"].cat.categories) == ["H"]
+
+
+def test_loader_count_mismatch_triggers_full_reload():
+    # Après une saisie (data_version change), le nombre de lignes est contrôlé
+    conn, cursor = make_conn(
+        [PLAN, CATEGORIES, PLAN, CATEGORIES],
+        [[(5, "Homme")], [], [(2, "Femme"), (5, "Homme")]],
+        fetchone=[(2,)],
+    )
+    loader = IncrementalReportingLoader()
+
+    loader.refresh(conn, meta_version=(0,), data_version=(0,))
+    df = loader.refresh(conn, meta_version=(0,), data_version=(1,))
+
+    assert df["num"].tolist() == [2, 5]
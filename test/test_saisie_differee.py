@@ -0,0 +1,98 @@
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+
+from maisondudroit import saisie_differee
+from maisondudroit.saisie_differee import WriteBehindJournal
+
+DATA = {'sexe': '1', 'age': '3', 'commune': 'Vannes'}
+
+
+def _conn(*fetchall):
+    cursor = MagicMock()
+    cursor.fetchall.side_effect = list(fetchall)
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+    return conn, cursor
+
+
+def test_append_is_durable_and_idempotent(tmp_path):
+    journal = WriteBehindJournal(str(tmp_path / "saisies.sqlite"))
+    id_saisie, timings = journal.append(DATA, ['1a'], ['1'], id_saisie="poste1-0001")
+    journal.append(DATA, ['1a'], ['1'], id_saisie="poste1-0001")    # double envoi
+
+    # Relu par un autre objet (redémarrage) : une seule saisie en attente
+    reopened = WriteBehindJournal(str(tmp_path / "saisies.sqlite"))
+    assert id_saisie == "poste1-0001" and timings['total'] >= 0
+    assert [item[0] for item in reopened.pending()] == ["poste1-0001"]
+    assert reopened.status()['en_attente'] == 1
+
+
+def test_flush_sends_one_multi_row_batch_and_skips_received(tmp_path):
+    journal = WriteBehindJournal(str(tmp_path / "saisies.sqlite"), on_flush=MagicMock())
+    journal.append(DATA, ['1a', '2a'], ['1'], id_saisie="a")
+    journal.append(DATA, ['3a'], [], id_saisie="b")
+    journal.append(DATA, ['1a'], [], id_saisie="c")
+    # "a" déjà reçue (commit passé avant une panne) : pas réinsérée
+    conn, cursor = _conn([("a", 7)], [(101,), (102,)])
+
+    assert journal.flush(conn) == 3
+
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert len(statements) == 5         # lecture saisie_recue, nextval, 3 INSERT multi-lignes (aucune solution)
+    inserts = {sql.split(" (")[0]: params for sql, params in
+               ((call.args[0], call.args[1]) for call in cursor.execute.call_args_list[2:])}
+    assert inserts["INSERT INTO demande"] == [101, 1, '3a', 102, 1, '1a']
+    assert "INSERT INTO solution" not in inserts
+    assert inserts["INSERT INTO saisie_recue"][0::3] == ["b", "c"]
+    conn.commit.assert_called_once()
+    assert journal.pending() == [] and journal.status()['transmise'] == 3
+    journal.on_flush.assert_called_once_with(3)
+
+
+def test_refused_entry_is_isolated_then_set_aside(tmp_path, monkeypatch):
+    monkeypatch.setattr(saisie_differee, "MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(saisie_differee, "FLUSH_INTERVAL", 0)     # nouvel essai sans attendre
+    journal = WriteBehindJournal(str(tmp_path / "saisies.sqlite"))
+    journal.append(DATA, ['1a'], [], id_saisie="ok")
+    journal.append({'age': 'trop vieux'}, ['1a'], [], id_saisie="ko")
+
+    def write_batch(conn, items):
+        if any(id_saisie == "ko" for id_saisie, _, _ in items):
+            raise psycopg2.DataError("invalid input syntax for type smallint")
+        return {id_saisie: 1 for id_saisie, _, _ in items}
+    monkeypatch.setattr(saisie_differee, "write_batch", write_batch)
+
+    assert journal.flush(MagicMock()) == 1      # lot refusé, repris saisie par saisie
+    assert journal.flush(MagicMock()) == 0
+    status = journal.status()
+    assert (status['en_attente'], status['transmise'], status['rejetee']) == (0, 1, 1)
+    assert journal.retry_rejected() == 1
+
+
+def test_refused_entry_waits_before_next_attempt(tmp_path, monkeypatch):
+    journal = WriteBehindJournal(str(tmp_path / "saisies.sqlite"))
+    journal.append({'age': 'trop vieux'}, ['1a'], [], id_saisie="ko")
+    monkeypatch.setattr(saisie_differee, "write_batch", MagicMock(side_effect=psycopg2.DataError("smallint")))
+
+    assert journal.flush(MagicMock()) == 0
+    assert journal.pending() == [] and journal.status()['en_attente'] == 1     # en attente, pas encore rejouée
+
+
+@pytest.mark.parametrize("error", [
+    psycopg2.OperationalError("server closed the connection"),
+    psycopg2.errors.UndefinedTable('relation "saisie_recue" does not exist'),     # migration 0004 absente
+    psycopg2.errors.InsufficientPrivilege("permission denied for table entretien"),
+])
+def test_database_errors_keep_entries_without_counting_attempts(tmp_path, monkeypatch, error):
+    journal = WriteBehindJournal(str(tmp_path / "saisies.sqlite"))
+    journal.append(DATA, ['1a'], [], id_saisie="a")
+    monkeypatch.setattr(saisie_differee, "write_batch", MagicMock(side_effect=error))
+
+    for _ in range(saisie_differee.MAX_ATTEMPTS + 1):
+        with pytest.raises(type(error)):
+            journal.flush(MagicMock())
+    assert [item[0] for item in journal.pending()] == ["a"]
+    assert journal._db().execute("SELECT tentatives FROM saisie").fetchone()[0] == 0
+    assert journal.status()['rejetee'] == 0
@@ -0,0 +1,49 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from maisondudroit.saisie_entretien import build_submission_sql, submit_entretien, validate_submission
+
+
+def test_submit_entretien_single_statement_single_commit():
+    mock_cursor = MagicMock()
+    mock_cursor.fetchone.return_value = [99]
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    new_id, timings = submit_entretien({"mode": 1, "commune": "Vannes"}, ["1a", "2b"], ["3"], conn=mock_conn)
+
+    assert new_id == 99
+    mock_cursor.execute.assert_called_once()
+    query, params = mock_cursor.execute.call_args[0]
+    assert "RETURNING num" in query
+    assert "INSERT INTO demande" in query and "INSERT INTO solution" in query
+    assert params[-6:] == [1, "1a", 2, "2b", 1, "3"]
+    mock_conn.commit.assert_called_once()
+    assert set(timings) == {"preparation", "execution", "commit", "total"}
+
+
+def test_submit_entretien_rolls_back_on_error():
+    mock_cursor = MagicMock()
+    mock_cursor.execute.side_effect = Exception("violation de contrainte")
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    with pytest.raises(Exception):
+        submit_entretien({}, ["1a"], [], conn=mock_conn)
+
+    mock_conn.rollback.assert_called_once()
+    mock_conn.commit.assert_not_called()
+
+
+def test_build_submission_sql_skips_empty_children():
+    query, params = build_submission_sql({}, ["1a"], [])
+    assert "INSERT INTO solution" not in query
+    assert len(params) == 14 + 2
+
+
+def test_validate_submission():
+    assert validate_submission({"mode": 1}, ["1a"], []) == []
+    assert validate_submission({}, [], [])
+    assert validate_submission({"mode": None}, ["1a"], [], required_fields=["mode"])
+    assert validate_submission({}, ["1a", "1b", "1c", "1d"], [])
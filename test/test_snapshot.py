@@ -0,0 +1,143 @@
+import glob
+import os
+import re
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from maisondudroit.graphiques import plan_chart
+from maisondudroit import snapshot
+from maisondudroit.snapshot import Snapshot
+
+DATA = {
+    "entretien": ([("num", 23), ("sexe", 21), ("enfant", 21)], [(1, 1, 0), (2, 2, 1), (3, 1, 2)]),
+    "demande": ([("num", 23), ("pos", 21), ("nature", 1043)], [(1, 1, "1a"), (2, 1, "2b")]),
+    "solution": ([("num", 23), ("pos", 21), ("nature", 1043)], [(1, 1, "1")]),
+    "variable": ([("tab", 1043), ("pos", 21), ("lib", 1043)], [("ENTRETIEN", 3, "SEXE")]),
+    "modalite": ([("tab", 1043), ("pos", 21), ("code", 1043), ("pos_m", 21), ("lib_m", 1043)],
+                 [("ENTRETIEN", 3, "1", 1, "Homme"), ("ENTRETIEN", 3, "2", 2, "Femme")]),
+}
+
+
+class FakeCursor:
+    """Répond aux requêtes de Snapshot.refresh à partir de DATA."""
+
+    def __init__(self, db):
+        self.db, self.result, self.description = db, [], None
+
+    def execute(self, query, params=None):
+        self.db.queries.append(query)
+        table = re.search(r"FROM (\w+)", query)
+        table = table and table.group(1)
+        if query.startswith("SET TRANSACTION"):
+            self.result = []
+        elif "to_regclass" in query:
+            self.result = [(False,)]
+        elif table not in self.db.data:
+            self.description, self.result = [("x", 25)], []
+        else:
+            description, rows = self.db.data[table]
+            if "num >" in query:
+                rows = [r for r in rows if r[0] > params[0]]
+            if query.startswith("SELECT count(*)"):
+                self.result = [(len(rows),)]
+            elif query.startswith("SELECT max(num)"):
+                self.result = [(max(r[0] for r in rows),)]
+            else:
+                self.description, self.result = description, list(rows)
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchmany(self, size):
+        rows, self.result = self.result[:size], self.result[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, data):
+        self.data, self.queries = data, []
+
+    def cursor(self, name=None):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+
+def test_refresh_copies_only_new_rows(tmp_path):
+    data = {table: (desc, list(rows)) for table, (desc, rows) in DATA.items()}
+    conn = FakeConn(data)
+    snap = Snapshot(str(tmp_path))
+
+    copied = snap.refresh(conn=conn)
+    assert copied["entretien"] == 3 and copied["modalite"] == 2
+    version = snap.version
+
+    data["entretien"][1].append((4, 2, 3))
+    conn.queries.clear()
+    copied = snap.refresh(conn=conn)
+
+    assert copied["entretien"] == 1 and copied["demande"] == 0
+    assert snap.version == version + 1
+    assert snap.state["tables"]["entretien"] == {"last_num": 4, "rows": 4}
+    # État relu depuis le disque par une nouvelle instance
+    assert Snapshot(str(tmp_path)).state["tables"]["entretien"]["rows"] == 4
+
+
+def test_deleted_rows_trigger_full_copy(tmp_path):
+    data = {table: (desc, list(rows)) for table, (desc, rows) in DATA.items()}
+    snap = Snapshot(str(tmp_path))
+    snap.refresh(conn=FakeConn(data))
+
+    data["entretien"][1].pop(0)
+    copied = snap.refresh(conn=FakeConn(data))
+
+    assert copied["entretien"] == 2
+    assert len(glob.glob(os.path.join(snap.folder(), "entretien", "*.parquet"))) == 1
+
+
+def test_refresh_publishes_a_new_generation(tmp_path, monkeypatch):
+    pytest.importorskip("duckdb")
+    monkeypatch.setattr(snapshot, "MAX_PARTS", 1)
+    data = {table: (desc, list(rows)) for table, (desc, rows) in DATA.items()}
+    snap = Snapshot(str(tmp_path))
+    snap.refresh(conn=FakeConn(data))
+    old = snap.state
+    count = "SELECT count(*) AS n FROM entretien"
+
+    # Ajout compacté puis recopie complète : la génération lue par une requête en cours est intacte
+    data["entretien"][1].append((4, 2, 3))
+    snap.refresh(conn=FakeConn(data))
+    data["entretien"][1].pop(0)
+    snap.refresh(conn=FakeConn(data), full=True)
+
+    assert snap.folder() != snap.folder(old)
+    assert snap.connect(old).execute(count).fetchone()[0] == 3
+    assert snap.query(count)["n"].tolist() == [3]
+
+    monkeypatch.setattr(snapshot, "RETIRED_GRACE", 0)
+    snap._readers[old['current']] = 1     # requête encore en cours sur l'ancienne génération
+    snap.refresh(conn=FakeConn(data))
+    assert os.path.isdir(snap.folder(old)) and len(snap.state['retired']) == 1
+    snap._readers[old['current']] = 0
+    snap.refresh(conn=FakeConn(data))
+    assert not os.path.isdir(snap.folder(old)) and snap.state['retired'] == []
+
+
+def test_chart_aggregate_runs_on_duckdb(tmp_path):
+    pytest.importorskip("duckdb")
+    snap = Snapshot(str(tmp_path))
+    snap.refresh(conn=FakeConn(DATA))
+    plan = [("num", None, False), ("sexe", 3, True), ("enfant", None, False)]
+
+    counts = snap.query(*plan_chart(plan, "sexe"))
+    boxes = snap.query(*plan_chart(plan, "sexe", "enfant", None, "Boîte à moustache"))
+
+    assert snap.available()
+    assert counts["sexe"].tolist() == ["Homme", "Femme"] and counts["Compte"].tolist() == [2, 1]
+    assert boxes["median"].tolist() == [1.0, 1.0]
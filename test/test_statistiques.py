@@ -0,0 +1,72 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+
+from maisondudroit.statistiques import (SQL_INSTALL, install_summary_tables, load_summary, summary_counts,
+                          summary_top, summary_total)
+
+SUMMARY = pd.DataFrame.from_records([
+    (date.min, "*", "", 6),
+    (date.min, "age", "18-25 ans", 1),
+    (date.min, "age", "26-40 ans", 3),
+    (date.min, "age", "41-60 ans", 2),
+    (date.min, "commune", "Vannes", 4),
+    (date.min, "commune", "Séné", 2),
+], columns=["debut", "dimension", "label", "nb"])
+
+
+def test_summary_helpers_keep_modalite_order():
+    counts = summary_counts(SUMMARY, "age")
+
+    assert counts["label"].tolist() == ["18-25 ans", "26-40 ans", "41-60 ans"]
+    assert counts["count"].tolist() == [1, 3, 2]
+    assert summary_total(SUMMARY) == 6
+    assert summary_top(SUMMARY, "commune") == "Vannes"
+    assert summary_top(SUMMARY, "sexe") == "N/A"
+
+
+def test_summary_counts_sum_over_periods():
+    mois = pd.DataFrame.from_records([
+        (date(2024, 1, 1), "sexe", "Homme", 2),
+        (date(2024, 2, 1), "sexe", "Homme", 3),
+        (date(2024, 2, 1), "sexe", "Femme", 1),
+    ], columns=["debut", "dimension", "label", "nb"])
+
+    counts = summary_counts(mois, "sexe")
+
+    assert dict(zip(counts["label"], counts["count"])) == {"Homme": 5, "Femme": 1}
+
+
+def test_load_summary_single_query_with_bounds():
+    mock_cursor = MagicMock()
+    mock_cursor.fetchall.return_value = [(date(2024, 1, 1), "*", "", 3)]
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    df = load_summary(mock_conn, periode="mois", debut=date(2024, 1, 1), fin=date(2024, 12, 1))
+
+    query, params = mock_cursor.execute.call_args.args
+    assert mock_cursor.execute.call_count == 1
+    assert "s.debut >= %s" in query and "s.debut <= %s" in query
+    assert params == ["ENTRETIEN", "ENTRETIEN", "mois", date(2024, 1, 1), date(2024, 12, 1)]
+    assert summary_total(df) == 3
+
+
+def test_load_summary_rejects_unknown_period():
+    with pytest.raises(ValueError):
+        load_summary(MagicMock(), periode="semaine")
+
+
+def test_install_creates_statement_triggers_and_rebuilds():
+    mock_cursor = MagicMock()
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    install_summary_tables(conn=mock_conn)
+
+    assert mock_cursor.execute.call_count == 2
+    mock_conn.commit.assert_called_once()
+    assert SQL_INSTALL.count("FOR EACH STATEMENT") == 3
+    assert "REFERENCING NEW TABLE AS nouveaux" in SQL_INSTALL
@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+from maisondudroit.structure_questionnaire import load_questionnaire_structure
+
+
+def test_load_questionnaire_structure_two_queries():
+    mock_cursor = MagicMock()
+    variables = [
+        {"pos": 1, "lib": "MODE", "commentaire": "Mode", "type_v": "MOD", "rubrique": 1, "rubrique_lib": "L'ENTRETIEN"},
+        {"pos": 2, "lib": "ENFANT", "commentaire": None, "type_v": "NUM", "rubrique": 2, "rubrique_lib": "L'USAGER"},
+        {"pos": 3, "lib": "COMMUNE", "commentaire": None, "type_v": "CHAINE", "rubrique": 9, "rubrique_lib": None},
+    ]
+    options = [
+        {"type_v": "MOD", "pos": 1, "ordre": 1, "code": "1", "lib": "RDV", "val_min": None, "val_max": None},
+        {"type_v": "MOD", "pos": 1, "ordre": 2, "code": "2", "lib": "Sans RDV", "val_min": None, "val_max": None},
+        {"type_v": "NUM", "pos": 2, "ordre": 0, "code": None, "lib": None, "val_min": 0, "val_max": 10},
+        {"type_v": "CHAINE", "pos": 3, "ordre": 1, "code": None, "lib": "Vannes", "val_min": None, "val_max": None},
+    ]
+    mock_cursor.fetchall.side_effect = [variables, options]
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value = mock_cursor
+
+    structure = load_questionnaire_structure(mock_conn)
+
+    # Nombre de requêtes fixe, indépendant du nombre de variables
+    assert mock_cursor.execute.call_count == 2
+    mock_cursor.close.assert_called_once()
+    assert list(structure) == ["L'ENTRETIEN", "L'USAGER", "Autres Champs"]
+    assert structure["L'ENTRETIEN"][0]["options"] == {"RDV": "1", "Sans RDV": "2"}
+    assert structure["L'USAGER"][0]["options"] == {"min": 0, "max": 10}
+    assert structure["Autres Champs"][0]["options"] == ["Vannes"]
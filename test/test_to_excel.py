@@ -1,4 +1,4 @@
-from poc_global import to_excel
+from maisondudroit.export import dataframe_to_excel
 import pandas as pd
 
 def test_to_excel_returns_bytes():
@@ -7,7 +7,7 @@ def test_to_excel_returns_bytes():
         "b": [3, 4]
     })
 
-    excel_bytes = to_excel(df)
+    excel_bytes = dataframe_to_excel(df)
 
     assert isinstance(excel_bytes, bytes)
     assert len(excel_bytes) > 0
@@ -0,0 +1,99 @@
+import json
+from unittest.mock import MagicMock, patch
+
+from maisondudroit import traces_sql
+from maisondudroit.traces_sql import QueryStats, fingerprint, read_slow_queries
+
+
+def test_fingerprint_replaces_literals_and_folds_lists():
+    a = fingerprint("SELECT *  FROM entretien\n WHERE num = 12 AND commune IN ('Vannes', 'Séné')")
+    b = fingerprint("SELECT * FROM entretien WHERE num = 7 AND commune IN ('Theix', 'Arradon', 'Elven')")
+
+    assert a == b == "SELECT * FROM entretien WHERE num = ? AND commune IN (...)"
+    assert fingerprint(b"SELECT 1") == "SELECT ?"
+
+
+def test_stats_aggregate_by_fingerprint():
+    stats = QueryStats(recent_max=2)
+    for ms in (10, 30, 5):
+        stats.record({'empreinte': "SELECT ?", 'duree_ms': ms, 'lignes': 1, 'appelant': "a.f:1", 'le': 0})
+    stats.record({'empreinte': "UPDATE x", 'duree_ms': 100, 'lignes': -1, 'appelant': "b.g:2", 'le': 0})
+
+    top, select = stats.summary()
+    assert top['empreinte'] == "UPDATE x" and top['lignes'] == 0
+    assert (select['appels'], select['total_ms'], select['max_ms'], select['lignes']) == (3, 45.0, 30.0, 3)
+    assert len(stats.recent) == 2
+    assert stats.should_explain("SELECT ?", now=1000) and not stats.should_explain("SELECT ?", now=1100)
+
+    stats.reset()
+    assert stats.summary() == [] and not stats.recent
+
+
+def test_slow_query_is_logged_with_plan(tmp_path, monkeypatch):
+    log = tmp_path / "lentes.jsonl"
+    monkeypatch.setattr(traces_sql, "SLOW_QUERY_LOG", str(log))
+    monkeypatch.setattr(traces_sql, "SLOW_QUERY_MS", 50)
+    monkeypatch.setattr(traces_sql, "STATS", QueryStats())
+    monkeypatch.setattr(traces_sql, "_explain", lambda conn, query, params: f"plan de {query} {params}")
+    conn = MagicMock(closed=0)
+
+    traces_sql._record(conn, "SELECT * FROM entretien WHERE num = %s", (3,), 0.01, 1, "t.f:1")
+    traces_sql._record(conn, "SELECT * FROM entretien WHERE num = %s", (4,), 0.2, 1, "t.f:1")
+    traces_sql._record(conn, "SELECT * FROM entretien WHERE num = %s", (5,), 0.3, 1, "t.f:1")
+
+    entries = [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+    assert len(entries) == 2
+    assert entries[0]['plan'] == "plan de SELECT * FROM entretien WHERE num = %s (4,)"
+    assert 'plan' not in entries[1]       # un seul plan par empreinte et par intervalle
+    assert read_slow_queries(path=str(log))[0]['duree_ms'] == 300
+    assert traces_sql.STATS.summary()[0]['appels'] == 3
+
+
+def test_only_single_explainable_statements_are_replayed():
+    from maisondudroit.statistiques import SQL_REBUILD
+
+    assert traces_sql.explain_options("SELECT * FROM entretien WHERE commune = 'a;b'") == "ANALYZE, BUFFERS"
+    assert traces_sql.explain_options("INSERT INTO demande VALUES (1, 1, '1a')") == "COSTS"
+    assert traces_sql.explain_options("SELECT setval('entretien_num_seq', 10)") == "COSTS"
+    assert traces_sql.explain_options("SELECT * FROM entretien FOR UPDATE") == "COSTS"
+    assert traces_sql.explain_options(SQL_REBUILD) is None
+    assert traces_sql.explain_options("SELECT 1; DELETE FROM entretien") is None
+    for ddl in ("CREATE INDEX i ON entretien (commune)", "DO $$ BEGIN NULL; END $$", "ANALYZE entretien"):
+        assert traces_sql.explain_options(ddl) is None
+
+
+def test_explain_runs_in_a_savepoint():
+    cursor = MagicMock()
+    cursor.execute.side_effect = [None, Exception("syntax error"), None, None]
+    conn = MagicMock(autocommit=False)
+    conn.get_transaction_status.return_value = traces_sql.extensions.TRANSACTION_STATUS_INTRANS
+
+    with patch.object(traces_sql.extensions, "cursor", return_value=cursor):
+        assert traces_sql._explain(conn, "SELECT 1", None).startswith("EXPLAIN impossible")
+        assert traces_sql._explain(conn, "LOCK TABLE entretien", None) is None
+
+    executed = [c.args[0] for c in cursor.execute.call_args_list]
+    assert executed[0] == "SAVEPOINT traces_sql_explain"
+    assert executed[2:] == ["ROLLBACK TO SAVEPOINT traces_sql_explain", "RELEASE SAVEPOINT traces_sql_explain"]
+
+
+def test_slow_ddl_and_scripts_leave_the_transaction_usable(pg_params, monkeypatch):
+    import psycopg2
+
+    monkeypatch.setattr(traces_sql, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(traces_sql, "STATS", QueryStats())
+    monkeypatch.setattr(traces_sql, "log_slow_query", lambda event: None)
+    conn = psycopg2.connect(connection_factory=traces_sql.TracingConnection, **pg_params)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE t_trace (n int)")
+        cursor.execute("LOCK TABLE t_trace IN EXCLUSIVE MODE; INSERT INTO t_trace VALUES (1); "
+                       "INSERT INTO t_trace VALUES (2)")
+        cursor.execute("DO $$ BEGIN INSERT INTO t_trace VALUES (3); END $$")
+        cursor.execute("INSERT INTO t_trace VALUES (4) RETURNING n")
+
+        assert conn.get_transaction_status() == traces_sql.extensions.TRANSACTION_STATUS_INTRANS
+        cursor.execute("SELECT array_agg(n ORDER BY n) FROM t_trace")
+        assert cursor.fetchone()[0] == [1, 2, 3, 4]     # rien rejoué, rien perdu
+    finally:
+        conn.close()
@@ -1,27 +1,22 @@
 import pytest
 import pandas as pd
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 from datetime import date
 
-# --- CORRECTION DES IMPORTS ---
-# On utilise les noms EXACTS présents dans votre fichier poc_global.py
-from poc_global import (
-    insert_demandes,
-    insert_solutions,
-    insert_full_entretien,
-    get_data_for_reporting,
-    save_configuration,
-    upsert_rubrique  # <--- C'est le nom correct (remplace upsert_rubrique)
-)
+# --- IMPORTS ---
+# Fonctions de la bibliothèque maisondudroit : importables sans Streamlit ni base
+from maisondudroit.configuration import save_configuration, upsert_rubrique
+from maisondudroit.reporting import load_reporting_frame
+from maisondudroit.saisie_entretien import insert_demandes, insert_full_entretien, insert_solutions
 
 # --- 1. TESTS DES INSERTIONS ---
 
-@patch('poc_global.connection')
-def test_insert_demandes_success(mock_conn):
+def test_insert_demandes_success():
+    mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
-    insert_demandes(10, [1, 2, 3])
+    insert_demandes(10, [1, 2, 3], conn=mock_conn)
 
     # On vérifie que executemany a été appelé
     mock_cursor.executemany.assert_called_once()
@@ -34,19 +29,19 @@ def test_insert_demandes_success(mock_conn):
     mock_conn.commit.assert_called_once()
 
 
-@patch('poc_global.connection')
-def test_insert_solutions_success(mock_conn):
+def test_insert_solutions_success():
+    mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
-    insert_solutions(5, [10, 20])
+    insert_solutions(5, [10, 20], conn=mock_conn)
 
     mock_cursor.executemany.assert_called_once()
     mock_conn.commit.assert_called_once()
 
 
-@patch('poc_global.connection')
-def test_insert_full_entretien_success(mock_conn):
+def test_insert_full_entretien_success():
+    mock_conn = MagicMock()
     mock_cursor = MagicMock()
     # Simule le retour de l'ID 99 après insertion
     mock_cursor.fetchone.return_value = [99]
@@ -59,7 +54,7 @@ def test_insert_full_entretien_success(mock_conn):
         "origine": 1, "commune": "Nantes", "partenaire": None
     }
 
-    new_id = insert_full_entretien(data)
+    new_id = insert_full_entretien(data, conn=mock_conn)
 
     assert new_id == 99
     mock_cursor.execute.assert_called_once()
@@ -68,32 +63,35 @@ def test_insert_full_entretien_success(mock_conn):
 
 # --- 2. TEST DU REPORTING ---
 
-@patch('poc_global.connection')
-def test_get_data_for_reporting_decoding(mock_conn):
+def test_get_data_for_reporting_decoding():
+    mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
-    # Simulation des 3 appels SQL successifs faits par la fonction
-    raw_data = [{"num": 100, "sexe": 1, "age": 2, "commune": "Paris"}] 
-    var_mapping = [{"pos": 10, "lib": "Sexe"}, {"pos": 20, "lib": "Age"}]
-    mod_mapping = [{"pos": 10, "code": "1", "lib_m": "Homme"}, {"pos": 20, "code": "2", "lib_m": "18-25 ans"}]
+    # Le décodage est fait par PostgreSQL : plan de décodage, libellés, puis lignes décodées lues en flux
+    plan = [("num", None, False), ("sexe", 10, True), ("age", 20, True), ("commune", None, False)]
+    categories = [(10, "Homme"), (10, "Femme"), (20, "18-25 ans")]
+    decoded_rows = [(100, "Homme", "18-25 ans", "Paris")]
+    mock_cursor.fetchall.side_effect = [plan, categories]
+    mock_cursor.fetchmany.side_effect = [decoded_rows, []]
+    mock_cursor.description = [("num",), ("sexe",), ("age",), ("commune",)]
 
-    # side_effect permet de renvoyer une valeur différente à chaque appel de fetchall
-    mock_cursor.fetchall.side_effect = [raw_data, var_mapping, mod_mapping]
-
-    df = get_data_for_reporting()
+    df = load_reporting_frame(mock_conn)
 
     assert isinstance(df, pd.DataFrame)
     assert not df.empty
-    # Vérification que le décodage a bien eu lieu
+    # La requête principale joint modalite pour chaque colonne codée
+    query = mock_cursor.execute.call_args_list[-1][0][0]
+    assert query.count("LEFT JOIN modalite") == 2
     assert df.iloc[0]["sexe"] == "Homme" 
     assert df.iloc[0]["age"] == "18-25 ans"
+    assert list(df["sexe"].cat.categories) == ["Homme", "Femme"]
 
 
 # --- 3. TESTS CONFIGURATION ---
 
-@patch('poc_global.connection')
-def test_upsert_rubrique(mock_conn):
+def test_upsert_rubrique():
+    mock_conn = MagicMock()
     mock_cursor = MagicMock()
     # Simule que la rubrique n'existe pas (None), donc on fera un INSERT
     mock_cursor.fetchone.return_value = None 
@@ -101,7 +99,7 @@ def test_upsert_rubrique(mock_conn):
     
     # Appel de la nouvelle fonction (old_pos, new_pos, lib)
     # On imagine qu'on crée une rubrique à la position 5
-    result = upsert_rubrique(5, 5, "Nouvelle Rubrique")
+    result = upsert_rubrique(5, 5, "Nouvelle Rubrique", conn=mock_conn)
 
     assert result is True
     # Vérifie qu'une requête INSERT a bien été préparée
@@ -110,8 +108,8 @@ def test_upsert_rubrique(mock_conn):
     mock_conn.commit.assert_called_once()
 
 
-@patch('poc_global.connection')
-def test_save_configuration_entretien(mock_conn):
+def test_save_configuration_entretien():
+    mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_conn.cursor.return_value = mock_cursor
 
@@ -123,7 +121,8 @@ def test_save_configuration_entretien(mock_conn):
         var_type="MOD",
         rub_id=1,
         comment="Test",
-        modalites=["Choix A", "Choix B"]
+        modalites=["Choix A", "Choix B"],
+        conn=mock_conn
     )
 
     assert success is True